@@ -1,15 +1,65 @@
 ﻿"""Base agent abstraction."""
-from typing import Any, Dict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
 
+from app.utils.context_compactor import ContextCompactor, get_context_compactor
 from app.utils.llm_client import LLMClient
 
+# Receives LLM text deltas while set (see ``stream_tokens``); scoped per thread/async task.
+_TOKEN_SINK: ContextVar[Optional[Callable[[str], None]]] = ContextVar("agent_token_sink", default=None)
+
+
+class DeferredNarrative(NamedTuple):
+    """An LLM call an agent would have made, captured for the fused pipeline mode."""
+
+    agent: str
+    prompt: str
+    context: Dict[str, Any]
+    placeholder: str
+
+
+_DEFERRED: ContextVar[Optional[Dict[str, DeferredNarrative]]] = ContextVar("agent_deferred_narratives", default=None)
+
+
+@contextmanager
+def defer_narratives() -> Iterator[Dict[str, DeferredNarrative]]:
+    """Inside this block agents skip their LLM call and return a placeholder instead.
+
+    The yielded dict collects ``{context_profile: DeferredNarrative}`` in call order so the
+    caller can generate every narrative at once and substitute the placeholders.
+    """
+    collected: Dict[str, DeferredNarrative] = {}
+    token = _DEFERRED.set(collected)
+    try:
+        yield collected
+    finally:
+        _DEFERRED.reset(token)
+
+
+@contextmanager
+def stream_tokens(sink: Callable[[str], None]) -> Iterator[None]:
+    """Stream LLM output of agents run inside this block to ``sink`` as it is generated."""
+    token = _TOKEN_SINK.set(sink)
+    try:
+        yield
+    finally:
+        _TOKEN_SINK.reset(token)
+
 
 class BaseAgent:
-    """Base class for all agents; provides LLM handle and common run signature."""
+    """Base class for all agents; provides LLM handle and common run signature.
+
+    ``context_profile`` names the ``ContextCompactor`` profile applied to the context
+    before it is sent to the LLM (``None`` sends the context as-is).
+    """
+
+    context_profile: str | None = None
 
-    def __init__(self, llm: LLMClient, response_language: str = "ko"):
+    def __init__(self, llm: LLMClient, response_language: str = "ko", compactor: ContextCompactor | None = None):
         self.llm = llm
         self.response_language = response_language
+        self.compactor = compactor or get_context_compactor()
 
     def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute agent against context. Child classes should override."""
@@ -21,7 +71,20 @@ class BaseAgent:
             f"{prompt}\n\n응답은 반드시 자연스러운 한국어로 작성하고, 필요한 경우 도메인 용어는 그대로 유지하세요."
         )
         try:
-            return self.llm.generate(localized_prompt, context=context)
+            compacted = self.compactor.compact(self.context_profile, context) if self.context_profile else context
+            deferred = _DEFERRED.get()
+            if deferred is not None and self.context_profile:
+                placeholder = f"<<fused:{self.context_profile}>>"
+                deferred[self.context_profile] = DeferredNarrative(self.context_profile, localized_prompt, compacted, placeholder)
+                return placeholder
+            sink = _TOKEN_SINK.get()
+            if sink is None:
+                return self.llm.generate(localized_prompt, context=compacted)
+            parts = []
+            for delta in self.llm.generate_stream(localized_prompt, context=compacted):
+                parts.append(delta)
+                sink(delta)
+            return "".join(parts)
         except Exception:
             studio = context.get('meta', {}).get('studio_id', 'unknown')
             return f"[LLM 스텁 응답: 요청을 처리했으며 대상 스튜디오={studio}]"
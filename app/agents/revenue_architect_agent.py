@@ -7,6 +7,8 @@ from app.agents.base_agent import BaseAgent
 class RevenueArchitectAgent(BaseAgent):
     """Generate prioritized recommendations for wellness studios."""
 
+    context_profile = "revenue_architect"
+
     def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         studio_id = context.get("meta", {}).get("studio_id")
         recs: List[Dict[str, Any]] = []
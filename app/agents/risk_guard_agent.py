@@ -6,39 +6,37 @@ from typing import Any, Dict, List, Tuple
 from app.agents.base_agent import BaseAgent
 from app.services.policy_engine import PolicyEngine
 from app.services.studio_analytics import StudioAnalytics, get_studio_analytics
-
-_SUSPICIOUS_KEYWORDS: Dict[str, Tuple[str, ...]] = {
-    "refund": ("refund", "chargeback", "dispute"),
-    "decline": ("decline", "fraud", "blocked", "failed"),
-    "safety": ("injury", "incident", "hazard"),
-}
+from app.utils.keyword_matcher import KeywordMatcher, get_risk_keyword_matcher
 
 
 class RiskGuardAgent(BaseAgent):
     """Identify wellness risk signals from graph/vector context."""
 
+    context_profile = "risk_guard"
+
     def __init__(
         self,
         llm,
         *,
         policy_engine: PolicyEngine | None = None,
         analytics_service: StudioAnalytics | None = None,
+        keyword_matcher: KeywordMatcher | None = None,
         response_language: str = "ko",
     ):
         super().__init__(llm, response_language=response_language)
         self.policy_engine = policy_engine or PolicyEngine()
         self.analytics = analytics_service or get_studio_analytics()
+        self.keyword_matcher = keyword_matcher or get_risk_keyword_matcher()
 
     def _extract_keyword_flags(self, vectors: List[Dict[str, Any]]) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
-        counts = {key: 0 for key in _SUSPICIOUS_KEYWORDS}
+        counts = {key: 0 for key in self.keyword_matcher.categories}
         flagged_docs: List[Dict[str, Any]] = []
-        for doc in vectors:
-            content = (doc.get("content") or "").lower()
+        matches = self.keyword_matcher.scan_batch([doc.get("content") for doc in vectors])
+        for doc, found in zip(vectors, matches):
             hits = []
-            for label, keywords in _SUSPICIOUS_KEYWORDS.items():
-                if any(word in content for word in keywords):
-                    counts[label] += 1
-                    hits.extend([word for word in keywords if word in content])
+            for label, words in found.items():
+                counts[label] += 1
+                hits.extend(word for word in self.keyword_matcher.categories[label] if word in words)
             if hits:
                 flagged_docs.append(
                     {
@@ -7,6 +7,8 @@ from app.agents.base_agent import BaseAgent
 class StrategyFrameworkAgent(BaseAgent):
     """Provide PESTEL and 5-forces style framing based on context."""
 
+    context_profile = "strategy_framework"
+
     def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         studio_id = context.get("meta", {}).get("studio_id")
         knowledge_refs: List[Dict[str, Any]] = context.get("knowledge") or []
@@ -8,6 +8,8 @@ from app.services.studio_analytics import StudioAnalytics, get_studio_analytics
 class WellnessInsightAgent(BaseAgent):
     """Summarizes studio performance patterns and KPIs."""
 
+    context_profile = "wellness_insight"
+
     def __init__(
         self,
         llm,
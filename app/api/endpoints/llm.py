@@ -0,0 +1,21 @@
+"""LLM runtime metrics (limiter queueing, response cache, context compaction, local batching)."""
+from fastapi import APIRouter
+
+from app.utils.context_compactor import get_context_compactor
+from app.utils.llm_cache import get_llm_cache
+from app.utils.llm_limiter import get_llm_limiter
+from app.utils.local_llm import get_local_llm
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def llm_metrics() -> dict:
+    """Process-wide LLM call metrics: queue wait, retries/hedges, cache hits and prompt token savings."""
+    local = get_local_llm()
+    return {
+        "limiter": get_llm_limiter().metrics(),
+        "cache": dict(get_llm_cache().stats),
+        "compaction": get_context_compactor().stats,
+        "local": local.metrics() if local is not None else None,
+    }
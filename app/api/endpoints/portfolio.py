@@ -0,0 +1,24 @@
+"""Portfolio-wide KPI endpoints."""
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.studio_analytics import PORTFOLIO_METRICS, get_studio_analytics
+
+router = APIRouter()
+
+
+@router.get("/kpis")
+def portfolio_kpis(
+    sort_by: str = Query("net_revenue", description=f"One of: {', '.join(PORTFOLIO_METRICS)}"),
+    order: Literal["asc", "desc"] = "desc",
+    top_k: int | None = Query(None, ge=1),
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+) -> dict:
+    """Rank every studio's KPI snapshot in a single grouped pass."""
+    if sort_by not in PORTFOLIO_METRICS:
+        raise HTTPException(status_code=422, detail=f"sort_by must be one of {list(PORTFOLIO_METRICS)}")
+    analytics = get_studio_analytics()
+    window = analytics.derive_window({"from": from_, "to": to})
+    return analytics.compute_portfolio_kpis(window, sort_by=sort_by, descending=order == "desc", top_k=top_k)
@@ -1,22 +1,66 @@
 ﻿"""Studio insight endpoints."""
+import json
+from typing import Any, Dict, Iterator, Literal
+
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.services.agent_orchestrator import AgentOrchestrator
+from app.services.insight_materializer import InsightMaterializer
+from app.services.insight_store import get_insight_store
 from app.config import get_settings
 
 
 class InsightRequest(BaseModel):
     query: str | None = None
+    workflow: str | None = None
+    force_refresh: bool = False
 
 
 router = APIRouter()
 settings = get_settings()
 orchestrator = AgentOrchestrator(settings=settings)
+materializer = InsightMaterializer(orchestrator, get_insight_store(), max_age_seconds=settings.insight_max_age_seconds)
 
 
 @router.post("/{studio_id}/insights")
 def studio_insights(studio_id: str, payload: InsightRequest) -> dict:
-    """Return aggregated insights for a wellness studio using the agent pipeline."""
-    result = orchestrator.run_full_pipeline(user_query=payload.query, studio_id=studio_id)
-    return result.to_dict()
+    """Return aggregated insights for a wellness studio, served from the nightly materialization when fresh.
+
+    ``freshness.source`` is ``materialized``, ``cache`` or ``live``; ``force_refresh`` recomputes.
+    """
+    return materializer.serve(studio_id, payload.query, payload.workflow, force_refresh=payload.force_refresh)
+
+
+def _sse(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for event in events:
+        name = event.get("event", "message")
+        yield f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+
+def _ndjson(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for event in events:
+        yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+
+
+@router.post("/{studio_id}/insights/stream")
+def studio_insights_stream(
+    studio_id: str,
+    payload: InsightRequest,
+    format: Literal["sse", "ndjson"] = "sse",
+) -> StreamingResponse:
+    """Stream the agent pipeline: LLM token deltas plus each agent's result as soon as it finishes."""
+    events = orchestrator.stream_pipeline(
+        user_query=payload.query,
+        studio_id=studio_id,
+        workflow=payload.workflow,
+        force_refresh=payload.force_refresh,
+    )
+    if format == "ndjson":
+        return StreamingResponse(_ndjson(events), media_type="application/x-ndjson")
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,8 +1,10 @@
 """API router composition."""
 from fastapi import APIRouter
 
-from app.api.endpoints import studios, simulate
+from app.api.endpoints import llm, portfolio, studios, simulate
 
 api_router = APIRouter()
 api_router.include_router(studios.router, prefix="/studios", tags=["studios"])
 api_router.include_router(simulate.router, prefix="/simulate", tags=["simulate"])
+api_router.include_router(portfolio.router, prefix="/portfolio", tags=["portfolio"])
+api_router.include_router(llm.router, prefix="/llm", tags=["llm"])
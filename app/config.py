@@ -21,6 +21,31 @@ class Settings(BaseSettings):
     llm_endpoint: str = Field(default="https://api.openai.com/v1")
     openai_api_key: str | None = Field(default=None, alias="OPENAI_API_KEY")
     cache_ttl_seconds: int = Field(default=300)
+    cache_max_entries: int = Field(default=5)
+    cache_backend: str = Field(default="memory")
+    cache_path: str = Field(default="./data/cache/results.sqlite3")
+    cache_redis_url: str = Field(default="redis://127.0.0.1:6379/0")
+    llm_cache_path: str | None = Field(default="./data/cache/llm_responses.sqlite3")
+    llm_cache_ttl_seconds: int = Field(default=86400)
+    llm_cache_max_entries: int = Field(default=256)
+    llm_requests_per_minute: float = Field(default=500)
+    llm_tokens_per_minute: float = Field(default=200000)
+    llm_max_concurrency: int = Field(default=8)
+    llm_timeout_seconds: float = Field(default=30.0)
+    llm_max_retries: int = Field(default=3)
+    llm_hedge_after_seconds: float | None = Field(default=8.0)
+    llm_fused_agents: bool = Field(default=False)
+    llm_backend: str = Field(default="openai")
+    llm_local_model_path: str | None = Field(default=None)
+    llm_local_max_batch_size: int = Field(default=8)
+    llm_local_max_wait_ms: float = Field(default=10.0)
+    analytics_backend: str = Field(default="csv")
+    analytics_data_dir: str | None = Field(default=None)
+    analytics_dataset_dir: str | None = Field(default=None)
+    policy_rules_path: str | None = Field(default=None)
+    risk_monitor_window_days: int = Field(default=30)
+    insight_store_path: str | None = Field(default="./data/cache/insights.sqlite3")
+    insight_max_age_seconds: float | None = Field(default=129600)
 
 
 def get_settings() -> Settings:
@@ -1,7 +1,9 @@
 ﻿"""Dataclasses describing orchestrator outputs."""
 from __future__ import annotations
 
+import json
 import uuid
+import zlib
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
@@ -36,6 +38,31 @@ class PipelineResult:
             "workflow": self.workflow,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PipelineResult":
+        """Rebuild a result from ``to_dict`` output (e.g. a materialized JSON row)."""
+        return cls(
+            trace_id=data.get("trace_id") or str(uuid.uuid4()),
+            insight=data.get("insight") or {},
+            risk=data.get("risk") or {},
+            recommendation=data.get("recommendation") or {},
+            strategy_framework=data.get("strategy_framework") or {},
+            explanation=data.get("explanation") or {},
+            cached=bool(data.get("cached", False)),
+            trace_log=data.get("trace_log"),
+            knowledge=data.get("knowledge"),
+            workflow=data.get("workflow"),
+        )
+
+    def to_bytes(self) -> bytes:
+        """Compact form for shared caches: minified JSON, zlib-compressed."""
+        text = json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"), default=str)
+        return zlib.compress(text.encode("utf-8"), 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PipelineResult":
+        return cls.from_dict(json.loads(zlib.decompress(data)))
+
     def refresh(self, *, mark_cached: bool) -> "PipelineResult":
         """Return a new instance with a fresh trace id and updated cached flag."""
         return PipelineResult(
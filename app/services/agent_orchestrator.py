@@ -1,9 +1,11 @@
 ﻿from __future__ import annotations
 """Pipeline orchestrator wiring all agents and services."""
 import csv
+import queue
+import threading
 import time
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from app.config import Settings
 from app.services.graphrag_service import GraphRAGService
@@ -13,9 +15,13 @@ from app.services.neo4j_service import Neo4jService
 from app.services.studio_analytics import get_studio_analytics
 from app.services.knowledge_service import KnowledgeService
 from app.services.skill_registry import SkillRegistry, SkillDefinition
+from app.services.fused_agents import FusedNarrator
+from app.utils.llm_cache import get_llm_cache
 from app.utils.llm_client import LLMClient
-from app.utils.cache import TTLCache
+from app.utils.local_llm import get_local_llm
+from app.utils.cache import Codec, TTLCache, get_cache_backend
 from app.models.pipeline import PipelineResult
+from app.agents.base_agent import defer_narratives, stream_tokens
 from app.agents.wellness_insight_agent import WellnessInsightAgent
 from app.agents.risk_guard_agent import RiskGuardAgent
 from app.agents.revenue_architect_agent import RevenueArchitectAgent
@@ -23,6 +29,16 @@ from app.agents.strategy_framework_agent import StrategyFrameworkAgent
 from app.agents.consumer_explainer_agent import ConsumerExplainerAgent
 
 DEFAULT_WORKFLOW_LABEL = "Default Flow"
+# Streamed event name -> PipelineResult attribute, in pipeline order.
+STREAM_STAGES: Tuple[Tuple[str, str], ...] = (
+    ("insight", "insight"),
+    ("risk", "risk"),
+    ("recommendation", "recommendation"),
+    ("strategy", "strategy_framework"),
+    ("explanation", "explanation"),
+)
+# Shared result caches store PipelineResult in its compact (zlib JSON) form.
+PIPELINE_CODEC = Codec(PipelineResult.to_bytes, PipelineResult.from_bytes)
 WORKFLOW_TEMPLATES: Dict[str, Dict[str, Any]] = {
     "Growth Sprint": {
         "label": "Growth Sprint",
@@ -50,7 +66,9 @@ class AgentOrchestrator:
 
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.llm = LLMClient(settings.llm_endpoint, api_key=settings.openai_api_key)
+        self.llm = LLMClient(
+            settings.llm_endpoint, api_key=settings.openai_api_key, cache=get_llm_cache(), backend=get_local_llm()
+        )
         self.vector = VectorService(settings.chroma_path)
         self.ontology = OntologyService(settings.graphdb_endpoint)
         self.neo4j = Neo4jService(settings.neo4j_uri, settings.neo4j_user, settings.neo4j_password)
@@ -62,7 +80,14 @@ class AgentOrchestrator:
         self.reco_agent = RevenueArchitectAgent(self.llm)
         self.strategy_agent = StrategyFrameworkAgent(self.llm)
         self.explainer_agent = ConsumerExplainerAgent(self.llm)
-        self.cache = TTLCache(ttl_seconds=self.settings.cache_ttl_seconds, max_size=5)
+        self.narrator = FusedNarrator(self.llm)
+        self.cache = TTLCache(
+            ttl_seconds=self.settings.cache_ttl_seconds,
+            max_size=self.settings.cache_max_entries,
+            backend=get_cache_backend(),
+            namespace="pipeline",
+            codec=PIPELINE_CODEC,
+        )
         self.workflow_templates = WORKFLOW_TEMPLATES
         self.registry = SkillRegistry()
         self._bootstrap_vector_samples()
@@ -195,23 +220,161 @@ class AgentOrchestrator:
             },
         }
 
+    def _resolve_workflow(
+        self, user_query: str | None, studio_id: str, workflow: Optional[str]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str], str, Tuple[str, str, str]]:
+        template = self.workflow_templates.get(workflow or "")
+        effective_query = (template or {}).get("query") or user_query
+        applied_workflow = (template or {}).get("label") or workflow or DEFAULT_WORKFLOW_LABEL
+        cache_key = (studio_id, effective_query or user_query or "", applied_workflow)
+        return template, effective_query, applied_workflow, cache_key
+
+    def _cached_result(self, cache_key: Tuple[str, str, str]) -> PipelineResult | None:
+        cached: PipelineResult | None = self.cache.get(cache_key)
+        if not cached:
+            return None
+        refreshed = cached.refresh(mark_cached=True)
+        self.cache.set(cache_key, cached)
+        return refreshed
+
     def run_full_pipeline(
         self,
         user_query: str | None,
         studio_id: str,
         workflow: Optional[str] = None,
+        fused: Optional[bool] = None,
+        force_refresh: bool = False,
     ) -> PipelineResult:
-        """Execute pipeline and return aggregated dataclass. Uses TTL cache."""
-        template = self.workflow_templates.get(workflow or "")
-        effective_query = (template or {}).get("query") or user_query
-        applied_workflow = (template or {}).get("label") or workflow or DEFAULT_WORKFLOW_LABEL
-        cache_key = (studio_id, effective_query or user_query or "", applied_workflow)
-        cached: PipelineResult | None = self.cache.get(cache_key)
+        """Execute pipeline and return aggregated dataclass. Uses TTL cache.
+
+        ``fused`` (default ``settings.llm_fused_agents``) generates all agent narratives
+        in one structured completion instead of one call per agent. ``force_refresh``
+        skips the cache lookup (the new result still replaces the cached one).
+        """
+        _, _, _, cache_key = self._resolve_workflow(user_query, studio_id, workflow)
+        cached = None if force_refresh else self._cached_result(cache_key)
         if cached:
-            refreshed = cached.refresh(mark_cached=True)
-            self.cache.set(cache_key, cached)
-            return refreshed
+            return cached
+        if fused is None:
+            fused = self.settings.llm_fused_agents
+        return self._run_agents(user_query, studio_id, workflow, fused=fused)
 
+    def stream_pipeline(
+        self,
+        user_query: str | None,
+        studio_id: str,
+        workflow: Optional[str] = None,
+        force_refresh: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield pipeline events as they happen instead of one final result.
+
+        Events: ``start``; ``token`` (``agent``, ``delta``) while an agent's LLM output
+        streams; one event per finished agent (``insight``, ``risk``, ``recommendation``,
+        ``strategy``, ``explanation``) carrying its full output in ``data``; then ``done``
+        (or ``error``). Cached results replay their agent events immediately unless
+        ``force_refresh`` is set.
+        """
+        _, _, applied_workflow, cache_key = self._resolve_workflow(user_query, studio_id, workflow)
+        cached = None if force_refresh else self._cached_result(cache_key)
+        if cached:
+            yield {"event": "start", "trace_id": cached.trace_id, "studio_id": studio_id, "workflow": cached.workflow, "cached": True}
+            for stage, attribute in STREAM_STAGES:
+                yield {"event": stage, "data": getattr(cached, attribute)}
+            yield self._done_event(cached)
+            return
+
+        trace_id = str(uuid.uuid4())
+        events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        cancelled = threading.Event()
+
+        def emit(event: Dict[str, Any]) -> None:
+            if not cancelled.is_set():
+                events.put(event)
+
+        def work() -> None:
+            try:
+                result = self._run_agents(user_query, studio_id, workflow, trace_id=trace_id, emit=emit)
+                emit(self._done_event(result))
+            except Exception as err:  # pragma: no cover - defensive
+                emit({"event": "error", "trace_id": trace_id, "detail": str(err)})
+            finally:
+                events.put(None)
+
+        threading.Thread(target=work, name=f"pipeline-stream-{trace_id[:8]}", daemon=True).start()
+        yield {"event": "start", "trace_id": trace_id, "studio_id": studio_id, "workflow": applied_workflow, "cached": False}
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            # A disconnected client stops receiving events; the run still completes and fills the cache.
+            cancelled.set()
+
+    @staticmethod
+    def _done_event(result: PipelineResult) -> Dict[str, Any]:
+        return {
+            "event": "done",
+            "trace_id": result.trace_id,
+            "cached": result.cached,
+            "workflow": result.workflow,
+            "knowledge": result.knowledge,
+            "trace_log": result.trace_log,
+        }
+
+    def _run_stage(
+        self,
+        stage: str,
+        skill: str,
+        func,
+        payload: Any,
+        emit: Optional[Callable[[Dict[str, Any]], None]],
+    ) -> Any:
+        if emit is None:
+            return self._execute_skill(skill, func, payload)
+        with stream_tokens(lambda delta: emit({"event": "token", "agent": stage, "delta": delta})):
+            output = self._execute_skill(skill, func, payload)
+        emit({"event": stage, "data": output})
+        return output
+
+    def _run_stages(
+        self,
+        graph_context: Dict[str, Any],
+        emit: Optional[Callable[[Dict[str, Any]], None]],
+    ) -> Dict[str, Any]:
+        """Run the five agents in order; keys are the ``STREAM_STAGES`` event names."""
+        insight = self._run_stage("insight", "wellness_insight", self.insight_agent.run, graph_context, emit)
+        risk = self._run_stage("risk", "risk_guard", self.risk_agent.run, graph_context, emit)
+        recommendation = self._run_stage("recommendation", "revenue_architect", self.reco_agent.run, graph_context, emit)
+        strategy_payload = {**graph_context, "insight": insight, "risk": risk, "recommendation": recommendation}
+        strategy = self._run_stage("strategy", "strategy_framework", self.strategy_agent.run, strategy_payload, emit)
+        explanation_payload = {
+            "insight": insight,
+            "risk": risk,
+            "recommendation": recommendation,
+            "strategy": strategy,
+        }
+        explanation = self._run_stage("explanation", "consumer_explainer", self.explainer_agent.run, explanation_payload, emit)
+        return {
+            "insight": insight,
+            "risk": risk,
+            "recommendation": recommendation,
+            "strategy": strategy,
+            "explanation": explanation,
+        }
+
+    def _run_agents(
+        self,
+        user_query: str | None,
+        studio_id: str,
+        workflow: Optional[str] = None,
+        *,
+        trace_id: Optional[str] = None,
+        emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+        fused: bool = False,
+    ) -> PipelineResult:
+        template, effective_query, applied_workflow, cache_key = self._resolve_workflow(user_query, studio_id, workflow)
         self._register_skills()
         graph_context = self._execute_skill(
             "graphrag_context",
@@ -222,28 +385,25 @@ class AgentOrchestrator:
         graph_context["knowledge"] = knowledge_refs
         graph_context["workflow"] = applied_workflow
 
-        insight = self._execute_skill("wellness_insight", self.insight_agent.run, graph_context)
-        risk = self._execute_skill("risk_guard", self.risk_agent.run, graph_context)
-        recommendation = self._execute_skill("revenue_architect", self.reco_agent.run, graph_context)
-        strategy_payload = {**graph_context, "insight": insight, "risk": risk, "recommendation": recommendation}
-        strategy = self._execute_skill("strategy_framework", self.strategy_agent.run, strategy_payload)
-        explanation_payload = {
-            "insight": insight,
-            "risk": risk,
-            "recommendation": recommendation,
-            "strategy": strategy,
-        }
-        explanation = self._execute_skill("consumer_explainer", self.explainer_agent.run, explanation_payload)
+        # Streaming keeps per-agent calls so tokens can be forwarded as each agent runs.
+        narratives: Dict[str, str] = {}
+        if fused and emit is None:
+            with defer_narratives() as deferred:
+                outputs = self._run_stages(graph_context, None)
+            narratives = self.narrator.generate(deferred)
+            outputs = self.narrator.fill(outputs, narratives)
+        else:
+            outputs = self._run_stages(graph_context, emit)
 
         result = PipelineResult(
-            trace_id=str(uuid.uuid4()),
-            insight=insight,
-            risk=risk,
-            recommendation=recommendation,
-            strategy_framework=strategy,
-            explanation=explanation,
+            trace_id=trace_id or str(uuid.uuid4()),
+            insight=outputs["insight"],
+            risk=outputs["risk"],
+            recommendation=outputs["recommendation"],
+            strategy_framework=outputs["strategy"],
+            explanation=outputs["explanation"],
             cached=False,
-            trace_log=self.registry.export_trace(),
+            trace_log=self.narrator.fill_trace(self.registry.export_trace(), narratives),
             knowledge=knowledge_refs,
             workflow=applied_workflow,
         )
@@ -0,0 +1,439 @@
+"""Typed Parquet storage for StudioAnalytics datasets (optional, requires pyarrow).
+
+Layout under the dataset directory::
+
+    transactions/studio_id=<id>/month=<YYYY-MM>/*.parquet
+    sessions/studio_id=<id>/month=<YYYY-MM>/*.parquet
+    settlements/studio_id=<id>/month=<YYYY-MM>/*.parquet
+    studios.parquet
+
+Dates are stored as timestamps and amounts as doubles, so reads need no
+string parsing. ``event_time`` is the column the CSV path filters windows on
+(the table's date field, else the start of ``period``); ``month`` is derived
+from it and, together with ``studio_id``, lets pyarrow skip whole partitions.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+    import pyarrow.csv as pa_csv  # type: ignore
+    import pyarrow.dataset as ds  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+CSV_BLOCK_SIZE = 64 << 20
+# Open-file cap per block write (kept well under common ``ulimit -n`` defaults).
+MAX_OPEN_FILES = 512
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    date_field: str
+    float_fields: Tuple[str, ...] = ()
+    date_fields: Tuple[str, ...] = ()
+    kpi_columns: Tuple[str, ...] = ()
+
+
+TABLE_SPECS: Dict[str, TableSpec] = {
+    "transactions": TableSpec(
+        "timestamp", ("amount",), ("timestamp",), ("amount", "type", "payment_plan", "member_id", "timestamp")
+    ),
+    "sessions": TableSpec("session_date", (), ("session_date",), ("attendance_status", "member_id")),
+    "settlements": TableSpec(
+        "payout_date", ("amount", "fee_ratio"), ("payout_date",), ("amount", "fee_ratio", "period", "period_end", "payout_date")
+    ),
+}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the parquet analytics backend")
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _to_timestamps(column: "pa.Array") -> "pa.Array":
+    """Vectorised ISO cast, falling back to ``_parse_iso`` for values Arrow rejects."""
+    try:
+        return pc.cast(column, pa.timestamp("us"))
+    except pa.ArrowInvalid:
+        from app.services.studio_analytics import _parse_iso
+
+        return pa.array([_naive_utc(_parse_iso(value)) for value in column.to_pylist()], pa.timestamp("us"))
+
+
+def _to_floats(column: "pa.Array") -> "pa.Array":
+    """Same semantics as ``_safe_float``: blanks and garbage become 0.0."""
+    try:
+        return pc.fill_null(pc.cast(column, pa.float64()), 0.0)
+    except pa.ArrowInvalid:
+        from app.services.studio_analytics import _safe_float
+
+        return pa.array([_safe_float(value) for value in column.to_pylist()], pa.float64())
+
+
+def _period_part(column: "pa.Array", index: int) -> "pa.Array":
+    """Start (0) or end (1) of ``"<start>/<end>"`` period strings as timestamps."""
+    pattern = r"/.*$" if index == 0 else r"^[^/]*/?"
+    part = pc.replace_substring_regex(column, pattern=pattern, replacement="")
+    part = pc.if_else(pc.equal(part, ""), pa.scalar(None, pa.string()), part)
+    return _to_timestamps(part)
+
+
+def _convert_batch(batch: "pa.RecordBatch", spec: TableSpec) -> "pa.Table":
+    table = pa.Table.from_batches([batch])
+    names = table.column_names
+    if "studio_id" not in names and "merchant_id" in names:
+        table = table.append_column("studio_id", table["merchant_id"])
+    for name in spec.float_fields:
+        if name in names:
+            table = table.set_column(names.index(name), name, _to_floats(table[name].combine_chunks()))
+    for name in spec.date_fields:
+        if name in names:
+            table = table.set_column(names.index(name), name, _to_timestamps(table[name].combine_chunks()))
+    if "payment_plan" in names:
+        plan = pc.utf8_trim_whitespace(table["payment_plan"].combine_chunks())
+        plan = pc.if_else(pc.fill_null(pc.equal(plan, ""), True), "unknown", plan)
+        table = table.set_column(names.index("payment_plan"), "payment_plan", plan)
+    null_times = pa.nulls(len(table), pa.timestamp("us"))
+    event_time = table[spec.date_field].combine_chunks() if spec.date_field in names else null_times
+    if "period" in names:
+        period = table["period"].combine_chunks()
+        event_time = pc.coalesce(event_time, _period_part(period, 0))
+        table = table.append_column("period_end", _period_part(period, 1))
+    table = table.append_column("event_time", event_time)
+    table = table.append_column("month", pc.strftime(event_time, format="%Y-%m"))
+    return table
+
+
+def _csv_batches(path: Path) -> Iterator["pa.RecordBatch"]:
+    with path.open(encoding="utf-8-sig", newline="") as handle:
+        header = next(csv.reader(handle), [])
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=True,
+        ),
+    )
+    yield from reader
+
+
+def _partitioning() -> "ds.Partitioning":
+    return ds.partitioning(pa.schema([("studio_id", pa.string()), ("month", pa.string())]), flavor="hive")
+
+
+def _write_partitioned(table: "pa.Table", target: Path, index: int) -> int:
+    """Write one converted CSV block under ``target`` with limits sized to its partitions.
+
+    ``write_dataset`` rejects batches spanning more than ``max_partitions`` (default 1024)
+    studio/month directories, which a single block of a multi-thousand-studio feed easily
+    exceeds. Sorting by partition keys keeps each partition contiguous, so when more
+    partitions are open than ``max_open_files`` allows, closed files are never reopened
+    and each block still writes at most one file per partition.
+    """
+    if not len(table):
+        return 0
+    table = table.sort_by([("studio_id", "ascending"), ("month", "ascending")])
+    partitions = len(table.group_by(["studio_id", "month"]).aggregate([]))
+    ds.write_dataset(
+        table,
+        target,
+        format="parquet",
+        partitioning=_partitioning(),
+        basename_template=f"part-{index:05d}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_partitions=max(partitions, 1),
+        max_open_files=min(partitions, MAX_OPEN_FILES),
+    )
+    return len(table)
+
+
+def convert_csv_dataset(csv_dir: Path, out_dir: Path) -> Dict[str, int]:
+    """Convert the CSV layout read by ``StudioAnalytics`` into the partitioned Parquet layout."""
+    _require_pyarrow()
+    csv_dir, out_dir = Path(csv_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts: Dict[str, int] = {}
+    for table_name, spec in TABLE_SPECS.items():
+        source = csv_dir / f"{table_name}.csv"
+        if not source.exists():
+            logger.warning("Sample file %s not found", source)
+            continue
+        target = out_dir / table_name
+        if target.exists():
+            shutil.rmtree(target)
+        counts[table_name] = 0
+        for index, batch in enumerate(_csv_batches(source)):
+            counts[table_name] += _write_partitioned(_convert_batch(batch, spec), target, index)
+        if not counts[table_name]:
+            del counts[table_name]
+    studios = csv_dir / "studios.csv"
+    if studios.exists():
+        table = pa.Table.from_batches(list(_csv_batches(studios)))
+        pq.write_table(table, out_dir / "studios.parquet")
+        counts["studios"] = len(table)
+    return counts
+
+
+# Value a typed row gets when the CSV has no such column (see ``studio_analytics._transaction_row`` etc.).
+_MISSING_COLUMNS: Dict[str, Tuple[Any, Any]] = {}
+if pa is not None:
+    _MISSING_COLUMNS = {
+        "amount": (0.0, pa.float64()),
+        "fee_ratio": (0.0, pa.float64()),
+        "type": ("", pa.string()),
+        "payment_plan": ("unknown", pa.string()),
+        "member_id": ("", pa.string()),
+        "attendance_status": ("", pa.string()),
+        "timestamp": (None, pa.timestamp("us")),
+        "period_end": (None, pa.timestamp("us")),
+        "payout_date": (None, pa.timestamp("us")),
+    }
+
+
+def _empty_aggregates() -> Dict[str, Dict[str, Any]]:
+    return {
+        "financials": {
+            "rows": 0,
+            "positive": 0.0,
+            "refunds": 0.0,
+            "members": 0,
+            "repeat_members": 0,
+            "top_plans": [],
+            "first_date": None,
+            "last_date": None,
+        },
+        "attendance": {"total": 0, "attended": 0, "missed": 0, "members": 0, "tx_rows": 0},
+        "settlements": {"rows": 0, "total_amount": 0.0, "fee_sum": 0.0, "lag_sum": 0, "lag_count": 0},
+    }
+
+
+class ParquetAnalyticsStore:
+    """Reads typed rows with studio/month partition pruning and row-level window filters."""
+
+    def __init__(self, dataset_dir: Path):
+        _require_pyarrow()
+        self.dataset_dir = Path(dataset_dir)
+        if not self.dataset_dir.exists():
+            raise FileNotFoundError(f"Parquet dataset not found: {self.dataset_dir}")
+        self._datasets: Dict[str, Optional["ds.Dataset"]] = {}
+
+    def _dataset(self, table: str) -> Optional["ds.Dataset"]:
+        if table not in self._datasets:
+            path = self.dataset_dir / table
+            self._datasets[table] = (
+                ds.dataset(path, format="parquet", partitioning=_partitioning()) if path.exists() else None
+            )
+        return self._datasets[table]
+
+    @staticmethod
+    def _filter(studio_id: Optional[str], start: Optional[datetime], end: Optional[datetime]) -> Optional["ds.Expression"]:
+        expr = None
+
+        def both(left, right):
+            return right if left is None else left & right
+
+        if studio_id:
+            expr = both(expr, ds.field("studio_id") == studio_id)
+        month, event_time = ds.field("month"), ds.field("event_time")
+        if start:
+            start = _naive_utc(start)
+            expr = both(expr, month.is_null() | (month >= start.strftime("%Y-%m")))
+            expr = both(expr, event_time.is_null() | (event_time >= pa.scalar(start, pa.timestamp("us"))))
+        if end:
+            end = _naive_utc(end)
+            expr = both(expr, month.is_null() | (month <= end.strftime("%Y-%m")))
+            expr = both(expr, event_time.is_null() | (event_time <= pa.scalar(end, pa.timestamp("us"))))
+        return expr
+
+    def rows(
+        self,
+        table: str,
+        studio_id: Optional[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Rows of ``table`` in the window, projected to ``studio_id`` plus the columns KPI summaries read."""
+        dataset = self._dataset(table)
+        if dataset is None:
+            return []
+        columns = [name for name in ("studio_id", *TABLE_SPECS[table].kpi_columns) if name in dataset.schema.names]
+        return dataset.to_table(columns=columns, filter=self._filter(studio_id, start, end)).to_pylist()
+
+    def _scan(self, table: str, columns: Tuple[str, ...], start: Optional[datetime], end: Optional[datetime]) -> Optional["pa.Table"]:
+        """Projected Arrow table of ``table`` in the window.
+
+        Columns absent from the feed are filled with the values the typed-row
+        converters default to; ``None`` when the table (or its ``studio_id``) is missing.
+        """
+        dataset = self._dataset(table)
+        if dataset is None or "studio_id" not in dataset.schema.names:
+            return None
+        names = dataset.schema.names
+        scanned = dataset.to_table(
+            columns=["studio_id", *(name for name in columns if name in names)], filter=self._filter(None, start, end)
+        )
+        for name in columns:
+            if name not in names:
+                value, value_type = _MISSING_COLUMNS[name]
+                scanned = scanned.append_column(name, pa.array([value] * len(scanned), value_type))
+        return scanned
+
+    def portfolio_aggregates(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[Optional[str], Dict[str, Dict[str, Any]]]:
+        """Per-studio KPI aggregates (same shape as ``SqliteAnalyticsStore``) from Arrow ``group_by``.
+
+        Only the aggregated columns are scanned and no per-row Python objects are
+        built; the result holds one small dict per studio.
+        """
+        from app.services.studio_analytics import REFUND_TYPES
+
+        results: Dict[Optional[str], Dict[str, Dict[str, Any]]] = {}
+
+        def block(group: Optional[str], name: str) -> Dict[str, Any]:
+            if group not in results:
+                results[group] = _empty_aggregates()
+            return results[group][name]
+
+        transactions = self._scan("transactions", ("amount", "type", "payment_plan", "member_id", "timestamp"), start, end)
+        if transactions is not None:
+            amount = transactions["amount"]
+            positive = pc.greater_equal(amount, 0)
+            kind = pc.utf8_lower(pc.fill_null(transactions["type"], ""))
+            refund = pc.or_(pc.less(amount, 0), pc.is_in(kind, value_set=pa.array(sorted(REFUND_TYPES))))
+            member = pc.fill_null(transactions["member_id"], "")
+            frame = pa.table({
+                "studio_id": transactions["studio_id"],
+                "member_id": member,
+                "payment_plan": transactions["payment_plan"],
+                "positive": pc.if_else(positive, amount, 0.0),
+                "refund": pc.if_else(refund, pc.abs(amount), 0.0),
+                "is_positive": positive,
+                "timestamp": transactions["timestamp"],
+                "position": pa.array(range(len(transactions)), pa.int64()),
+            })
+            for row in frame.group_by("studio_id").aggregate([
+                ("positive", "count"), ("positive", "sum"), ("refund", "sum"), ("timestamp", "min"), ("timestamp", "max"),
+            ]).to_pylist():
+                block(row["studio_id"], "financials").update(
+                    rows=row["positive_count"],
+                    positive=row["positive_sum"],
+                    refunds=row["refund_sum"],
+                    first_date=row["timestamp_min"],
+                    last_date=row["timestamp_max"],
+                )
+                block(row["studio_id"], "attendance")["tx_rows"] = row["positive_count"]
+            per_member = frame.filter(pc.not_equal(member, "")).group_by(["studio_id", "member_id"]).aggregate([("position", "count")])
+            for row in pa.table({
+                "studio_id": per_member["studio_id"],
+                "repeat": pc.cast(pc.greater(per_member["position_count"], 1), pa.int64()),
+            }).group_by("studio_id").aggregate([("repeat", "count"), ("repeat", "sum")]).to_pylist():
+                block(row["studio_id"], "financials").update(members=row["repeat_count"], repeat_members=row["repeat_sum"])
+            # Ties keep first-seen order, like Counter.most_common on the row path.
+            plans = frame.filter(frame["is_positive"]).group_by(["studio_id", "payment_plan"]).aggregate(
+                [("positive", "sum"), ("position", "min")]
+            ).sort_by([("studio_id", "ascending"), ("positive_sum", "descending"), ("position_min", "ascending")])
+            for row in plans.to_pylist():
+                top_plans = block(row["studio_id"], "financials")["top_plans"]
+                if len(top_plans) < 5:
+                    top_plans.append((row["payment_plan"], row["positive_sum"]))
+
+        sessions = self._scan("sessions", ("attendance_status", "member_id"), start, end)
+        if sessions is not None:
+            status = pc.utf8_lower(pc.fill_null(sessions["attendance_status"], ""))
+            member = sessions["member_id"]
+            frame = pa.table({
+                "studio_id": sessions["studio_id"],
+                "attended": pc.cast(pc.equal(status, "attended"), pa.int64()),
+                "missed": pc.cast(pc.equal(status, "missed"), pa.int64()),
+                # Empty ids become null so count_distinct (non-null only) skips them.
+                "member_id": pc.if_else(pc.equal(pc.fill_null(member, ""), ""), pa.scalar(None, pa.string()), member),
+            })
+            for row in frame.group_by("studio_id").aggregate([
+                ("attended", "count"), ("attended", "sum"), ("missed", "sum"), ("member_id", "count_distinct"),
+            ]).to_pylist():
+                block(row["studio_id"], "attendance").update(
+                    total=row["attended_count"],
+                    attended=row["attended_sum"],
+                    missed=row["missed_sum"],
+                    members=row["member_id_count_distinct"],
+                )
+
+        settlements = self._scan("settlements", ("amount", "fee_ratio", "period_end", "payout_date"), start, end)
+        if settlements is not None:
+            lag_us = pc.cast(pc.subtract(settlements["payout_date"], settlements["period_end"]), pa.int64())
+            frame = pa.table({
+                "studio_id": settlements["studio_id"],
+                "amount": settlements["amount"],
+                "fee_ratio": settlements["fee_ratio"],
+                # timedelta.days floors, so negative lags round down as on the row path.
+                "lag": pc.cast(pc.floor(pc.divide(pc.cast(lag_us, pa.float64()), 86_400_000_000.0)), pa.int64()),
+            })
+            for row in frame.group_by("studio_id").aggregate([
+                ("amount", "count"), ("amount", "sum"), ("fee_ratio", "sum"), ("lag", "sum"), ("lag", "count"),
+            ]).to_pylist():
+                block(row["studio_id"], "settlements").update(
+                    rows=row["amount_count"],
+                    total_amount=row["amount_sum"] or 0.0,
+                    fee_sum=row["fee_ratio_sum"] or 0.0,
+                    lag_sum=row["lag_sum"] or 0,
+                    lag_count=row["lag_count"],
+                )
+        for aggregates in results.values():
+            attendance = aggregates["attendance"]
+            if not attendance["total"]:
+                attendance["members"] = aggregates["financials"]["members"]
+        return results
+
+    def plan_aggregates(self) -> Dict[str, Dict[str, float]]:
+        """Per-plan positive revenue, refund total and positive-row count, scanned batch by batch."""
+        aggregates: Dict[str, Dict[str, float]] = {}
+        dataset = self._dataset("transactions")
+        if dataset is None:
+            return aggregates
+        if "amount" not in dataset.schema.names:
+            return aggregates
+        has_plan = "payment_plan" in dataset.schema.names
+        for batch in dataset.to_batches(columns=["payment_plan", "amount"] if has_plan else ["amount"]):
+            amount = batch.column("amount")
+            positive = pc.greater_equal(amount, 0)
+            grouped = pa.table({
+                "plan": batch.column("payment_plan") if has_plan else pa.repeat("unknown", len(batch)),
+                "positive": pc.if_else(positive, amount, 0.0),
+                "refund": pc.if_else(positive, 0.0, pc.negate(amount)),
+                "count": pc.cast(positive, pa.int64()),
+            }).group_by("plan").aggregate([("positive", "sum"), ("refund", "sum"), ("count", "sum")])
+            for row in grouped.to_pylist():
+                bucket = aggregates.setdefault(row["plan"], {"positive": 0.0, "refund": 0.0, "count": 0})
+                bucket["positive"] += row["positive_sum"]
+                bucket["refund"] += row["refund_sum"]
+                bucket["count"] += row["count_sum"]
+        return aggregates
+
+    def studios(self) -> List[Dict[str, Any]]:
+        path = self.dataset_dir / "studios.parquet"
+        return pq.read_table(path).to_pylist() if path.exists() else []
+
+
+__all__ = ["ParquetAnalyticsStore", "TABLE_SPECS", "convert_csv_dataset"]
@@ -0,0 +1,337 @@
+"""Embedded SQLite engine for StudioAnalytics KPI aggregation.
+
+``import_csv_dataset`` streams the CSV layout into a single database file
+with typed columns and ``(studio_id, event_time)`` indexes. KPI blocks and
+plan statistics are then computed with SQL aggregations, so process memory
+stays flat no matter how long the history is. Timestamps are stored as
+``datetime.isoformat()`` text (naive UTC), which sorts chronologically and
+round-trips into the same strings the in-memory path reports.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INSERT_BATCH = 50_000
+REFUND_TYPES = ("refund", "chargeback", "dispute")
+
+SCHEMA = """
+CREATE TABLE transactions (
+    studio_id TEXT,
+    event_time TEXT,
+    ts TEXT,
+    amount REAL NOT NULL,
+    type TEXT NOT NULL,
+    payment_plan TEXT NOT NULL,
+    member_id TEXT NOT NULL
+);
+CREATE TABLE sessions (
+    studio_id TEXT,
+    event_time TEXT,
+    attendance_status TEXT NOT NULL,
+    member_id TEXT NOT NULL
+);
+CREATE TABLE settlements (
+    studio_id TEXT,
+    event_time TEXT,
+    amount REAL NOT NULL,
+    fee_ratio REAL NOT NULL,
+    period_end TEXT,
+    payout_date TEXT
+);
+CREATE TABLE studios (
+    studio_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX ix_transactions_studio_time ON transactions (studio_id, event_time);
+CREATE INDEX ix_sessions_studio_time ON sessions (studio_id, event_time);
+CREATE INDEX ix_settlements_studio_time ON settlements (studio_id, event_time);
+"""
+
+
+def _iso(value: Optional[str]) -> Optional[str]:
+    from app.services.studio_analytics import _parse_iso
+
+    parsed = _parse_iso(value)
+    if parsed is None:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def _bound(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _read_csv(path: Path) -> Iterator[Dict[str, str]]:
+    with path.open(encoding="utf-8-sig", newline="") as handle:
+        yield from csv.DictReader(handle)
+
+
+def _event_time(row: Dict[str, str], date_field: str) -> Optional[str]:
+    """Same precedence as ``StudioAnalytics._filter_rows``: the date field, else ``period``."""
+    return _iso(row.get(date_field) or row.get("period"))
+
+
+def _transaction_rows(path: Path) -> Iterator[Tuple[Any, ...]]:
+    from app.services.studio_analytics import _safe_float
+
+    for row in _read_csv(path):
+        ts = _iso(row.get("timestamp"))
+        yield (
+            row.get("studio_id") or row.get("merchant_id"),
+            ts if row.get("timestamp") else _event_time(row, "timestamp"),
+            ts,
+            _safe_float(row.get("amount")),
+            (row.get("type") or "").lower(),
+            (row.get("payment_plan") or "unknown").strip() or "unknown",
+            row.get("member_id") or "",
+        )
+
+
+def _session_rows(path: Path) -> Iterator[Tuple[Any, ...]]:
+    for row in _read_csv(path):
+        yield (
+            row.get("studio_id") or row.get("merchant_id"),
+            _event_time(row, "session_date"),
+            (row.get("attendance_status") or "").lower(),
+            row.get("member_id") or "",
+        )
+
+
+def _settlement_rows(path: Path) -> Iterator[Tuple[Any, ...]]:
+    from app.services.studio_analytics import _safe_float
+
+    for row in _read_csv(path):
+        _, _, period_end = (row.get("period") or "").partition("/")
+        yield (
+            row.get("studio_id") or row.get("merchant_id"),
+            _event_time(row, "payout_date"),
+            _safe_float(row.get("amount")),
+            _safe_float(row.get("fee_ratio")),
+            _iso(period_end),
+            _iso(row.get("payout_date")),
+        )
+
+
+def import_csv_dataset(csv_dir: Path, db_path: Path) -> Dict[str, int]:
+    """(Re)build ``db_path`` from the CSV layout read by ``StudioAnalytics``."""
+    csv_dir, db_path = Path(csv_dir), Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_suffix(db_path.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    counts: Dict[str, int] = {}
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        loaders = (
+            ("transactions", _transaction_rows, 7),
+            ("sessions", _session_rows, 4),
+            ("settlements", _settlement_rows, 6),
+        )
+        for table, rows_fn, width in loaders:
+            path = csv_dir / f"{table}.csv"
+            counts[table] = 0
+            if not path.exists():
+                logger.warning("Sample file %s not found", path)
+                continue
+            statement = f"INSERT INTO {table} VALUES ({', '.join('?' * width)})"
+            rows = rows_fn(path)
+            while batch := list(islice(rows, INSERT_BATCH)):
+                conn.executemany(statement, batch)
+                counts[table] += len(batch)
+        studios_path = csv_dir / "studios.csv"
+        if studios_path.exists():
+            studios = [(row.get("studio_id"), json.dumps(row, ensure_ascii=False)) for row in _read_csv(studios_path)]
+            conn.executemany("INSERT OR REPLACE INTO studios VALUES (?, ?)", studios)
+            counts["studios"] = len(studios)
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    tmp_path.replace(db_path)
+    return counts
+
+
+class SqliteAnalyticsStore:
+    """Read-only KPI aggregations over a database built by ``import_csv_dataset``."""
+
+    def __init__(self, db_path: Path, *, cache_kib: int = 16_384):
+        self.db_path = Path(db_path)
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"SQLite analytics database not found: {self.db_path}")
+        self.cache_kib = cache_kib
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            conn.execute(f"PRAGMA cache_size = -{int(self.cache_kib)}")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _where(studio_id: Optional[str], start: Optional[datetime], end: Optional[datetime]) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if studio_id:
+            clauses.append("studio_id = ?")
+            params.append(studio_id)
+        if start:
+            clauses.append("(event_time IS NULL OR event_time >= ?)")
+            params.append(_bound(start))
+        if end:
+            clauses.append("(event_time IS NULL OR event_time <= ?)")
+            params.append(_bound(end))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def kpi_aggregates(
+        self,
+        studio_id: Optional[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Raw aggregates for the financials/attendance/settlements blocks of ``compute_kpis``."""
+        where, params = self._where(studio_id, start, end)
+        return self._aggregates(where, params, by_studio=False).get(None) or self._empty_aggregates()
+
+    def portfolio_aggregates(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[Optional[str], Dict[str, Dict[str, Any]]]:
+        """``kpi_aggregates`` for every studio at once, one ``GROUP BY studio_id`` query per block."""
+        where, params = self._where(None, start, end)
+        return self._aggregates(where, params, by_studio=True)
+
+    @staticmethod
+    def _empty_aggregates() -> Dict[str, Dict[str, Any]]:
+        return {
+            "financials": {
+                "rows": 0,
+                "positive": 0.0,
+                "refunds": 0.0,
+                "members": 0,
+                "repeat_members": 0,
+                "top_plans": [],
+                "first_date": None,
+                "last_date": None,
+            },
+            "attendance": {"total": 0, "attended": 0, "missed": 0, "members": 0, "tx_rows": 0},
+            "settlements": {"rows": 0, "total_amount": 0.0, "fee_sum": 0.0, "lag_sum": 0, "lag_count": 0},
+        }
+
+    def _aggregates(self, where: str, params: List[Any], *, by_studio: bool) -> Dict[Optional[str], Dict[str, Dict[str, Any]]]:
+        """Aggregates keyed by studio (or a single ``None`` key); groups without rows are absent."""
+        conn = self._conn()
+        key = "studio_id" if by_studio else "NULL"
+        results: Dict[Optional[str], Dict[str, Dict[str, Any]]] = {}
+
+        def block(group: Optional[str], name: str) -> Dict[str, Any]:
+            if group not in results:
+                results[group] = self._empty_aggregates()
+            return results[group][name]
+
+        def extend(clause: str) -> str:
+            return f"{where} AND {clause}" if where else f" WHERE {clause}"
+
+        refund_types = ", ".join(f"'{value}'" for value in REFUND_TYPES)
+        member_where = extend("member_id <> ''")
+        for group, rows, positive, refunds, first_ts, last_ts in conn.execute(
+            f"SELECT {key}, COUNT(*), "
+            "COALESCE(SUM(CASE WHEN amount >= 0 THEN amount END), 0.0), "
+            f"COALESCE(SUM(CASE WHEN amount < 0 OR type IN ({refund_types}) THEN abs(amount) END), 0.0), "
+            f"MIN(ts), MAX(ts) FROM transactions{where} GROUP BY 1",
+            params,
+        ):
+            financials = block(group, "financials")
+            financials.update(
+                rows=rows,
+                positive=positive,
+                refunds=refunds,
+                first_date=datetime.fromisoformat(first_ts) if first_ts else None,
+                last_date=datetime.fromisoformat(last_ts) if last_ts else None,
+            )
+            block(group, "attendance")["tx_rows"] = rows
+        for group, members, repeat_members in conn.execute(
+            "SELECT grp, COUNT(*), COALESCE(SUM(cnt > 1), 0) FROM "
+            f"(SELECT {key} AS grp, COUNT(*) AS cnt FROM transactions{member_where} "
+            "GROUP BY grp, member_id) GROUP BY grp",
+            params,
+        ):
+            block(group, "financials").update(members=members, repeat_members=repeat_members)
+        for group, plan, revenue in conn.execute(
+            "SELECT grp, payment_plan, revenue FROM ("
+            "SELECT grp, payment_plan, revenue, "
+            "ROW_NUMBER() OVER (PARTITION BY grp ORDER BY revenue DESC, first_row) AS position FROM ("
+            f"SELECT {key} AS grp, payment_plan, SUM(amount) AS revenue, MIN(rowid) AS first_row "
+            f"FROM transactions{extend('amount >= 0')} GROUP BY grp, payment_plan)"
+            ") WHERE position <= 5 ORDER BY grp, position",
+            params,
+        ):
+            block(group, "financials")["top_plans"].append((plan, revenue))
+        for group, total, attended, missed, members in conn.execute(
+            f"SELECT {key}, COUNT(*), COALESCE(SUM(attendance_status = 'attended'), 0), "
+            "COALESCE(SUM(attendance_status = 'missed'), 0), "
+            "COUNT(DISTINCT CASE WHEN member_id <> '' THEN member_id END) "
+            f"FROM sessions{where} GROUP BY 1",
+            params,
+        ):
+            block(group, "attendance").update(total=total, attended=attended, missed=missed, members=members)
+        lag_seconds = "(CAST(strftime('%s', payout_date) AS INTEGER) - CAST(strftime('%s', period_end) AS INTEGER))"
+        lag_days = (
+            f"CASE WHEN {lag_seconds} >= 0 THEN {lag_seconds} / 86400 "
+            f"ELSE -((86399 - {lag_seconds}) / 86400) END"
+        )
+        for group, rows, total_amount, fee_sum, lag_sum, lag_count in conn.execute(
+            f"SELECT {key}, COUNT(*), COALESCE(SUM(amount), 0.0), COALESCE(SUM(fee_ratio), 0.0), "
+            f"COALESCE(SUM(CASE WHEN period_end IS NOT NULL AND payout_date IS NOT NULL THEN {lag_days} END), 0), "
+            "COALESCE(SUM(period_end IS NOT NULL AND payout_date IS NOT NULL), 0) "
+            f"FROM settlements{where} GROUP BY 1",
+            params,
+        ):
+            block(group, "settlements").update(
+                rows=rows, total_amount=total_amount, fee_sum=fee_sum, lag_sum=lag_sum, lag_count=lag_count
+            )
+        for aggregates in results.values():
+            attendance = aggregates["attendance"]
+            if not attendance["total"]:
+                attendance["members"] = aggregates["financials"]["members"]
+        return results
+
+    def plan_aggregates(self) -> Dict[str, Dict[str, float]]:
+        rows = self._conn().execute(
+            "SELECT payment_plan, "
+            "COALESCE(SUM(CASE WHEN amount >= 0 THEN amount END), 0.0), "
+            "COALESCE(SUM(CASE WHEN amount < 0 THEN -amount END), 0.0), "
+            "SUM(amount >= 0) "
+            "FROM transactions GROUP BY payment_plan ORDER BY MIN(rowid)"
+        ).fetchall()
+        return {plan: {"positive": positive, "refund": refund, "count": count} for plan, positive, refund, count in rows}
+
+    def studios(self) -> List[Dict[str, Any]]:
+        return [json.loads(payload) for (payload,) in self._conn().execute("SELECT payload FROM studios ORDER BY rowid")]
+
+
+__all__ = ["SqliteAnalyticsStore", "import_csv_dataset"]
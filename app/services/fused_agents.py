@@ -0,0 +1,110 @@
+"""Fused pipeline mode: every agent narrative generated by one structured completion.
+
+Agents run as usual inside ``defer_narratives()``, so their deterministic outputs are
+computed but their LLM calls are captured instead of executed. ``FusedNarrator`` then
+sends the (already compacted) contexts once, merged, with a JSON schema that has one
+string field per agent, and substitutes the placeholders in the agent outputs. When no
+LLM is configured or the structured output is missing a section, the captured calls are
+replayed one by one, in pipeline order, so later agents see earlier narratives.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Mapping
+
+from app.agents.base_agent import DeferredNarrative
+from app.utils.llm_client import LLMClient
+
+logger = logging.getLogger(__name__)
+
+FUSED_INSTRUCTION = (
+    "아래 공통 컨텍스트(context)를 한 번만 참고해 각 에이전트 섹션을 모두 작성하세요. "
+    "섹션마다 JSON 필드 하나를 채우며, 섹션별 지시는 다음과 같습니다."
+)
+
+
+def _replace(value: Any, replacements: Mapping[str, str]) -> Any:
+    """Deep copy of ``value`` with placeholder strings swapped for generated text."""
+    if isinstance(value, str):
+        return replacements.get(value, value)
+    if isinstance(value, dict):
+        return {key: _replace(item, replacements) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace(item, replacements) for item in value]
+    return value
+
+
+def _merge(target: Dict[str, Any], source: Mapping[str, Any], placeholders: frozenset) -> Dict[str, Any]:
+    """Union of compacted contexts: nested dicts merge, the longer list wins, placeholders are dropped."""
+    for key, value in source.items():
+        if isinstance(value, str) and value in placeholders:
+            continue
+        current = target.get(key)
+        if isinstance(value, Mapping):
+            target[key] = _merge(current if isinstance(current, dict) else {}, value, placeholders)
+            if not target[key]:
+                del target[key]
+        elif isinstance(value, list):
+            if not isinstance(current, list) or len(value) > len(current):
+                target[key] = value
+        elif key not in target:
+            target[key] = value
+    return target
+
+
+class FusedNarrator:
+    """Generates all deferred agent narratives with a single LLM round-trip."""
+
+    def __init__(self, llm: LLMClient):
+        self.llm = llm
+        self.stats = {"fused": 0, "fallback": 0}
+
+    def request(self, deferred: Mapping[str, DeferredNarrative]) -> tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """``(prompt, shared context, JSON schema)`` for one fused completion."""
+        placeholders = frozenset(item.placeholder for item in deferred.values())
+        shared: Dict[str, Any] = {}
+        for item in deferred.values():
+            _merge(shared, item.context, placeholders)
+        sections = "\n".join(f"- {agent}: {item.prompt}" for agent, item in deferred.items())
+        schema = {
+            "type": "object",
+            "properties": {agent: {"type": "string"} for agent in deferred},
+            "required": list(deferred),
+            "additionalProperties": False,
+        }
+        return f"{FUSED_INSTRUCTION}\n{sections}", shared, schema
+
+    def generate(self, deferred: Mapping[str, DeferredNarrative]) -> Dict[str, str]:
+        """``{placeholder: narrative}`` for every deferred call."""
+        if not deferred:
+            return {}
+        prompt, shared, schema = self.request(deferred)
+        sections = self.llm.generate_json(prompt, shared, schema, name="agent_sections")
+        if sections and all(isinstance(sections.get(agent), str) and sections[agent].strip() for agent in deferred):
+            self.stats["fused"] += 1
+            return {item.placeholder: sections[agent] for agent, item in deferred.items()}
+        if sections is not None:
+            logger.warning("Fused agent output missing sections %s; falling back to per-agent calls",
+                           [agent for agent in deferred if not isinstance(sections.get(agent), str)])
+        self.stats["fallback"] += 1
+        return self._per_agent(list(deferred.values()))
+
+    def _per_agent(self, deferred: List[DeferredNarrative]) -> Dict[str, str]:
+        texts: Dict[str, str] = {}
+        for item in deferred:
+            context = _replace(item.context, texts)
+            try:
+                texts[item.placeholder] = self.llm.generate(item.prompt, context=context)
+            except Exception:  # pragma: no cover - mirrors BaseAgent._llm_or_stub guardrail
+                studio = context.get("meta", {}).get("studio_id", "unknown")
+                texts[item.placeholder] = f"[LLM 스텁 응답: 요청을 처리했으며 대상 스튜디오={studio}]"
+        return texts
+
+    @staticmethod
+    def fill(outputs: Mapping[str, Any], texts: Mapping[str, str]) -> Dict[str, Any]:
+        return _replace(dict(outputs), texts)
+
+    @staticmethod
+    def fill_trace(trace: List[Dict[str, Any]], texts: Mapping[str, str]) -> List[Dict[str, Any]]:
+        """Skill runs were recorded while placeholders stood in for narratives."""
+        return _replace(trace, texts) if texts else trace
@@ -87,9 +87,8 @@ class GraphRAGService:
         }
 
     def seed_neo4j_from_ontology(self) -> Dict[str, Any]:
-        """Load ontology-derived nodes/relationships into Neo4j."""
-        payload = self.ontology_service.to_neo4j_nodes_and_rels()
-        return self.neo4j_service.load_nodes_and_relationships(payload)
+        """Stream ontology-derived nodes/relationships into Neo4j in bounded batches."""
+        return self.neo4j_service.load_batches(self.ontology_service.iter_neo4j_batches())
 
     def build_reasoned_evidence(self, user_query: str | None, studio_id: str) -> Dict[str, Any]:
         """Combine vector/graph/Neo4j 결과를 증거 구조로 가공."""
@@ -0,0 +1,143 @@
+"""Batch materialization of pipeline results and store-first serving.
+
+``InsightMaterializer.materialize`` precomputes ``PipelineResult`` for every studio
+and workflow (the default flow plus ``WORKFLOW_TEMPLATES``) on a process pool, one
+orchestrator per worker, and writes each result to the ``InsightStore`` as soon as it
+finishes. Rows are tagged with the run id, so ``resume=`` continues an interrupted run.
+``serve`` answers API requests from the store with a freshness block and runs the
+pipeline live only on a miss, a stale row or ``force_refresh``.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+from app.models.pipeline import PipelineResult
+from app.services.agent_orchestrator import DEFAULT_WORKFLOW_LABEL, WORKFLOW_TEMPLATES, AgentOrchestrator
+from app.services.insight_store import InsightStore, MaterializedInsight
+
+logger = logging.getLogger(__name__)
+
+Job = Tuple[str, Optional[str]]  # (studio_id, workflow template name or None for the default flow)
+
+_WORKER_ORCHESTRATOR: Optional[AgentOrchestrator] = None
+
+
+def _init_worker() -> None:
+    global _WORKER_ORCHESTRATOR
+    _WORKER_ORCHESTRATOR = AgentOrchestrator(get_settings())
+
+
+def _run_job(job: Job) -> Dict[str, Any]:
+    studio_id, workflow = job
+    return _WORKER_ORCHESTRATOR.run_full_pipeline(None, studio_id, workflow, force_refresh=True).to_dict()
+
+
+def workflow_label(workflow: Optional[str]) -> str:
+    template = WORKFLOW_TEMPLATES.get(workflow or "")
+    return (template or {}).get("label") or workflow or DEFAULT_WORKFLOW_LABEL
+
+
+class InsightMaterializer:
+    """Precomputes insights into ``store`` and serves requests from it."""
+
+    def __init__(self, orchestrator: AgentOrchestrator, store: Optional[InsightStore], *, max_age_seconds: Optional[float] = None):
+        self.orchestrator = orchestrator
+        self.store = store
+        self.max_age_seconds = max_age_seconds
+
+    def jobs(self, studio_ids: Optional[Iterable[str]] = None, workflows: Optional[Sequence[Optional[str]]] = None) -> List[Job]:
+        """Every ``(studio, workflow)`` pair; studios default to the analytics studio list."""
+        studios = sorted(studio_ids) if studio_ids is not None else sorted(s for s in self.orchestrator.analytics.studios if s)
+        flows: Sequence[Optional[str]] = workflows if workflows is not None else [None, *WORKFLOW_TEMPLATES]
+        return [(studio_id, workflow) for studio_id in studios for workflow in flows]
+
+    def materialize(self, jobs: Sequence[Job], *, workers: int = 4, resume: Optional[str] = None) -> Dict[str, Any]:
+        """Compute and store every job; returns the run summary. ``resume`` is a previous run id."""
+        if self.store is None:
+            raise RuntimeError("Insight store is disabled (LCP_INSIGHT_STORE_PATH)")
+        run_id = self.store.start_run(len(jobs), resume)
+        done = self.store.completed_keys(run_id, [(s, workflow_label(w)) for s, w in jobs]) if resume else set()
+        pending = [job for job in jobs if (job[0], workflow_label(job[1])) not in done]
+        started = time.perf_counter()
+        completed = failed = 0
+        logger.info("Materialization %s: %d jobs (%d already done), %d workers", run_id, len(jobs), len(done), workers)
+
+        def store(job: Job, payload: Dict[str, Any]) -> None:
+            self.store.put(job[0], workflow_label(job[1]), PipelineResult.from_dict(payload), run_id=run_id)
+            self.store.record(run_id, completed=1)
+
+        def fail(job: Job, err: BaseException) -> None:
+            logger.warning("Materializing %s/%s failed: %s", job[0], workflow_label(job[1]), err)
+            self.store.record(run_id, failed=1)
+
+        if workers <= 1:
+            for job in pending:
+                try:
+                    store(job, self.orchestrator.run_full_pipeline(None, job[0], job[1], force_refresh=True).to_dict())
+                    completed += 1
+                except Exception as err:  # pragma: no cover - defensive
+                    fail(job, err)
+                    failed += 1
+        else:
+            # "spawn": forking a process that already runs service threads can deadlock the children.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+                futures: Dict[Future, Job] = {}
+                queue = iter(pending)
+                # Keep the pool busy without submitting everything up front (results stream into the store).
+                for job in queue:
+                    futures[pool.submit(_run_job, job)] = job
+                    if len(futures) >= workers * 2:
+                        break
+                while futures:
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        job = futures.pop(future)
+                        try:
+                            store(job, future.result())
+                            completed += 1
+                        except Exception as err:
+                            fail(job, err)
+                            failed += 1
+                        following = next(queue, None)
+                        if following is not None:
+                            futures[pool.submit(_run_job, following)] = following
+        self.store.finish_run(run_id)
+        return {
+            "run_id": run_id,
+            "planned": len(jobs),
+            "skipped": len(done),
+            "completed": completed,
+            "failed": failed,
+            "elapsed_s": round(time.perf_counter() - started, 2),
+        }
+
+    def serve(
+        self,
+        studio_id: str,
+        query: Optional[str] = None,
+        workflow: Optional[str] = None,
+        *,
+        force_refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """``PipelineResult.to_dict()`` plus ``freshness``; materialized rows first when the request maps to one."""
+        # Templates fix their own query; the default flow is materialized only for the query-less request.
+        template = WORKFLOW_TEMPLATES.get(workflow or "")
+        materializable = self.store is not None and (template is not None or not (workflow or query))
+        label = workflow_label(workflow)
+        if materializable and not force_refresh:
+            stored = self.store.get(studio_id, label)
+            if stored is not None and not (self.max_age_seconds and stored.age_seconds > self.max_age_seconds):
+                result = stored.result.refresh(mark_cached=True)
+                return {**result.to_dict(), "freshness": stored.freshness("materialized", self.max_age_seconds)}
+        result = self.orchestrator.run_full_pipeline(query, studio_id, workflow, force_refresh=force_refresh)
+        if materializable and not result.cached:
+            entry = self.store.put(studio_id, label, result)
+        else:
+            entry = MaterializedInsight(studio_id, label, result, time.time())
+        return {**result.to_dict(), "freshness": entry.freshness("cache" if result.cached else "live")}
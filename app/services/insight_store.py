@@ -0,0 +1,148 @@
+"""Persistent store for materialized pipeline results, keyed by studio and workflow."""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import get_settings
+from app.models.pipeline import PipelineResult
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class MaterializedInsight:
+    """A stored ``PipelineResult`` plus when (and by which run) it was computed."""
+
+    studio_id: str
+    workflow: str
+    result: PipelineResult
+    computed_at: float
+    run_id: Optional[str] = None
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.computed_at)
+
+    def freshness(self, source: str, max_age_seconds: Optional[float] = None) -> Dict[str, Any]:
+        return {
+            "source": source,
+            "computed_at": datetime.fromtimestamp(self.computed_at, tz=timezone.utc).isoformat(),
+            "age_seconds": round(self.age_seconds, 1),
+            "run_id": self.run_id,
+            "stale": bool(max_age_seconds and self.age_seconds > max_age_seconds),
+        }
+
+
+class InsightStore:
+    """SQLite (WAL) table of ``PipelineResult`` JSON per ``(studio_id, workflow)``.
+
+    Materialization runs are recorded in ``runs``; every stored row carries the id of
+    the run (or ``None`` for live writes) so an interrupted run can resume by skipping
+    the keys it already wrote.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS insights ("
+                "studio_id TEXT NOT NULL, workflow TEXT NOT NULL, result TEXT NOT NULL, "
+                "computed_at REAL NOT NULL, run_id TEXT, PRIMARY KEY (studio_id, workflow))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "run_id TEXT PRIMARY KEY, started_at REAL, finished_at REAL, "
+                "planned INTEGER, completed INTEGER DEFAULT 0, failed INTEGER DEFAULT 0)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, studio_id: str, workflow: str) -> Optional[MaterializedInsight]:
+        row = self._connection().execute(
+            "SELECT result, computed_at, run_id FROM insights WHERE studio_id = ? AND workflow = ?",
+            (studio_id, workflow),
+        ).fetchone()
+        if row is None:
+            return None
+        return MaterializedInsight(studio_id, workflow, PipelineResult.from_dict(json.loads(row[0])), row[1], row[2])
+
+    def put(self, studio_id: str, workflow: str, result: PipelineResult, *, run_id: Optional[str] = None) -> MaterializedInsight:
+        computed_at = time.time()
+        payload = json.dumps(result.to_dict(), ensure_ascii=False, default=str)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO insights (studio_id, workflow, result, computed_at, run_id) VALUES (?, ?, ?, ?, ?)",
+            (studio_id, workflow, payload, computed_at, run_id),
+        )
+        return MaterializedInsight(studio_id, workflow, result, computed_at, run_id)
+
+    def keys(self) -> List[Tuple[str, str, float]]:
+        return self._connection().execute("SELECT studio_id, workflow, computed_at FROM insights ORDER BY 1, 2").fetchall()
+
+    def start_run(self, planned: int, run_id: Optional[str] = None) -> str:
+        """New run id, or reopen ``run_id`` (resume) keeping its counters."""
+        run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ-") + uuid.uuid4().hex[:6]
+        self._connection().execute(
+            "INSERT INTO runs (run_id, started_at, planned) VALUES (?, ?, ?) "
+            "ON CONFLICT(run_id) DO UPDATE SET planned = excluded.planned, finished_at = NULL",
+            (run_id, time.time(), planned),
+        )
+        return run_id
+
+    def record(self, run_id: str, *, completed: int = 0, failed: int = 0) -> None:
+        self._connection().execute(
+            "UPDATE runs SET completed = completed + ?, failed = failed + ? WHERE run_id = ?",
+            (completed, failed, run_id),
+        )
+
+    def finish_run(self, run_id: str) -> None:
+        self._connection().execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def latest_run(self) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT run_id, started_at, finished_at, planned, completed, failed FROM runs ORDER BY started_at DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("run_id", "started_at", "finished_at", "planned", "completed", "failed"), row))
+
+    def completed_keys(self, run_id: str, keys: Iterable[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Subset of ``keys`` already written by ``run_id`` (checkpoint for resume)."""
+        written = set(
+            self._connection().execute("SELECT studio_id, workflow FROM insights WHERE run_id = ?", (run_id,)).fetchall()
+        )
+        return {key for key in keys if key in written}
+
+
+@lru_cache(maxsize=1)
+def get_insight_store() -> Optional[InsightStore]:
+    """Process-wide store at ``LCP_INSIGHT_STORE_PATH``; ``None`` when disabled or unusable."""
+    path = get_settings().insight_store_path
+    if not path:
+        return None
+    if not Path(path).is_absolute():
+        path = PROJECT_ROOT / path
+    try:
+        return InsightStore(path)
+    except sqlite3.Error as err:
+        logger.warning("Insight store disabled (%s): %s", path, err)
+        return None
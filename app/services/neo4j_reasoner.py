@@ -1,8 +1,11 @@
 ﻿"""Neo4j GraphRAG helper using official driver."""
 from __future__ import annotations
 
+import logging
+import re
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 try:
     from neo4j import GraphDatabase  # type: ignore
@@ -10,10 +13,23 @@ except ImportError:  # pragma: no cover
     GraphDatabase = None  # type: ignore
 
 from app.services.neo4j_templates import (
+    ENTITY_FULLTEXT_INDEX,
+    ENTITY_FULLTEXT_SEARCH,
+    ENTITY_INDEX_STATE,
     ENTITY_SEARCH,
-    PATH_DISCOVERY,
+    GRAPH_VERSION,
+    LIST_LABELS,
     EVIDENCE_EXTRACTION,
+    entity_index_statements,
+    entity_search_with_labels,
+    evidence_batch_query,
+    path_discovery_query,
 )
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
 
 
 @dataclass
@@ -24,10 +40,32 @@ class Neo4jConnectionConfig:
 
 
 class Neo4jReasoner:
-    """Runs entity lookup, path discovery, and evidence collection."""
+    """Runs entity lookup, path discovery, and evidence collection.
+
+    Construction only opens the driver. Indexes are created by the loaders
+    (``Neo4jService.load_batches``, ``neo4j_ingest.py``) or by an explicit
+    :meth:`ensure_indexes` call; the reasoner checks whether the full-text
+    index is online on first use.
+    """
 
-    def __init__(self, config: Neo4jConnectionConfig):
+    def __init__(
+        self,
+        config: Neo4jConnectionConfig,
+        *,
+        index_labels: Optional[Sequence[str]] = None,
+        path_cache_ttl_seconds: int = 600,
+        path_cache_size: int = 1024,
+        version_check_seconds: float = 5.0,
+    ):
         self.config = config
+        self.index_labels = list(index_labels) if index_labels else None
+        self._label_names: List[str] = []
+        self._fulltext_ready = False
+        self._fulltext_checked_at: Optional[float] = None
+        self._path_cache = TTLCache(ttl_seconds=path_cache_ttl_seconds, max_size=path_cache_size)
+        self._version_check_seconds = version_check_seconds
+        self._graph_version: Optional[int] = None
+        self._version_checked_at = 0.0
         if GraphDatabase:
             self._driver = GraphDatabase.driver(
                 config.uri,
@@ -47,17 +85,171 @@ class Neo4jReasoner:
             result = session.run(query, parameters)
             return [record.data() for record in result]
 
+    def ensure_indexes(self, labels: Optional[Sequence[str]] = None, rebuild: bool = False) -> Dict[str, Any]:
+        """Explicit setup step: create the entity full-text index and per-label range indexes on ``id``.
+
+        Loaders already index the shared ``Resource`` label; use this for graphs
+        written by other tools. Labels default to ``index_labels`` or, when unset,
+        every label currently in the graph. Full-text indexes cannot be altered in
+        place, so pass ``rebuild=True`` after new labels appear.
+        """
+        if not self._driver:
+            return {"status": "neo4j-driver-missing"}
+        self._label_names = [row["label"] for row in self._run(LIST_LABELS, {})]
+        targets = list(labels or self.index_labels or self._label_names)
+        if not targets:
+            return {"status": "no-labels"}
+        with self._driver.session() as session:
+            for statement in entity_index_statements(targets, rebuild=rebuild):
+                session.run(statement).consume()
+        self._fulltext_ready = True
+        self._fulltext_checked_at = time.monotonic()
+        return {"status": "ready", "index": ENTITY_FULLTEXT_INDEX, "labels": len(targets)}
+
+    def _fulltext_available(self) -> bool:
+        """Whether the full-text index is online (read-only check, throttled while it is missing)."""
+        if self._fulltext_ready or not self._driver:
+            return self._fulltext_ready
+        now = time.monotonic()
+        if self._fulltext_checked_at is not None and now - self._fulltext_checked_at < self._version_check_seconds:
+            return False
+        self._fulltext_checked_at = now
+        try:
+            states = self._run(ENTITY_INDEX_STATE, {"index_name": ENTITY_FULLTEXT_INDEX})
+            if any(row.get("state") == "ONLINE" for row in states):
+                self._label_names = [row["label"] for row in self._run(LIST_LABELS, {})]
+                self._fulltext_ready = True
+        except Exception as err:  # pragma: no cover - runtime dependent
+            logger.warning("Failed to check the entity full-text index: %s", err)
+        return self._fulltext_ready
+
+    @staticmethod
+    def _fulltext_query(terms: Sequence[str]) -> str:
+        clauses = []
+        for term in terms:
+            escaped = _LUCENE_SPECIAL.sub(r"\\\1", term)
+            clauses.append(f"{escaped} OR {escaped}*")
+        return " OR ".join(f"({clause})" for clause in clauses)
+
     def find_entities(self, keywords: Sequence[str], limit: int = 10) -> List[Dict[str, Any]]:
+        """Keyword lookup via the full-text index, scored.
+
+        Matching is by token or token prefix: ``"pil"`` finds ``"Pilates Studio"``
+        but, unlike the substring scan used before, ``"lates"`` no longer does.
+        Label names still match as substrings and are served by the label lookup
+        index. Falls back to the substring scan when the index is not online.
+        """
         terms = [kw.lower() for kw in keywords if kw]
         if not terms:
             return []
+        if self._fulltext_available():
+            matched_labels = [lbl for lbl in self._label_names if any(term in lbl.lower() for term in terms)]
+            query = entity_search_with_labels(matched_labels) if matched_labels else ENTITY_FULLTEXT_SEARCH
+            params = {"index_name": ENTITY_FULLTEXT_INDEX, "query": self._fulltext_query(terms), "limit": limit}
+            try:
+                return self._run(query, params)
+            except Exception as err:  # pragma: no cover - runtime dependent
+                logger.warning("Full-text entity search failed, falling back to scan: %s", err)
+                self._fulltext_ready = False
         return self._run(ENTITY_SEARCH, {"terms": terms, "limit": limit})
 
-    def find_paths(self, start_id: str, end_id: str, max_depth: int = 4, limit: int = 3) -> List[Dict[str, Any]]:
+    def graph_version(self, force: bool = False) -> Optional[int]:
+        """Return the graph version counter maintained by loaders (throttled read).
+
+        A change clears the path cache so cached paths never outlive a reload.
+        """
+        now = time.monotonic()
+        if not force and self._graph_version is not None and now - self._version_checked_at < self._version_check_seconds:
+            return self._graph_version
+        if not self._driver:
+            return None
+        try:
+            rows = self._run(GRAPH_VERSION, {})
+            version = int(rows[0]["version"]) if rows else 0
+        except Exception as err:  # pragma: no cover - runtime dependent
+            logger.warning("Failed to read graph version: %s", err)
+            return self._graph_version
+        if version != self._graph_version:
+            self._path_cache.clear()
+            # Re-read index state and label names after a reload.
+            self._fulltext_ready = False
+            self._fulltext_checked_at = None
+            self._graph_version = version
+        self._version_checked_at = now
+        return version
+
+    def find_paths(
+        self,
+        start_id: str,
+        end_id: str,
+        max_depth: int = 4,
+        limit: int = 3,
+        *,
+        rel_types: Sequence[str] | None = None,
+        node_labels: Sequence[str] | None = None,
+    ) -> List[Dict[str, Any]]:
         if not start_id or not end_id:
             return []
-        params = {"start_id": start_id, "end_id": end_id, "max_depth": max_depth, "limit": limit}
-        return self._run(PATH_DISCOVERY, params)
+        return self.find_paths_batch(
+            [(start_id, end_id)],
+            max_depth=max_depth,
+            limit=limit,
+            rel_types=rel_types,
+            node_labels=node_labels,
+        )[(start_id, end_id)]
+
+    def find_paths_batch(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        max_depth: int = 4,
+        limit: int = 3,
+        *,
+        rel_types: Sequence[str] | None = None,
+        node_labels: Sequence[str] | None = None,
+    ) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """Shortest paths for many (start, end) pairs in one round-trip.
+
+        ``rel_types`` restricts traversal to those relationship types and
+        ``node_labels`` requires every node on the path (endpoints included) to
+        carry one of the labels. Results are cached per pair, depth and filter
+        until the graph version changes.
+        """
+        rel_key = tuple(sorted(set(rel_types or ())))
+        label_key = tuple(sorted(set(node_labels or ())))
+        query = path_discovery_query(max_depth, rel_key, label_key, bool(label_key))
+        unique_pairs = list(dict.fromkeys((start, end) for start, end in pairs if start and end))
+        # allShortestPaths rejects identical endpoints, which would fail the whole UNWIND batch.
+        results: Dict[Tuple[str, str], List[Dict[str, Any]]] = {
+            pair: [] for pair in unique_pairs if pair[0] == pair[1]
+        }
+        unique_pairs = [pair for pair in unique_pairs if pair[0] != pair[1]]
+        if not self._driver:
+            params = {"pairs": [], "node_labels": list(label_key), "limit": limit}
+            results.update({pair: self._run(query, params) for pair in unique_pairs})
+            return results
+
+        version = self.graph_version()
+        misses: List[Tuple[str, str]] = []
+        for pair in unique_pairs:
+            cached = self._path_cache.get((version, pair, max_depth, limit, rel_key, label_key))
+            if cached is None:
+                misses.append(pair)
+            else:
+                results[pair] = cached
+        if misses:
+            params = {
+                "pairs": [{"start_id": start, "end_id": end} for start, end in misses],
+                "node_labels": list(label_key),
+                "limit": limit,
+            }
+            fetched: Dict[Tuple[str, str], List[Dict[str, Any]]] = {pair: [] for pair in misses}
+            for row in self._run(query, params):
+                pair = (row.pop("start_id"), row.pop("end_id"))
+                fetched.setdefault(pair, []).append(row)
+            for pair, paths in fetched.items():
+                self._path_cache.set((version, pair, max_depth, limit, rel_key, label_key), paths)
+            results.update(fetched)
+        return results
 
     def build_evidence(self, studio_id: str, rel_types: Sequence[str] | None = None, limit: int = 25) -> List[Dict[str, Any]]:
         params = {
@@ -67,6 +259,76 @@ class Neo4jReasoner:
         }
         return self._run(EVIDENCE_EXTRACTION, params)
 
+    def stream_evidence(
+        self,
+        studio_ids: Iterable[str],
+        rel_types: Sequence[str] | None = None,
+        limit: int = 25,
+        *,
+        batch_size: int = 1000,
+        anchor_labels: Sequence[str] | None = None,
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Yield ``(studio_id, evidence)`` groups, one UNWIND query per batch.
+
+        The query returns flat evidence rows (no server-side ``collect``); a
+        group is yielded as soon as the rows of the next studio start, so at most
+        ``limit`` rows are held client-side and a sweep over thousands of studios
+        takes ``len(studio_ids) / batch_size`` round-trips. Studios without a node
+        or without evidence in the graph are skipped; repeated ids are sent once.
+        """
+        query = evidence_batch_query(tuple(sorted(set(anchor_labels or ()))))
+        relationship_types = list(rel_types) if rel_types else None
+        batch: List[str] = []
+        seen: Set[str] = set()
+        for studio_id in studio_ids:
+            if studio_id and studio_id not in seen:
+                seen.add(studio_id)
+                batch.append(studio_id)
+            if len(batch) >= batch_size:
+                yield from self._stream_evidence_batch(query, batch, relationship_types, limit)
+                batch = []
+        if batch:
+            yield from self._stream_evidence_batch(query, batch, relationship_types, limit)
+
+    def _stream_evidence_batch(
+        self,
+        query: str,
+        studio_ids: List[str],
+        relationship_types: Optional[List[str]],
+        limit: int,
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        params = {"studio_ids": studio_ids, "relationship_types": relationship_types, "limit": limit}
+        if not self._driver:
+            for studio_id in studio_ids:
+                yield studio_id, self._run(query, {**params, "studio_ids": [studio_id]})
+            return
+        with self._driver.session() as session:
+            current: Optional[str] = None
+            evidence: List[Dict[str, Any]] = []
+            for record in session.run(query, params):
+                row = record.data()
+                studio_id = row.pop("studio_id")
+                if studio_id != current and evidence:
+                    yield current, evidence
+                    evidence = []
+                current = studio_id
+                evidence.append(row)
+            if evidence:
+                yield current, evidence
+
+    def build_evidence_many(
+        self,
+        studio_ids: Sequence[str],
+        rel_types: Sequence[str] | None = None,
+        limit: int = 25,
+        **kwargs: Any,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Collect :meth:`stream_evidence` into a dict with an entry per requested studio."""
+        grouped: Dict[str, List[Dict[str, Any]]] = {studio_id: [] for studio_id in studio_ids if studio_id}
+        for studio_id, evidence in self.stream_evidence(studio_ids, rel_types, limit, **kwargs):
+            grouped.setdefault(studio_id, []).extend(evidence)
+        return grouped
+
     def run_pipeline(
         self,
         keywords: Sequence[str],
@@ -2,8 +2,20 @@
 from __future__ import annotations
 
 import logging
+from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.neo4j_templates import (
+    APOC_AVAILABLE,
+    GRAPH_VERSION_BUMP,
+    GRAPH_WIPE,
+    NODE_BATCH_MERGE,
+    NODE_BATCH_MERGE_APOC,
+    entity_index_statements,
+    id_range_index_ddl,
+    quote_identifier,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -74,18 +86,92 @@ class Neo4jService:
                     """ % rel.get("type", "RELATED_TO"),
                     {"start": rel.get("start"), "end": rel.get("end")},
                 )
+            self._graph.run(GRAPH_VERSION_BUMP)
             self._last_seeded_at = datetime.utcnow().isoformat()
             return {"status": "loaded", "nodes": created, "relationships": len(rels)}
         except Exception as err:  # pragma: no cover - runtime dependent
             logger.warning("Failed to load into Neo4j: %s", err)
             return {"status": "error", "error": str(err)}
 
+    def _has_apoc(self) -> bool:
+        try:
+            self._graph.run(APOC_AVAILABLE).evaluate()
+            return True
+        except Exception:  # pragma: no cover - depends on server plugins
+            logger.warning("APOC not available; ontology labels are stored in n.ontology_labels only")
+            return False
+
+    def load_batches(self, batches: Iterable[Dict[str, list]]) -> Dict[str, Any]:
+        """Ingest streamed node/relationship batches with one UNWIND for nodes and one per relationship type.
+
+        Nodes are merged on the shared ``Resource`` label (served by a single ``id``
+        range index); per-IRI ontology labels are passed as row data and attached
+        with ``apoc.create.addLabels`` when APOC is installed, and always recorded
+        in ``n.ontology_labels``. Memory stays bounded by the batch size of the producer.
+        The entity full-text index is created once the data is in (see
+        :meth:`ensure_entity_indexes`).
+        """
+        node_count = 0
+        rel_count = 0
+        if not self._graph:
+            for batch in batches:
+                node_count += len(batch.get("nodes", []))
+                rel_count += len(batch.get("relationships", []))
+            return {"status": "stub", "nodes": node_count, "relationships": rel_count}
+        try:
+            self._graph.run(id_range_index_ddl("Resource"))
+            node_query = NODE_BATCH_MERGE_APOC if self._has_apoc() else NODE_BATCH_MERGE
+            for batch in batches:
+                rows = [
+                    {
+                        "id": node.get("id"),
+                        "labels": [
+                            part
+                            for label in node.get("labels", [])
+                            for part in label.split(":")
+                            if part and part != "Resource"
+                        ],
+                        "props": node.get("properties", {}),
+                    }
+                    for node in batch.get("nodes", [])
+                ]
+                if rows:
+                    self._graph.run(node_query, {"rows": rows})
+                    node_count += len(rows)
+                rels_by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+                for rel in batch.get("relationships", []):
+                    rels_by_type[rel.get("type") or "RELATED_TO"].append({"start": rel.get("start"), "end": rel.get("end")})
+                for rel_type, rel_rows in rels_by_type.items():
+                    self._graph.run(
+                        "UNWIND $rows AS row "
+                        "MATCH (s:Resource {id: row.start}) MATCH (e:Resource {id: row.end}) "
+                        f"MERGE (s)-[:{quote_identifier(rel_type)}]->(e)",
+                        {"rows": rel_rows},
+                    )
+                    rel_count += len(rel_rows)
+            self.ensure_entity_indexes()
+            self._graph.run(GRAPH_VERSION_BUMP)
+            self._last_seeded_at = datetime.utcnow().isoformat()
+            return {"status": "loaded", "nodes": node_count, "relationships": rel_count}
+        except Exception as err:  # pragma: no cover - runtime dependent
+            logger.warning("Failed to load batches into Neo4j: %s", err)
+            return {"status": "error", "error": str(err), "nodes": node_count, "relationships": rel_count}
+
+    def ensure_entity_indexes(self, labels: Iterable[str] = ("Resource",), rebuild: bool = False) -> Dict[str, Any]:
+        """Create the full-text and ``id`` indexes ``Neo4jReasoner.find_entities`` searches (idempotent)."""
+        if not self._graph:
+            return {"status": "stub"}
+        for statement in entity_index_statements(list(labels), rebuild=rebuild):
+            self._graph.run(statement)
+        return {"status": "ready"}
+
     def reset(self) -> Dict[str, Any]:
-        """Clear stubbed state or drop all nodes in Neo4j for demo purposes."""
+        """Clear stubbed state or drop all data nodes in Neo4j for demo purposes (the version node survives)."""
         if not self._graph:
             return {"status": "stub-reset"}
         try:
-            self._graph.run("MATCH (n) DETACH DELETE n")
+            self._graph.run(GRAPH_WIPE)
+            self._graph.run(GRAPH_VERSION_BUMP)
             return {"status": "cleared"}
         except Exception as err:  # pragma: no cover
             logger.warning("Failed to reset Neo4j: %s", err)
@@ -1,4 +1,56 @@
 ﻿"""Parameterized Neo4j Cypher templates for GraphRAG."""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+ENTITY_FULLTEXT_INDEX = "lop_entity_search"
+ENTITY_FULLTEXT_PROPERTIES = ("label", "id", "category", "program")
+
+LIST_LABELS = "CALL db.labels() YIELD label RETURN label"
+
+ENTITY_INDEX_STATE = "SHOW FULLTEXT INDEXES YIELD name, state WHERE name = $index_name RETURN state"
+
+MAX_PATH_DEPTH = 8
+
+GRAPH_VERSION = """
+OPTIONAL MATCH (meta:LOPGraphMeta {id:'graph'})
+RETURN coalesce(meta.version, 0) AS version
+"""
+
+# Monotonic even if the meta node was deleted: never below the current epoch milliseconds.
+GRAPH_VERSION_BUMP = """
+MERGE (meta:LOPGraphMeta {id:'graph'})
+SET meta.version = CASE
+    WHEN coalesce(meta.version, 0) >= timestamp() THEN meta.version + 1
+    ELSE timestamp()
+END
+RETURN meta.version AS version
+"""
+
+# Graph wipes keep the version node so readers always observe a new version after a reload.
+GRAPH_WIPE = "MATCH (n) WHERE NOT n:LOPGraphMeta DETACH DELETE n"
+
+APOC_AVAILABLE = "RETURN apoc.version() AS version"
+
+# One statement per batch: every node shares ``Resource`` (the MERGE key) and its
+# ontology labels travel as data, attached by APOC or kept as a list property.
+NODE_BATCH_MERGE_APOC = """
+UNWIND $rows AS row
+MERGE (n:Resource {id: row.id})
+SET n += row.props, n.ontology_labels = row.labels
+WITH n, row
+CALL apoc.create.addLabels(n, row.labels) YIELD node
+RETURN count(node) AS nodes
+"""
+
+NODE_BATCH_MERGE = """
+UNWIND $rows AS row
+MERGE (n:Resource {id: row.id})
+SET n += row.props, n.ontology_labels = row.labels
+RETURN count(n) AS nodes
+"""
 
 ENTITY_SEARCH = """
 MATCH (n)
@@ -13,15 +65,6 @@ RETURN n.id AS node_id,
 LIMIT $limit
 """
 
-PATH_DISCOVERY = """
-MATCH (start {id:$start_id}), (dest {id:$end_id})
-MATCH p = allShortestPaths((start)-[r*1..$max_depth]-(dest))
-RETURN [node IN nodes(p) | {id:node.id, labels:labels(node), title:coalesce(node.label,node.id)}] AS nodes,
-       [rel IN relationships(p) | {type:type(rel), props:properties(rel)}] AS relationships,
-       length(p) AS hops
-LIMIT $limit
-"""
-
 EVIDENCE_EXTRACTION = """
 MATCH (studio {id:$studio_id})-[rel]->(neighbor)
 WHERE $relationship_types IS NULL OR type(rel) IN $relationship_types
@@ -34,3 +77,152 @@ RETURN studio.id AS studio_id,
 ORDER BY rel.modified DESC NULLS LAST, rel.weight DESC NULLS LAST
 LIMIT $limit
 """
+
+ENTITY_FULLTEXT_SEARCH = """
+CALL db.index.fulltext.queryNodes($index_name, $query) YIELD node, score
+RETURN node.id AS node_id,
+       labels(node) AS labels,
+       coalesce(node.label, node.id) AS title,
+       coalesce(node.category, node.program, '') AS context,
+       node AS n,
+       score
+ORDER BY score DESC
+LIMIT $limit
+"""
+
+
+def quote_identifier(name: str) -> str:
+    """Backtick-quote a label/relationship/index name for safe inlining."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _index_suffix(label: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_]", "_", label).lower()
+
+
+def fulltext_index_ddl(labels: Sequence[str]) -> str:
+    """CREATE statement for the entity full-text index over the given labels."""
+    label_expr = "|".join(quote_identifier(label) for label in labels)
+    props = ", ".join(f"n.{prop}" for prop in ENTITY_FULLTEXT_PROPERTIES)
+    return (
+        f"CREATE FULLTEXT INDEX {ENTITY_FULLTEXT_INDEX} IF NOT EXISTS "
+        f"FOR (n:{label_expr}) ON EACH [{props}]"
+    )
+
+
+def drop_fulltext_index_ddl() -> str:
+    return f"DROP INDEX {ENTITY_FULLTEXT_INDEX} IF EXISTS"
+
+
+def id_range_index_ddl(label: str) -> str:
+    """CREATE statement for a range index on ``id`` for one label."""
+    index_name = quote_identifier(f"lop_id_{_index_suffix(label)}")
+    return f"CREATE RANGE INDEX {index_name} IF NOT EXISTS FOR (n:{quote_identifier(label)}) ON (n.id)"
+
+
+def entity_index_statements(labels: Sequence[str], rebuild: bool = False) -> List[str]:
+    """DDL a loader runs after writing entities: full-text index, ``id`` range indexes, then wait."""
+    statements = [drop_fulltext_index_ddl()] if rebuild else []
+    statements.append(fulltext_index_ddl(labels))
+    statements.extend(id_range_index_ddl(label) for label in labels)
+    statements.append("CALL db.awaitIndexes(300)")
+    return statements
+
+
+def entity_search_with_labels(labels: Sequence[str]) -> str:
+    """Full-text search unioned with label-name matches served by the label lookup index."""
+    label_expr = "|".join(quote_identifier(label) for label in labels)
+    return f"""
+CALL {{
+  CALL db.index.fulltext.queryNodes($index_name, $query) YIELD node, score
+  RETURN node, score
+  UNION
+  MATCH (node:{label_expr})
+  RETURN node, 0.0 AS score
+  LIMIT $limit
+}}
+WITH node, max(score) AS score
+RETURN node.id AS node_id,
+       labels(node) AS labels,
+       coalesce(node.label, node.id) AS title,
+       coalesce(node.category, node.program, '') AS context,
+       node AS n,
+       score
+ORDER BY score DESC
+LIMIT $limit
+"""
+
+
+@lru_cache(maxsize=128)
+def path_discovery_query(
+    max_depth: int,
+    rel_types: Tuple[str, ...] = (),
+    anchor_labels: Tuple[str, ...] = (),
+    filter_labels: bool = False,
+) -> str:
+    """Build the depth-bounded batch path query once per shape.
+
+    Cypher does not accept parameters inside variable-length bounds, so depth
+    and relationship types are validated and inlined here. Both endpoints are
+    bound before ``allShortestPaths`` runs, which lets Neo4j expand with its
+    bidirectional BFS; the ``all(...)`` label predicate is checked during
+    expansion rather than after. ``anchor_labels`` lets the endpoint lookups
+    use the per-label ``id`` range indexes.
+    """
+    if isinstance(max_depth, bool) or not isinstance(max_depth, int) or not 1 <= max_depth <= MAX_PATH_DEPTH:
+        raise ValueError(f"max_depth must be an int between 1 and {MAX_PATH_DEPTH}, got {max_depth!r}")
+    rel_expr = ":" + "|".join(quote_identifier(rel) for rel in rel_types) if rel_types else ""
+    anchor = ":" + "|".join(quote_identifier(lbl) for lbl in anchor_labels) if anchor_labels else ""
+    label_filter = (
+        "\n  WHERE all(node IN nodes(p) WHERE any(lbl IN labels(node) WHERE lbl IN $node_labels))"
+        if filter_labels
+        else ""
+    )
+    return f"""
+UNWIND $pairs AS pair
+MATCH (start{anchor} {{id: pair.start_id}})
+MATCH (dest{anchor} {{id: pair.end_id}})
+CALL {{
+  WITH start, dest
+  MATCH p = allShortestPaths((start)-[{rel_expr}*1..{max_depth}]-(dest)){label_filter}
+  RETURN p
+  LIMIT $limit
+}}
+RETURN pair.start_id AS start_id,
+       pair.end_id AS end_id,
+       [node IN nodes(p) | {{id:node.id, labels:labels(node), title:coalesce(node.label,node.id)}}] AS nodes,
+       [rel IN relationships(p) | {{type:type(rel), props:properties(rel)}}] AS relationships,
+       length(p) AS hops
+"""
+
+
+@lru_cache(maxsize=32)
+def evidence_batch_query(anchor_labels: Tuple[str, ...] = ()) -> str:
+    """Evidence for many studios at once with a per-studio LIMIT via CALL {}.
+
+    Returns one row per evidence item (no ``collect``), so the server streams
+    rows as each studio's subquery finishes; rows of a studio are contiguous in
+    ``$studio_ids`` order. Without ``anchor_labels`` each studio lookup is
+    unlabeled; pass the studio label(s) so the ``id`` range index serves the
+    UNWIND seeks.
+    """
+    anchor = ":" + "|".join(quote_identifier(lbl) for lbl in anchor_labels) if anchor_labels else ""
+    return f"""
+UNWIND $studio_ids AS sid
+MATCH (studio{anchor} {{id: sid}})
+CALL {{
+  WITH studio
+  MATCH (studio)-[rel]->(neighbor)
+  WHERE $relationship_types IS NULL OR type(rel) IN $relationship_types
+  RETURN rel, neighbor
+  ORDER BY rel.modified DESC NULLS LAST, rel.weight DESC NULLS LAST
+  LIMIT $limit
+}}
+RETURN sid AS studio_id,
+       type(rel) AS relationship_type,
+       rel AS relationship,
+       neighbor.id AS neighbor_id,
+       labels(neighbor) AS neighbor_labels,
+       coalesce(neighbor.label, neighbor.id) AS neighbor_label
+"""
+
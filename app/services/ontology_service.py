@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 import logging
+import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
     from rdflib import Graph, URIRef, RDFS  # type: ignore
@@ -21,6 +23,23 @@ except ImportError:  # pragma: no cover - optional dependency
 
 logger = logging.getLogger(__name__)
 
+_NON_IDENTIFIER = re.compile(r"[^0-9A-Za-z_]")
+
+
+@lru_cache(maxsize=65536)
+def _labels_for_iri(iri: str) -> Tuple[str, ...]:
+    parts = iri.rstrip('/').split('/')
+    label = parts[-1] if parts else "Resource"
+    label = label.replace("#", ":")
+    return (label or "Resource",)
+
+
+@lru_cache(maxsize=4096)
+def _relationship_type(predicate: str) -> str:
+    """Local name of a predicate IRI (after the last ``#`` or ``/``) as a Cypher-safe type."""
+    local = re.split(r"[#/]", predicate.rstrip("/#"))[-1]
+    return _NON_IDENTIFIER.sub("_", local) or "RELATED_TO"
+
 
 class OntologyService:
     """Ontology management using rdflib + GraphDB endpoint with graceful fallbacks."""
@@ -128,10 +147,7 @@ class OntologyService:
 
     # ---------- Neo4j payload ----------
     def _labels_for_uri(self, uri: URIRef) -> List[str]:
-        parts = str(uri).rstrip('/').split('/')
-        label = parts[-1] if parts else "Resource"
-        label = label.replace("#", ":")
-        return [label or "Resource"]
+        return list(_labels_for_iri(str(uri)))
 
     def to_neo4j_nodes_and_rels(self) -> Dict[str, list]:
         """Convert triples to Neo4j-friendly payloads with light schema hints."""
@@ -159,9 +175,43 @@ class OntologyService:
             relationships.append({
                 "start": subj_id,
                 "end": obj_id,
-                "type": Path(str(pred)).name or "RELATED_TO",
+                "type": _relationship_type(str(pred)),
             })
             # Add human-readable label if available
             if RDFS and pred == RDFS.label and not isinstance(obj, URIRef):
                 nodes[subj_id].setdefault("properties", {})["label"] = str(obj)
         return {"nodes": list(nodes.values()), "relationships": relationships}
+
+    def iter_neo4j_batches(self, batch_size: int = 5000) -> Iterator[Dict[str, list]]:
+        """Stream the graph as ``{"nodes", "relationships"}`` batches of bounded size.
+
+        Node ids are de-duplicated within a batch only, so memory is bounded by
+        ``batch_size`` rather than the graph size. A node may be emitted again in a
+        later batch (or with extra properties such as its ``rdfs:label``), which the
+        MERGE-based loader folds into the existing node. Triples with literal
+        objects carry no relationship since there is no end node.
+        """
+        if not self.graph:
+            return
+        seen: set[str] = set()
+        nodes: List[Dict[str, Any]] = []
+        relationships: List[Dict[str, Any]] = []
+        for subj, pred, obj in self.graph:  # type: ignore[assignment]
+            subj_id = str(subj)
+            if subj_id not in seen:
+                seen.add(subj_id)
+                nodes.append({"id": subj_id, "labels": list(_labels_for_iri(subj_id)), "properties": {}})
+            if isinstance(obj, URIRef):
+                obj_id = str(obj)
+                if obj_id not in seen:
+                    seen.add(obj_id)
+                    nodes.append({"id": obj_id, "labels": list(_labels_for_iri(obj_id)), "properties": {}})
+                relationships.append({"start": subj_id, "end": obj_id, "type": _relationship_type(str(pred))})
+            elif RDFS and pred == RDFS.label:
+                nodes.append({"id": subj_id, "labels": list(_labels_for_iri(subj_id)), "properties": {"label": str(obj)}})
+            if len(nodes) + len(relationships) >= batch_size:
+                yield {"nodes": nodes, "relationships": relationships}
+                nodes, relationships = [], []
+                seen.clear()
+        if nodes or relationships:
+            yield {"nodes": nodes, "relationships": relationships}
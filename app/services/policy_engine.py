@@ -1,17 +1,49 @@
 ﻿"""Simple policy-based evaluator for the risk guard agent."""
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.policy_rules import DEFAULT_RULES_PATH, PROJECT_ROOT, PolicyRules, pylist
+
+Columns = Dict[str, np.ndarray]
 
 
 class PolicyEngine:
-    """Evaluates predefined guardrail policies using aggregated state."""
+    """Evaluates guardrail policies using aggregated state.
+
+    By default the policies come from a declarative rule file
+    (``data/policies/risk_guard_rules.yml``, overridable via ``LCP_POLICY_RULES_PATH``)
+    that is compiled once and hot-reloaded when it changes; see ``policy_rules``.
+    Passing ``policies`` (dicts with ``id``/``title``/``severity``/``check`` and an
+    optional vectorised ``mask`` + ``rationale``) evaluates those Python callables instead.
+
+    ``evaluate`` checks one state dict; ``evaluate_batch`` evaluates a columnar table
+    of per-studio state and only renders rationale/evidence for triggered rows.
+    """
 
-    def __init__(self, policies: List[Dict[str, Any]] | None = None):
-        self.policies = policies or self._default_policies()
+    def __init__(
+        self,
+        policies: List[Dict[str, Any]] | None = None,
+        *,
+        rules_path: str | Path | None = None,
+        reload_interval: float = 1.0,
+    ):
+        self.policies = policies or []
+        self.rules: PolicyRules | None = None
+        if not self.policies:
+            path = Path(rules_path or get_settings().policy_rules_path or DEFAULT_RULES_PATH)
+            if not path.is_absolute():
+                path = PROJECT_ROOT / path
+            self.rules = PolicyRules(path, reload_interval=reload_interval)
 
     def evaluate(self, state: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Return triggered policy hits with supporting evidence."""
+        if self.rules:
+            return self.rules.program.evaluate(state)
         hits: List[Dict[str, Any]] = []
         for policy in self.policies:
             triggered, rationale, evidence = policy["check"](state)
@@ -27,77 +59,104 @@ class PolicyEngine:
                 )
         return hits
 
-    def _default_policies(self) -> List[Dict[str, Any]]:
-        return [
-            {
-                "id": "policy_refund_pressure",
-                "title": "환불·차지백 급증",
-                "severity": "high",
-                "check": self._check_refund_pressure,
-            },
-            {
-                "id": "policy_payment_decline",
-                "title": "결제 거절/사기 징후",
-                "severity": "medium",
-                "check": self._check_payment_decline,
-            },
-            {
-                "id": "policy_graph_density",
-                "title": "비정상 그래프 연관도",
-                "severity": "medium",
-                "check": self._check_graph_density,
-            },
-            {
-                "id": "policy_engagement_drop",
-                "title": "출석률/세션 참여 저하",
-                "severity": "medium",
-                "check": self._check_engagement_drop,
-            },
-            {
-                "id": "policy_payout_delay",
-                "title": "정산 지연 리스크",
-                "severity": "low",
-                "check": self._check_payout_delay,
-            },
-        ]
-
-    def _check_refund_pressure(self, state: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
-        ratio = state.get("refund_ratio", 0.0) or 0.0
-        keywords = state.get("keyword_counts", {})
-        refund_mentions = keywords.get("refund", 0) + keywords.get("chargeback", 0)
-        triggered = ratio > 0.12 or refund_mentions >= 2
-        rationale = f"환불비율 {ratio:.2%}, 키워드 감지 {refund_mentions}건"
-        evidence = {"refund_ratio": ratio, "refund_mentions": refund_mentions}
-        return triggered, rationale, evidence
-
-    def _check_payment_decline(self, state: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
-        keywords = state.get("keyword_counts", {})
-        decline_hits = keywords.get("decline", 0) + keywords.get("fraud", 0)
-        neo4j_rel = state.get("neo4j_hits", 0)
-        triggered = decline_hits >= 1 or neo4j_rel > 0
-        rationale = f"결제 경고 키워드 {decline_hits}건, Neo4j 연관 {neo4j_rel}건"
-        evidence = {"decline_keywords": decline_hits, "neo4j_relations": neo4j_rel}
-        return triggered, rationale, evidence
-
-    def _check_graph_density(self, state: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
-        graph_hits = state.get("graph_hits", 0)
-        triggered = graph_hits > 120
-        rationale = f"그래프 triple {graph_hits}건"
-        evidence = {"graph_hits": graph_hits}
-        return triggered, rationale, evidence
-
-    def _check_engagement_drop(self, state: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
-        attendance = state.get("attendance_rate")
-        avg_sessions = state.get("avg_sessions_per_member")
-        triggered = attendance is not None and attendance < 0.7
-        triggered = triggered or (avg_sessions is not None and avg_sessions < 1.0)
-        rationale = f"출석률 {attendance}, 1인당 세션 {avg_sessions}"
-        evidence = {"attendance_rate": attendance, "avg_sessions_per_member": avg_sessions}
-        return triggered, rationale, evidence
-
-    def _check_payout_delay(self, state: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
-        payout_lag = state.get("avg_payout_lag_days")
-        triggered = payout_lag is not None and payout_lag > 10
-        rationale = f"평균 정산 지연 {payout_lag}일"
-        evidence = {"avg_payout_lag_days": payout_lag}
-        return triggered, rationale, evidence
+    def evaluate_batch(self, table: Mapping[str, Any], *, key: str = "studio_id") -> Dict[Any, List[Dict[str, Any]]]:
+        """Return ``{row key: hits}`` for rows that trigger at least one policy.
+
+        ``table`` maps column names to equal-length sequences (a dict of arrays or a
+        DataFrame); rows are keyed by ``key`` when that column exists, else by position.
+        """
+        names = list(table.keys())
+        if key in table:
+            keys = np.asarray(table[key])
+        else:
+            keys = np.arange(len(table[names[0]]) if names else 0)
+        if self.rules:
+            return self.rules.program.evaluate_batch(table, keys)
+        columns = self._columns(table, exclude=(key,))
+        hits: Dict[Any, List[Dict[str, Any]]] = {}
+        states: List[Dict[str, Any]] | None = None
+        for policy in self.policies:
+            if "mask" in policy:
+                mask, evidence_columns = policy["mask"](columns)
+                rows = np.flatnonzero(mask)
+                if not rows.size:
+                    continue
+                names = list(evidence_columns)
+                values = [pylist(np.asarray(evidence_columns[name])[rows]) for name in names]
+                rationale = policy["rationale"]
+                evidences = [dict(zip(names, row)) for row in zip(*values)]
+                triggered = [(rationale(evidence), evidence) for evidence in evidences]
+            else:
+                states = states if states is not None else self._row_states(columns, len(keys))
+                checks = [policy["check"](state) for state in states]
+                rows = np.asarray([index for index, check in enumerate(checks) if check[0]], dtype=np.intp)
+                triggered = [checks[index][1:] for index in rows.tolist()]
+            for row_key, (rationale, evidence) in zip(keys[rows].tolist(), triggered):
+                hits.setdefault(row_key, []).append(
+                    {
+                        "id": policy["id"],
+                        "title": policy["title"],
+                        "severity": policy["severity"],
+                        "rationale": rationale,
+                        "evidence": evidence,
+                    }
+                )
+        return hits
+
+    @staticmethod
+    def state_table(states: Iterable[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+        """Columnar table from ``evaluate``-style state dicts (``keyword_counts`` flattened)."""
+        table: Dict[str, List[Any]] = {}
+        for index, state in enumerate(states):
+            flat = {name: value for name, value in state.items() if name != "keyword_counts"}
+            for word, count in (state.get("keyword_counts") or {}).items():
+                flat[f"keyword_{word}"] = count
+            for name in table.keys() - flat.keys():
+                table[name].append(None)
+            for name, value in flat.items():
+                table.setdefault(name, [None] * index).append(value)
+        return table
+
+    @staticmethod
+    def portfolio_table(portfolio: Mapping[str, Any]) -> Dict[str, List[Any]]:
+        """Columnar state for every studio in ``StudioAnalytics.compute_portfolio_kpis`` output."""
+        entries: Sequence[Mapping[str, Any]] = portfolio.get("studios", [])
+        metrics = [entry["metrics"] for entry in entries]
+        return {
+            "studio_id": [entry["studio_id"] for entry in entries],
+            "refund_ratio": [m["refunds"] / m["gross_revenue"] if m["gross_revenue"] else 0.0 for m in metrics],
+            "attendance_rate": [m["attendance_rate"] for m in metrics],
+            "avg_sessions_per_member": [m["avg_sessions_per_member"] for m in metrics],
+            "avg_payout_lag_days": [m["avg_payout_lag_days"] for m in metrics],
+        }
+
+    @staticmethod
+    def _columns(table: Mapping[str, Any], *, exclude: Sequence[str] = ()) -> Columns:
+        """Arrays for Python policy masks; numeric columns become floats with NaN for missing values."""
+        columns: Columns = {}
+        for name in table.keys():
+            if name in exclude:
+                continue
+            values = np.asarray(table[name])
+            if values.dtype.kind == "O":
+                try:
+                    values = values.astype(float)
+                except (TypeError, ValueError):
+                    pass
+            columns[name] = values
+        return columns
+
+    @staticmethod
+    def _row_states(columns: Columns, size: int) -> List[Dict[str, Any]]:
+        """Rebuild per-row state dicts for policies that only provide a scalar ``check``."""
+        values = {name: pylist(column) for name, column in columns.items()}
+        states: List[Dict[str, Any]] = []
+        for index in range(size):
+            state: Dict[str, Any] = {"keyword_counts": {}}
+            for name, column in values.items():
+                if name.startswith("keyword_"):
+                    state["keyword_counts"][name[len("keyword_"):]] = column[index]
+                else:
+                    state[name] = column[index]
+            states.append(state)
+        return states
@@ -0,0 +1,486 @@
+"""Declarative guardrail rules compiled into a flat predicate program.
+
+A rule file (YAML or JSON, see ``data/policies/risk_guard_rules.yml``) declares
+``fields`` read from the risk state, ``derived`` sums and ``policies`` whose ``when``
+clause combines comparisons with ``all``/``any``/``not``. ``compile_rules`` turns it
+into a ``PolicyProgram``:
+
+* every distinct field/sum becomes a value slot and every distinct comparison a
+  predicate slot, so rules that test the same thing share one evaluation;
+* the scalar path is a single generated function: each slot is read from the
+  state once, and each ``when`` clause is an ``and``/``or`` expression over
+  memoised predicate slots, so it short-circuits like hand-written Python;
+* the columnar path evaluates the same predicate slots as boolean masks;
+* rationale templates and evidence are rendered only for triggered policies.
+
+Thresholds, field names and templates reach the generated code as bound
+constants, never as source text. ``PolicyRules`` wraps a rule file and
+recompiles it when the file changes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import operator
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_RULES_PATH = PROJECT_ROOT / "data" / "policies" / "risk_guard_rules.yml"
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "eq": operator.eq,
+    "ne": operator.ne,
+}
+PY_OPERATORS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "eq": "==", "ne": "!="}
+SEVERITIES = ("low", "medium", "high", "critical")
+
+
+class PolicyRuleError(RuntimeError):
+    """Raised when a policy rule file is missing or malformed."""
+
+
+@dataclass(frozen=True)
+class ValueSlot:
+    name: str
+    path: Tuple[str, ...] = ()
+    default: Any = None
+    column: str = ""
+    operands: Tuple[int, ...] = ()
+
+    @property
+    def derived(self) -> bool:
+        return bool(self.operands)
+
+
+@dataclass(frozen=True)
+class Predicate:
+    slot: int
+    op: str
+    value: Any = None
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    id: str
+    title: str
+    severity: str
+    tree: Tuple[Any, ...]
+    rationale: str
+    evidence: Tuple[Tuple[str, int], ...]
+
+
+def pylist(values: np.ndarray) -> List[Any]:
+    """Python scalars for evidence payloads; NaN becomes ``None`` like the scalar path."""
+    items = values.tolist()
+    if values.dtype.kind == "f":
+        return [None if item != item else item for item in items]
+    return items
+
+
+def _dig(state: Any, path: Tuple[str, ...]) -> Any:
+    for part in path:
+        try:
+            state = state.get(part)
+        except AttributeError:
+            return None
+    return state
+
+
+def _predicate_ids(node: Tuple[Any, ...]) -> List[int]:
+    kind = node[0]
+    if kind == "pred":
+        return [node[1]]
+    if kind == "const":
+        return []
+    if kind == "not":
+        return _predicate_ids(node[1])
+    return [index for child in node[1] for index in _predicate_ids(child)]
+
+
+class PolicyProgram:
+    """Compiled rule set; immutable, so it can be swapped atomically on reload."""
+
+    def __init__(
+        self,
+        slots: Sequence[ValueSlot],
+        predicates: Sequence[Predicate],
+        policies: Sequence[CompiledPolicy],
+        *,
+        source: str = "<memory>",
+    ):
+        self.slots = tuple(slots)
+        self.predicates = tuple(predicates)
+        self.policies = tuple(policies)
+        self.source = source
+        self.code = self._generate()
+        namespace: Dict[str, Any] = {"_dig": _dig, "_hit": self._hit}
+        for index, slot in enumerate(self.slots):
+            namespace[f"K{index}"] = slot.path[0] if len(slot.path) == 1 else slot.path
+            namespace[f"D{index}"] = slot.default
+        for index, predicate in enumerate(self.predicates):
+            namespace[f"T{index}"] = predicate.value
+        for index, policy in enumerate(self.policies):
+            namespace[f"R{index}"] = policy
+            namespace[f"E{index}"] = tuple(key for key, _ in policy.evidence)
+        exec(compile(self.code, f"<policy rules {source}>", "exec"), namespace)
+        self._evaluate: Callable[[Mapping[str, Any]], List[Dict[str, Any]]] = namespace["evaluate"]
+
+    def _generate(self) -> str:
+        """Python source of the scalar program (identifiers and slot indexes only)."""
+        self._nullable: List[bool] = []
+        for slot in self.slots:
+            if slot.derived:
+                self._nullable.append(any(self._nullable[operand] for operand in slot.operands))
+            else:
+                self._nullable.append(slot.default is None)
+        uses: Dict[int, int] = {}
+        for policy in self.policies:
+            for index in _predicate_ids(policy.tree):
+                uses[index] = uses.get(index, 0) + 1
+        self._shared = {index for index, count in uses.items() if count > 1}
+        lines = ["def evaluate(state):"]
+        for index, slot in enumerate(self.slots):
+            if slot.derived:
+                total = " + ".join(f"v{operand}" for operand in slot.operands)
+                missing = " or ".join(f"v{operand} is None" for operand in slot.operands if self._nullable[operand])
+                lines.append(f"    v{index} = None if {missing} else {total}" if missing else f"    v{index} = {total}")
+                continue
+            if len(slot.path) == 1:
+                lines.append(f"    v{index} = state.get(K{index})")
+            else:
+                lines.append(f"    v{index} = _dig(state, K{index})")
+            if slot.default is not None:
+                lines.append(f"    if v{index} is None:")
+                lines.append(f"        v{index} = D{index}")
+        if self._shared:
+            lines.append("    " + " = ".join(f"p{index}" for index in sorted(self._shared)) + " = None")
+        lines.append("    hits = []")
+        for index, policy in enumerate(self.policies):
+            evidence = "".join(f"v{slot}, " for _, slot in policy.evidence)
+            lines.append(f"    if {self._expression(policy.tree)}:")
+            lines.append(f"        hits.append(_hit(R{index}, E{index}, ({evidence})))")
+        lines.append("    return hits")
+        return "\n".join(lines) + "\n"
+
+    def _expression(self, node: Tuple[Any, ...]) -> str:
+        kind = node[0]
+        if kind == "pred":
+            index = node[1]
+            predicate = self.predicates[index]
+            value = f"v{predicate.slot}"
+            if predicate.op == "present":
+                return f"({value} is not None)"
+            test = f"{value} {PY_OPERATORS[predicate.op]} T{index}"
+            if self._nullable[predicate.slot]:
+                test = f"{value} is not None and {test}"
+            if index not in self._shared:
+                return f"({test})"
+            return f"(p{index} if p{index} is not None else (p{index} := ({test})))"
+        if kind == "const":
+            return repr(bool(node[1]))
+        if kind == "not":
+            return f"(not {self._expression(node[1])})"
+        if not node[1]:
+            return repr(kind == "all")
+        joiner = " or " if kind == "any" else " and "
+        return "(" + joiner.join(self._expression(child) for child in node[1]) + ")"
+
+    def evaluate(self, state: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """Return triggered policy hits for one state dict."""
+        return self._evaluate(state)
+
+    # -- columnar -------------------------------------------------------
+    def evaluate_batch(self, table: Mapping[str, Any], keys: np.ndarray) -> Dict[Any, List[Dict[str, Any]]]:
+        """Evaluate every policy as a boolean mask over ``table``; hits only for triggered rows."""
+        size = len(keys)
+        columns: List[Optional[np.ndarray]] = [None] * len(self.slots)
+        masks: List[Optional[np.ndarray]] = [None] * len(self.predicates)
+
+        def column(index: int) -> np.ndarray:
+            current = columns[index]
+            if current is None:
+                slot = self.slots[index]
+                if slot.derived:
+                    current = np.sum([column(operand) for operand in slot.operands], axis=0)
+                elif slot.column not in table:
+                    current = np.full(size, np.nan if slot.default is None else slot.default)
+                else:
+                    try:
+                        current = np.asarray(table[slot.column], dtype=float)
+                    except (TypeError, ValueError):
+                        # Non-numeric field (e.g. a tier label): compare element-wise as objects.
+                        current = np.asarray(table[slot.column], dtype=object)
+                        if slot.default is not None:
+                            current = np.asarray([slot.default if item is None else item for item in current], dtype=object)
+                    else:
+                        if slot.default is not None:
+                            current = np.where(np.isnan(current), slot.default, current)
+                            if isinstance(slot.default, int) and not isinstance(slot.default, bool):
+                                current = current.astype(np.int64)
+                columns[index] = current
+            return current
+
+        def mask(index: int) -> np.ndarray:
+            current = masks[index]
+            if current is None:
+                predicate = self.predicates[index]
+                values = column(predicate.slot)
+                compare = OPERATORS.get(predicate.op)
+                if values.dtype.kind == "O":
+                    valid = np.asarray([item is not None for item in values], dtype=bool)
+                    if compare is not None:
+                        current = np.asarray(
+                            [item is not None and bool(compare(item, predicate.value)) for item in values], dtype=bool
+                        )
+                else:
+                    valid = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(size, dtype=bool)
+                    if compare is not None:
+                        with np.errstate(invalid="ignore"):
+                            current = compare(values, predicate.value) & valid
+                if compare is None:
+                    current = valid
+                masks[index] = current
+            return current
+
+        def reduce(node: Tuple[Any, ...]) -> np.ndarray:
+            kind = node[0]
+            if kind == "pred":
+                return mask(node[1])
+            if kind == "const":
+                return np.full(size, node[1], dtype=bool)
+            if kind == "not":
+                return ~reduce(node[1])
+            combined = reduce(node[1][0]) if node[1] else np.full(size, kind == "all", dtype=bool)
+            for child in node[1][1:]:
+                # Vector short-circuit: stop once every row is decided.
+                if (kind == "any" and combined.all()) or (kind == "all" and not combined.any()):
+                    break
+                combined = combined | reduce(child) if kind == "any" else combined & reduce(child)
+            return combined
+
+        hits: Dict[Any, List[Dict[str, Any]]] = {}
+        for policy in self.policies:
+            rows = np.flatnonzero(reduce(policy.tree))
+            if not rows.size:
+                continue
+            names = tuple(key for key, _ in policy.evidence)
+            values = [pylist(column(slot)[rows]) for _, slot in policy.evidence]
+            for row_key, row in zip(keys[rows].tolist(), zip(*values) if values else ((),) * rows.size):
+                hits.setdefault(row_key, []).append(self._hit(policy, names, row))
+        return hits
+
+    @staticmethod
+    def _hit(policy: CompiledPolicy, keys: Sequence[str], values: Sequence[Any]) -> Dict[str, Any]:
+        evidence = dict(zip(keys, values))
+        try:
+            rationale = policy.rationale.format_map(evidence)
+        except (KeyError, IndexError, TypeError, ValueError):
+            rationale = f"{policy.rationale} {evidence}"
+        return {
+            "id": policy.id,
+            "title": policy.title,
+            "severity": policy.severity,
+            "rationale": rationale,
+            "evidence": evidence,
+        }
+
+
+class _Compiler:
+    def __init__(self, document: Mapping[str, Any], source: str):
+        self.source = source
+        self.slots: List[ValueSlot] = []
+        self.slot_ids: Dict[str, int] = {}
+        self.predicates: List[Predicate] = []
+        self.predicate_ids: Dict[Tuple[int, str, Any], int] = {}
+        self.document = document
+
+    def error(self, message: str) -> PolicyRuleError:
+        return PolicyRuleError(f"{self.source}: {message}")
+
+    def compile(self) -> PolicyProgram:
+        if not isinstance(self.document, Mapping):
+            raise self.error("rule file must be a mapping")
+        for name, spec in (self.document.get("fields") or {}).items():
+            spec = spec or {}
+            if not isinstance(spec, Mapping):
+                raise self.error(f"field {name!r} must be a mapping")
+            self._add_slot(ValueSlot(
+                name=name,
+                path=tuple(name.split(".")),
+                default=spec.get("default"),
+                column=spec.get("column") or name.replace(".", "_"),
+            ))
+        for name, spec in (self.document.get("derived") or {}).items():
+            operands = (spec or {}).get("sum") if isinstance(spec, Mapping) else None
+            if not operands:
+                raise self.error(f"derived value {name!r} needs a non-empty 'sum' list")
+            self._add_slot(ValueSlot(name=name, operands=tuple(self._slot(operand) for operand in operands)))
+        policies = self.document.get("policies")
+        if not isinstance(policies, list) or not policies:
+            raise self.error("'policies' must be a non-empty list")
+        compiled = [self._policy(policy) for policy in policies]
+        seen = set()
+        for policy in compiled:
+            if policy.id in seen:
+                raise self.error(f"duplicate policy id {policy.id!r}")
+            seen.add(policy.id)
+        return PolicyProgram(self.slots, self.predicates, compiled, source=self.source)
+
+    def _add_slot(self, slot: ValueSlot) -> None:
+        if slot.name in self.slot_ids:
+            raise self.error(f"value {slot.name!r} declared twice")
+        self.slot_ids[slot.name] = len(self.slots)
+        self.slots.append(slot)
+
+    def _slot(self, name: str) -> int:
+        try:
+            return self.slot_ids[name]
+        except KeyError:
+            raise self.error(f"unknown value {name!r}; declare it under 'fields' or 'derived'") from None
+
+    def _predicate(self, name: str, op: str, value: Any) -> int:
+        if op != "present" and op not in OPERATORS:
+            raise self.error(f"unknown operator {op!r} for {name!r}")
+        key = (self._slot(name), op, None if op == "present" else value)
+        try:
+            hash(key)
+        except TypeError:
+            raise self.error(f"threshold for {name!r} {op} must be a scalar, got {value!r}") from None
+        if key not in self.predicate_ids:
+            self.predicate_ids[key] = len(self.predicates)
+            self.predicates.append(Predicate(*key))
+        return self.predicate_ids[key]
+
+    def _tree(self, node: Any) -> Tuple[Any, ...]:
+        """Normalise a ``when`` clause into ``("any"|"all", children)``/``("not", child)``/``("pred", id)``."""
+        if isinstance(node, bool):
+            return ("const", node)
+        if not isinstance(node, Mapping) or not node:
+            raise self.error(f"invalid condition {node!r}")
+        terms: List[Tuple[Any, ...]] = []
+        for key, spec in node.items():
+            if key in ("all", "any"):
+                if not isinstance(spec, list):
+                    raise self.error(f"'{key}' expects a list of conditions")
+                terms.append((key, tuple(self._tree(child) for child in spec)))
+            elif key == "not":
+                terms.append(("not", self._tree(spec)))
+            elif isinstance(spec, Mapping) and spec:
+                terms.extend(("pred", self._predicate(key, op, value)) for op, value in spec.items())
+            else:
+                raise self.error(f"condition on {key!r} must map operators to thresholds")
+        return terms[0] if len(terms) == 1 else ("all", tuple(terms))
+
+    def _policy(self, spec: Any) -> CompiledPolicy:
+        if not isinstance(spec, Mapping):
+            raise self.error(f"policy must be a mapping, got {spec!r}")
+        policy_id = spec.get("id")
+        if not policy_id or "when" not in spec:
+            raise self.error(f"policy {policy_id or spec!r} needs 'id' and 'when'")
+        severity = spec.get("severity", "medium")
+        if severity not in SEVERITIES:
+            raise self.error(f"policy {policy_id!r} has unknown severity {severity!r}")
+        tree = self._tree(spec["when"])
+        evidence = spec.get("evidence") or []
+        pairs = evidence.items() if isinstance(evidence, Mapping) else ((name, name) for name in evidence)
+        return CompiledPolicy(
+            id=str(policy_id),
+            title=str(spec.get("title", policy_id)),
+            severity=severity,
+            tree=tree,
+            rationale=str(spec.get("rationale", spec.get("title", policy_id))),
+            evidence=tuple((key, self._slot(name)) for key, name in pairs),
+        )
+
+
+def compile_rules(document: Mapping[str, Any], *, source: str = "<memory>") -> PolicyProgram:
+    """Compile a parsed rule document into a ``PolicyProgram``."""
+    return _Compiler(document, source).compile()
+
+
+def load_rules(path: Path) -> PolicyProgram:
+    """Parse and compile a YAML (or ``.json``) rule file."""
+    path = Path(path)
+    try:
+        text = path.read_text(encoding="utf-8-sig")
+    except OSError as exc:
+        raise PolicyRuleError(f"Cannot read policy rules {path}: {exc}") from exc
+    try:
+        document = json.loads(text) if path.suffix == ".json" else yaml.safe_load(text)
+    except (ValueError, yaml.YAMLError) as exc:
+        raise PolicyRuleError(f"{path}: {exc}") from exc
+    return compile_rules(document or {}, source=str(path))
+
+
+class PolicyRules:
+    """A rule file plus its compiled program, recompiled when the file changes.
+
+    The file's mtime/size is checked at most every ``reload_interval`` seconds on
+    access. A broken edit is logged and the last good program keeps serving.
+    """
+
+    def __init__(self, path: Path = DEFAULT_RULES_PATH, *, reload_interval: float = 1.0):
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._program = load_rules(self.path)
+        self._checked_at = time.monotonic()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def program(self) -> PolicyProgram:
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+        return self._program
+
+    def reload(self, *, force: bool = False) -> bool:
+        """Recompile if the file changed (or ``force``); returns True when a new program is active."""
+        if not self._lock.acquire(blocking=False):
+            return False  # another thread is already reloading; keep serving the current program
+        try:
+            self._checked_at = time.monotonic()
+            signature = self._stat()
+            if not force and signature == self._signature:
+                return False
+            self._signature = signature
+            try:
+                program = load_rules(self.path)
+            except PolicyRuleError as exc:
+                logger.warning("Keeping previous policy rules; reload failed: %s", exc)
+                return False
+            self._program = program
+            logger.info("Reloaded %d policies from %s", len(program.policies), self.path)
+            return True
+        finally:
+            self._lock.release()
+
+
+__all__ = [
+    "DEFAULT_RULES_PATH",
+    "PolicyProgram",
+    "PolicyRuleError",
+    "PolicyRules",
+    "compile_rules",
+    "load_rules",
+    "pylist",
+]
@@ -4,7 +4,9 @@ from typing import Any, Dict, List, Optional
 from app.agents.revenue_architect_agent import RevenueArchitectAgent
 from app.config import Settings
 from app.services.studio_analytics import StudioAnalytics, get_studio_analytics
+from app.utils.llm_cache import get_llm_cache
 from app.utils.llm_client import LLMClient
+from app.utils.local_llm import get_local_llm
 
 
 class RecommendationSimulator:
@@ -12,7 +14,9 @@ class RecommendationSimulator:
 
     def __init__(self, settings: Settings, analytics: Optional[StudioAnalytics] = None):
         self.settings = settings
-        self.llm = LLMClient(settings.llm_endpoint, api_key=settings.openai_api_key)
+        self.llm = LLMClient(
+            settings.llm_endpoint, api_key=settings.openai_api_key, cache=get_llm_cache(), backend=get_local_llm()
+        )
         self.agent = RevenueArchitectAgent(self.llm)
         self.analytics = analytics or get_studio_analytics()
 
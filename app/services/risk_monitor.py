@@ -0,0 +1,393 @@
+"""Streaming risk monitor: incremental per-studio windows over appended feed rows.
+
+Transaction, session and settlement rows arrive from CSV file tails (``CsvTail``)
+or an in-process queue. Each row adds its contribution to the studio's sliding
+window (refund ratio inputs, keyword hits in ``description``, attendance, payout
+lag) and is remembered in an expiry heap, so rows leaving the window are
+subtracted again without rescanning anything. ``flush`` re-evaluates the
+``PolicyEngine`` only for studios whose window changed and emits
+``policy_triggered`` / ``policy_cleared`` events to the subscribed sinks.
+"""
+from __future__ import annotations
+
+import csv
+import heapq
+import itertools
+import logging
+import queue
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from app.config import get_settings
+from app.services.policy_engine import PolicyEngine
+from app.services.studio_analytics import REFUND_TYPES, ROW_TYPES
+from app.utils.keyword_matcher import KeywordMatcher, get_risk_keyword_matcher
+
+logger = logging.getLogger(__name__)
+
+RiskEvent = Dict[str, Any]
+EventSink = Callable[[RiskEvent], None]
+
+# Pass as ``window`` to keep every row (``None`` means the configured default).
+UNBOUNDED_WINDOW = timedelta(0)
+
+
+class _Contribution(NamedTuple):
+    """What one feed row adds to (and later removes from) its studio window."""
+
+    transactions: int = 0
+    gross: float = 0.0
+    refunds: float = 0.0
+    categories: Tuple[str, ...] = ()
+    tx_member: str = ""
+    sessions: int = 0
+    attended: int = 0
+    session_member: str = ""
+    lag_days: Optional[float] = None
+
+
+_EMPTY_CONTRIBUTION = _Contribution()
+
+
+@dataclass
+class StudioWindow:
+    """Running aggregates for one studio over the monitor window."""
+
+    transactions: int = 0
+    gross: float = 0.0
+    refunds: float = 0.0
+    keywords: Counter = field(default_factory=Counter)
+    tx_members: Counter = field(default_factory=Counter)
+    sessions: int = 0
+    attended: int = 0
+    session_members: Counter = field(default_factory=Counter)
+    lag_sum: float = 0.0
+    lag_count: int = 0
+
+    def apply(self, item: _Contribution, sign: int) -> None:
+        self.transactions += sign * item.transactions
+        self.gross += sign * item.gross
+        self.refunds += sign * item.refunds
+        for label in item.categories:
+            self.keywords[label] += sign
+        self.sessions += sign * item.sessions
+        self.attended += sign * item.attended
+        self._count(self.tx_members, item.tx_member, sign)
+        self._count(self.session_members, item.session_member, sign)
+        if item.lag_days is not None:
+            self.lag_sum += sign * item.lag_days
+            self.lag_count += sign
+        if not self.transactions:
+            # Drop float residue once every transaction has left the window.
+            self.gross = self.refunds = 0.0
+        if not self.lag_count:
+            self.lag_sum = 0.0
+
+    @staticmethod
+    def _count(counter: Counter, member: str, sign: int) -> None:
+        if not member:
+            return
+        counter[member] += sign
+        if counter[member] <= 0:
+            del counter[member]
+
+    @property
+    def empty(self) -> bool:
+        return not (self.transactions or self.sessions or self.lag_count)
+
+    def state(self, categories: Iterable[str]) -> Dict[str, Any]:
+        """Risk state in the shape ``RiskGuardAgent`` hands to ``PolicyEngine.evaluate``."""
+        members = len(self.session_members) or len(self.tx_members) or self.transactions or 1
+        return {
+            "refund_ratio": self.refunds / self.gross if self.gross > 0 else 0.0,
+            "keyword_counts": {label: self.keywords[label] for label in categories},
+            "attendance_rate": round(self.attended / self.sessions, 3) if self.sessions else None,
+            "avg_sessions_per_member": round(self.sessions / members, 2) if self.sessions else None,
+            "avg_payout_lag_days": round(self.lag_sum / self.lag_count, 1) if self.lag_count else None,
+        }
+
+
+class CsvTail:
+    """Follows an append-only CSV file and returns the complete rows added since the last poll.
+
+    The header is read from the first line. A trailing line without a newline is held back
+    until it is completed, and a file that shrinks (rotation/truncation) is re-read from the top.
+    """
+
+    def __init__(self, path: str | Path, *, from_start: bool = True):
+        self.path = Path(path)
+        self.header: Optional[List[str]] = None
+        self._offset = 0
+        self._pending = b""
+        if not from_start and self.path.exists():
+            self._read_header()
+            self._offset = self.path.stat().st_size
+
+    def _read_header(self) -> None:
+        with self.path.open("rb") as handle:
+            first = handle.readline()
+        if first.endswith(b"\n"):
+            self.header = next(csv.reader([first.decode("utf-8-sig")]))
+
+    def poll(self) -> List[Dict[str, str]]:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return []
+        if size < self._offset:
+            logger.info("%s shrank; re-reading from the start", self.path)
+            self.header, self._offset, self._pending = None, 0, b""
+        if size == self._offset:
+            return []
+        with self.path.open("rb") as handle:
+            handle.seek(self._offset)
+            chunk = handle.read(size - self._offset)
+        self._offset = size
+        data = self._pending + chunk
+        complete, _, self._pending = data.rpartition(b"\n")
+        if not complete:
+            return []
+        lines = complete.decode("utf-8-sig" if self.header is None else "utf-8").splitlines()
+        if self.header is None:
+            if not lines:
+                return []
+            self.header, lines = next(csv.reader([lines[0]])), lines[1:]
+        return [dict(zip(self.header, values)) for values in csv.reader(lines) if values]
+
+
+class RiskMonitor:
+    """Keeps per-studio sliding windows up to date and emits policy hit changes as events.
+
+    Windows are keyed on event time: the watermark is the latest row time seen, rows older
+    than ``watermark - window`` are evicted (late rows beyond it are dropped), and rows
+    without a timestamp take the current watermark, or the first one once a timed row
+    arrives. Rows that add nothing to a window (e.g. a settlement without a period) are
+    accepted but not stored. ``window=None`` uses
+    ``LCP_RISK_MONITOR_WINDOW_DAYS`` (30 days); ``UNBOUNDED_WINDOW`` (or a setting
+    of 0) keeps every row.
+    """
+
+    def __init__(
+        self,
+        policy_engine: PolicyEngine | None = None,
+        *,
+        window: timedelta | None = None,
+        keyword_matcher: KeywordMatcher | None = None,
+        sinks: Iterable[EventSink] = (),
+    ):
+        if window is None:
+            window = timedelta(days=get_settings().risk_monitor_window_days)
+        self.policy_engine = policy_engine or PolicyEngine()
+        self.window: Optional[timedelta] = window or None
+        self.keyword_matcher = keyword_matcher or get_risk_keyword_matcher()
+        self.watermark: Optional[datetime] = None
+        self.dropped = 0
+        self._sinks: List[EventSink] = list(sinks)
+        self._studios: Dict[str, StudioWindow] = {}
+        self._expiry: List[Tuple[datetime, int, str, _Contribution]] = []
+        self._untimed: List[Tuple[str, _Contribution]] = []
+        self._sequence = itertools.count()
+        self._dirty: Set[str] = set()
+        self._active: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, sink: EventSink) -> None:
+        self._sinks.append(sink)
+
+    def ingest(self, table: str, row: Mapping[str, Any]) -> int:
+        return self.ingest_many(table, [row])
+
+    def ingest_many(self, table: str, rows: Iterable[Mapping[str, Any]]) -> int:
+        """Fold feed rows of ``table`` (transactions, sessions, settlements) into the windows."""
+        if table not in ROW_TYPES:
+            raise ValueError(f"Unknown feed table: {table}")
+        rows = list(rows)
+        parsed = [ROW_TYPES[table](dict(row)) for row in rows]
+        if table == "transactions":
+            found = self.keyword_matcher.scan_batch([row.get("description") for row in rows])
+        else:
+            found = [{}] * len(rows)
+        accepted = 0
+        with self._lock:
+            for row, hits in zip(parsed, found):
+                if not row.studio_id:
+                    continue
+                event_time = row.event_time or self.watermark
+                cutoff = self._cutoff()
+                if cutoff and event_time and event_time < cutoff:
+                    self.dropped += 1
+                    continue
+                accepted += 1
+                if event_time is not None and (self.watermark is None or event_time > self.watermark):
+                    self._advance(event_time)
+                item = self._contribution(table, row, tuple(hits))
+                if item == _EMPTY_CONTRIBUTION:
+                    continue
+                studio = self._studios.get(row.studio_id)
+                if studio is None:
+                    studio = self._studios[row.studio_id] = StudioWindow()
+                studio.apply(item, 1)
+                self._dirty.add(row.studio_id)
+                if event_time is None:
+                    self._untimed.append((row.studio_id, item))
+                else:
+                    heapq.heappush(self._expiry, (event_time, next(self._sequence), row.studio_id, item))
+            self._expire()
+        return accepted
+
+    @staticmethod
+    def _contribution(table: str, row: Any, categories: Tuple[str, ...]) -> _Contribution:
+        if table == "transactions":
+            refund = abs(row.amount) if row.amount < 0 or row.type in REFUND_TYPES else 0.0
+            return _Contribution(
+                transactions=1,
+                gross=row.amount if row.amount > 0 else 0.0,
+                refunds=refund,
+                categories=categories,
+                tx_member=row.member_id,
+            )
+        if table == "sessions":
+            return _Contribution(
+                sessions=1,
+                attended=int(row.attendance_status == "attended"),
+                session_member=row.member_id,
+            )
+        lag = (row.payout_date - row.period_end).days if row.period_end and row.payout_date else None
+        return _Contribution(lag_days=lag)
+
+    def _advance(self, event_time: datetime) -> None:
+        """Move the watermark; rows that arrived before the first one are timed at it."""
+        self.watermark = event_time
+        for studio_id, item in self._untimed:
+            heapq.heappush(self._expiry, (event_time, next(self._sequence), studio_id, item))
+        self._untimed.clear()
+
+    def _cutoff(self) -> Optional[datetime]:
+        if self.window is None or self.watermark is None:
+            return None
+        return self.watermark - self.window
+
+    def _expire(self) -> None:
+        cutoff = self._cutoff()
+        if cutoff is None:
+            return
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, _, studio_id, item = heapq.heappop(self._expiry)
+            studio = self._studios.get(studio_id)
+            if studio is None:  # already emptied and dropped by flush()
+                continue
+            studio.apply(item, -1)
+            self._dirty.add(studio_id)
+
+    def snapshot(self, studio_id: str) -> Optional[Dict[str, Any]]:
+        """Current window state for one studio (``None`` if the studio has no rows in the window)."""
+        with self._lock:
+            studio = self._studios.get(studio_id)
+            return studio.state(self.keyword_matcher.categories) if studio else None
+
+    def active_hits(self, studio_id: str | None = None) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            active = {key: list(hits.values()) for key, hits in self._active.items()}
+        return {studio_id: active.get(studio_id, [])} if studio_id else active
+
+    def flush(self) -> List[RiskEvent]:
+        """Re-evaluate policies for changed studios and publish the resulting events."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            states: Dict[str, Optional[Dict[str, Any]]] = {}
+            for studio_id in dirty:
+                studio = self._studios.get(studio_id)
+                if studio is not None and studio.empty:
+                    del self._studios[studio_id]
+                    studio = None
+                states[studio_id] = studio.state(self.keyword_matcher.categories) if studio else None
+            event_time = self.watermark.isoformat() if self.watermark else None
+        emitted_at = datetime.now(timezone.utc).isoformat()
+        events: List[RiskEvent] = []
+        for studio_id, state in states.items():
+            hits = {hit["id"]: hit for hit in self.policy_engine.evaluate(state)} if state else {}
+            with self._lock:
+                previous = self._active.pop(studio_id, {})
+                if hits:
+                    self._active[studio_id] = hits
+            for policy_id, hit in hits.items():
+                if policy_id not in previous:
+                    events.append(self._event("policy_triggered", studio_id, hit, event_time, emitted_at))
+            for policy_id, hit in previous.items():
+                if policy_id not in hits:
+                    events.append(self._event("policy_cleared", studio_id, hit, event_time, emitted_at))
+        for event in events:
+            for sink in self._sinks:
+                try:
+                    sink(event)
+                except Exception:  # pragma: no cover - sink guardrail
+                    logger.exception("Risk event sink failed for %s", event.get("studio_id"))
+        return events
+
+    @staticmethod
+    def _event(kind: str, studio_id: str, hit: Dict[str, Any], event_time: Optional[str], emitted_at: str) -> RiskEvent:
+        return {
+            "type": kind,
+            "studio_id": studio_id,
+            "policy_id": hit["id"],
+            "title": hit["title"],
+            "severity": hit["severity"],
+            "rationale": hit.get("rationale"),
+            "evidence": hit.get("evidence"),
+            "event_time": event_time,
+            "emitted_at": emitted_at,
+        }
+
+    def consume(
+        self,
+        feed: "queue.Queue[Optional[Tuple[str, Mapping[str, Any]]]]",
+        *,
+        flush_interval: float = 1.0,
+        stop: threading.Event | None = None,
+    ) -> None:
+        """Drain ``(table, row)`` items from an in-process queue until ``None`` or ``stop`` is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            batch: Dict[str, List[Mapping[str, Any]]] = {}
+            finished = False
+            try:
+                item = feed.get(timeout=flush_interval)
+                while True:
+                    if item is None:
+                        finished = True
+                        break
+                    batch.setdefault(item[0], []).append(item[1])
+                    item = feed.get_nowait()
+            except queue.Empty:
+                pass
+            for table, rows in batch.items():
+                self.ingest_many(table, rows)
+            self.flush()
+            if finished:
+                return
+
+    def watch(
+        self,
+        paths: Mapping[str, str | Path],
+        *,
+        poll_interval: float = 1.0,
+        from_start: bool = True,
+        stop: threading.Event | None = None,
+    ) -> None:
+        """Tail ``{table: csv path}`` files, flushing after every poll, until ``stop`` is set."""
+        stop = stop or threading.Event()
+        tails = {table: CsvTail(path, from_start=from_start) for table, path in paths.items()}
+        while not stop.is_set():
+            for table, tail in tails.items():
+                rows = tail.poll()
+                if rows:
+                    self.ingest_many(table, rows)
+            self.flush()
+            stop.wait(poll_interval)
+
+
+__all__ = ["CsvTail", "RiskEvent", "RiskMonitor", "StudioWindow", "UNBOUNDED_WINDOW"]
@@ -8,12 +8,29 @@ from dataclasses import dataclass
 from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_DATA_DIR = PROJECT_ROOT / "data" / "samples"
+REFUND_TYPES = frozenset({"refund", "chargeback", "dispute"})
+PORTFOLIO_METRICS = (
+    "arppu",
+    "net_revenue",
+    "gross_revenue",
+    "refunds",
+    "refund_ratio",
+    "active_members",
+    "repeat_rate",
+    "attendance_rate",
+    "avg_sessions_per_member",
+    "total_payout",
+    "avg_fee_ratio",
+    "avg_payout_lag_days",
+)
 
 
 def _safe_float(value: Any) -> float:
@@ -26,16 +43,93 @@ def _safe_float(value: Any) -> float:
 def _parse_iso(value: Optional[str]) -> Optional[datetime]:
     if not value:
         return None
+    if isinstance(value, datetime):
+        return value
+    return _parse_iso_text(value)
+
+
+@lru_cache(maxsize=65536)
+def _parse_iso_text(value: str) -> Optional[datetime]:
+    """Memoized string parsing; dates, periods and window bounds repeat heavily across rows and calls."""
     try:
         return datetime.fromisoformat(value.replace("Z", "+00:00"))
     except ValueError:
-        for fmt in ("%Y-%m-%d", "%Y-%m-%d/%Y-%m-%d"):
-            try:
-                parsed = datetime.strptime(value.split("/")[0], fmt)
-                return parsed
-            except ValueError:
-                continue
-    return None
+        head = value.split("/")[0]
+        try:
+            return datetime.strptime(head, "%Y-%m-%d")
+        except ValueError:
+            return None
+
+
+class TransactionRow(NamedTuple):
+    studio_id: Optional[str]
+    event_time: Optional[datetime]
+    timestamp: Optional[datetime]
+    amount: float
+    type: str
+    payment_plan: str
+    member_id: str
+
+
+class SessionRow(NamedTuple):
+    studio_id: Optional[str]
+    event_time: Optional[datetime]
+    attendance_status: str
+    member_id: str
+
+
+class SettlementRow(NamedTuple):
+    studio_id: Optional[str]
+    event_time: Optional[datetime]
+    amount: float
+    fee_ratio: float
+    period_end: Optional[datetime]
+    payout_date: Optional[datetime]
+
+
+def _event_time(row: Dict[str, Any], date_field: str) -> Optional[datetime]:
+    return _parse_iso(row.get(date_field) or row.get("period"))
+
+
+def _transaction_row(row: Dict[str, Any]) -> TransactionRow:
+    timestamp = _parse_iso(row.get("timestamp"))
+    return TransactionRow(
+        studio_id=row.get("studio_id") or row.get("merchant_id"),
+        event_time=timestamp if row.get("timestamp") else _parse_iso(row.get("period")),
+        timestamp=timestamp,
+        amount=_safe_float(row.get("amount")),
+        type=(row.get("type") or "").lower(),
+        payment_plan=(row.get("payment_plan") or "unknown").strip() or "unknown",
+        member_id=row.get("member_id") or "",
+    )
+
+
+def _session_row(row: Dict[str, Any]) -> SessionRow:
+    return SessionRow(
+        studio_id=row.get("studio_id") or row.get("merchant_id"),
+        event_time=_event_time(row, "session_date"),
+        attendance_status=(row.get("attendance_status") or "").lower(),
+        member_id=row.get("member_id") or "",
+    )
+
+
+def _settlement_row(row: Dict[str, Any]) -> SettlementRow:
+    _, _, period_end = (row.get("period") or "").partition("/")
+    return SettlementRow(
+        studio_id=row.get("studio_id") or row.get("merchant_id"),
+        event_time=_event_time(row, "payout_date"),
+        amount=_safe_float(row.get("amount")),
+        fee_ratio=_safe_float(row.get("fee_ratio")),
+        period_end=_parse_iso(period_end),
+        payout_date=_parse_iso(row.get("payout_date")),
+    )
+
+
+ROW_TYPES = {
+    "transactions": _transaction_row,
+    "sessions": _session_row,
+    "settlements": _settlement_row,
+}
 
 
 @dataclass(frozen=True)
@@ -63,16 +157,44 @@ class PeriodWindow:
 
 
 class StudioAnalytics:
-    """Loads sample datasets and derives studio-level analytics."""
+    """Loads sample datasets and derives studio-level analytics.
+
+    ``backend="csv"`` keeps every row in memory; ``backend="parquet"`` reads typed,
+    studio/month-partitioned files written by ``analytics_parquet.convert_csv_dataset``
+    from ``dataset_dir`` (default ``<data_dir>/parquet``) only when a KPI needs them;
+    ``backend="sqlite"`` aggregates in the database file built by
+    ``analytics_sqlite.import_csv_dataset`` (default ``<data_dir>/analytics.sqlite3``).
+    """
 
-    def __init__(self, data_dir: Optional[str] = None):
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        *,
+        backend: str = "csv",
+        dataset_dir: Optional[str] = None,
+    ):
         self.data_dir = Path(data_dir or DEFAULT_DATA_DIR)
         if not self.data_dir.is_absolute():
             self.data_dir = PROJECT_ROOT / self.data_dir
-        self.transactions = self._load_csv("transactions.csv")
-        self.sessions = self._load_csv("sessions.csv")
-        self.settlements = self._load_csv("settlements.csv")
-        self.studios = {row.get("studio_id"): row for row in self._load_csv("studios.csv")}
+        self._store = self._open_store(backend, dataset_dir)
+        self.backend = backend if self._store else "csv"
+        self._by_studio: Dict[str, Dict[Optional[str], List[Any]]] = {}
+        if self._store:
+            self.transactions: List[TransactionRow] = []
+            self.sessions: List[SessionRow] = []
+            self.settlements: List[SettlementRow] = []
+            studio_rows = self._store.studios()
+        else:
+            self.transactions = self._load_typed("transactions.csv", _transaction_row)
+            self.sessions = self._load_typed("sessions.csv", _session_row)
+            self.settlements = self._load_typed("settlements.csv", _settlement_row)
+            for table in ROW_TYPES:
+                grouped: Dict[Optional[str], List[Any]] = defaultdict(list)
+                for row in getattr(self, table):
+                    grouped[row.studio_id].append(row)
+                self._by_studio[table] = dict(grouped)
+            studio_rows = self._load_csv("studios.csv")
+        self.studios = {row.get("studio_id"): row for row in studio_rows}
         self.plan_stats = self._build_plan_stats()
         self.global_defaults = self.plan_stats.get("__global__", {
             "avg_ticket": 0.0,
@@ -81,15 +203,46 @@ class StudioAnalytics:
             "data_points": 0,
         })
 
+    def _open_store(self, backend: str, dataset_dir: Optional[str]):
+        if backend == "csv":
+            return None
+        if backend == "parquet":
+            from app.services.analytics_parquet import ParquetAnalyticsStore as store_cls
+
+            default_path = self.data_dir / "parquet"
+        elif backend == "sqlite":
+            from app.services.analytics_sqlite import SqliteAnalyticsStore as store_cls
+
+            default_path = self.data_dir / "analytics.sqlite3"
+        else:
+            raise ValueError(f"Unknown analytics backend: {backend}")
+        path = Path(dataset_dir) if dataset_dir else default_path
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        try:
+            return store_cls(path)
+        except (RuntimeError, FileNotFoundError) as exc:
+            logger.warning("%s analytics backend unavailable (%s); falling back to CSV", backend, exc)
+            return None
+
     def _load_csv(self, filename: str) -> List[Dict[str, Any]]:
         path = self.data_dir / filename
         if not path.exists():
             logger.warning("Sample file %s not found", path)
             return []
-        with path.open(encoding="utf-8") as handle:
+        with path.open(encoding="utf-8-sig") as handle:
             reader = csv.DictReader(handle)
             return [dict(row) for row in reader]
 
+    def _load_typed(self, filename: str, to_row: Callable[[Dict[str, Any]], Any]) -> List[Any]:
+        """Convert each CSV row once at load; KPI calls then never touch strings."""
+        path = self.data_dir / filename
+        if not path.exists():
+            logger.warning("Sample file %s not found", path)
+            return []
+        with path.open(encoding="utf-8-sig") as handle:
+            return [to_row(row) for row in csv.DictReader(handle)]
+
     def derive_window(self, period: Optional[Dict[str, Any]]) -> PeriodWindow:
         period = period or {}
         start = _parse_iso(period.get("from") or period.get("from_") or period.get("start"))
@@ -98,9 +251,18 @@ class StudioAnalytics:
 
     def compute_kpis(self, studio_id: str, window: Optional[PeriodWindow] = None) -> Dict[str, Any]:
         window = window or PeriodWindow(start=None, end=None, raw={})
-        tx_rows = self._filter_rows(self.transactions, studio_id, "timestamp", window)
-        session_rows = self._filter_rows(self.sessions, studio_id, "session_date", window)
-        settlement_rows = self._filter_rows(self.settlements, studio_id, "payout_date", window)
+        if self.backend == "sqlite":
+            aggregates = self._store.kpi_aggregates(studio_id, window.start, window.end)
+            return {
+                "studio_id": studio_id,
+                "window": window.as_dict(),
+                "financials": self._financials_block(**aggregates["financials"]),
+                "attendance": self._attendance_block(**aggregates["attendance"]),
+                "settlements": self._settlements_block(**aggregates["settlements"]),
+            }
+        tx_rows = self._rows("transactions", studio_id, window)
+        session_rows = self._rows("sessions", studio_id, window)
+        settlement_rows = self._rows("settlements", studio_id, window)
         return {
             "studio_id": studio_id,
             "window": window.as_dict(),
@@ -109,6 +271,70 @@ class StudioAnalytics:
             "settlements": self._summarize_settlements(settlement_rows),
         }
 
+    def compute_portfolio_kpis(
+        self,
+        window: Optional[PeriodWindow] = None,
+        *,
+        sort_by: str = "net_revenue",
+        descending: bool = True,
+        top_k: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """``compute_kpis`` for every studio from one grouped pass, ranked by ``sort_by``.
+
+        Studios whose metric is ``None`` (e.g. no settlements for payout lag) rank last
+        in either direction; ties keep studio id order.
+        """
+        if sort_by not in PORTFOLIO_METRICS:
+            raise ValueError(f"Unknown portfolio metric: {sort_by}")
+        window = window or PeriodWindow(start=None, end=None, raw={})
+        blocks: Dict[Optional[str], Dict[str, Dict[str, Any]]] = {}
+        if self.backend in ("sqlite", "parquet"):
+            for studio_id, aggregates in self._store.portfolio_aggregates(window.start, window.end).items():
+                blocks[studio_id] = {
+                    "financials": self._financials_block(**aggregates["financials"]),
+                    "attendance": self._attendance_block(**aggregates["attendance"]),
+                    "settlements": self._settlements_block(**aggregates["settlements"]),
+                }
+        else:
+            grouped = {table: self._grouped_rows(table, window) for table in ROW_TYPES}
+            for studio_id in set().union(*grouped.values()):
+                tx_rows = grouped["transactions"].get(studio_id, [])
+                blocks[studio_id] = {
+                    "financials": self._summarize_transactions(tx_rows),
+                    "attendance": self._summarize_sessions(grouped["sessions"].get(studio_id, []), tx_rows),
+                    "settlements": self._summarize_settlements(grouped["settlements"].get(studio_id, [])),
+                }
+        for studio_id in self.studios:
+            if studio_id not in blocks:
+                blocks[studio_id] = {
+                    "financials": self._summarize_transactions([]),
+                    "attendance": self._summarize_sessions([], []),
+                    "settlements": self._summarize_settlements([]),
+                }
+        blocks.pop(None, None)
+        entries = [
+            {
+                "studio_id": studio_id,
+                "name": self.studios.get(studio_id, {}).get("legal_name"),
+                "metrics": self._portfolio_metrics(studio_blocks),
+                **studio_blocks,
+            }
+            for studio_id, studio_blocks in sorted(blocks.items())
+        ]
+        ranked = [entry for entry in entries if entry["metrics"][sort_by] is not None]
+        ranked.sort(key=lambda entry: entry["metrics"][sort_by], reverse=descending)
+        ranked += [entry for entry in entries if entry["metrics"][sort_by] is None]
+        for rank, entry in enumerate(ranked, start=1):
+            entry["rank"] = rank
+        return {
+            "window": window.as_dict(),
+            "sort_by": sort_by,
+            "order": "desc" if descending else "asc",
+            "total_studios": len(ranked),
+            "totals": self._portfolio_totals(ranked),
+            "studios": ranked[:top_k] if top_k else ranked,
+        }
+
     def simulate_plan(
         self,
         studio_id: str,
@@ -145,35 +371,62 @@ class StudioAnalytics:
             "delta_vs_baseline": round(delta, 2),
         }
 
-    def _filter_rows(
-        self,
-        rows: Iterable[Dict[str, Any]],
-        studio_id: str,
-        date_field: str,
-        window: PeriodWindow,
-    ) -> List[Dict[str, Any]]:
-        filtered: List[Dict[str, Any]] = []
-        for row in rows:
-            row_studio = row.get("studio_id") or row.get("merchant_id")
-            if studio_id and row_studio != studio_id:
-                continue
-            if window.start or window.end:
-                dt = _parse_iso(row.get(date_field) or row.get("period"))
-                if not window.contains(dt):
-                    continue
-            filtered.append(row)
-        return filtered
-
-    def _summarize_transactions(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not rows:
-            return {
-                "gross_revenue": 0.0,
-                "net_revenue": 0.0,
-                "refunds": 0.0,
-                "active_members": 0,
-                "plan_mix": [],
-                "arppu": 0.0,
-            }
+    def _rows(self, table: str, studio_id: str, window: PeriodWindow) -> Sequence[Any]:
+        """Typed rows of ``table`` for the studio (all studios when empty) inside ``window``."""
+        if self._store:
+            to_row = ROW_TYPES[table]
+            return [to_row(row) for row in self._store.rows(table, studio_id, window.start, window.end)]
+        rows = self._by_studio[table].get(studio_id, []) if studio_id else getattr(self, table)
+        if window.start or window.end:
+            return [row for row in rows if window.contains(row.event_time)]
+        return rows
+
+    def _grouped_rows(self, table: str, window: PeriodWindow) -> Dict[Optional[str], Sequence[Any]]:
+        """Typed rows of ``table`` inside ``window`` keyed by studio, from a single scan."""
+        if not self._store:
+            return {studio_id: self._rows(table, studio_id, window) for studio_id in self._by_studio[table] if studio_id}
+        grouped: Dict[Optional[str], List[Any]] = defaultdict(list)
+        for row in self._rows(table, "", window):
+            grouped[row.studio_id].append(row)
+        return grouped
+
+    @staticmethod
+    def _portfolio_metrics(blocks: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Flatten the KPI blocks into the ``PORTFOLIO_METRICS`` used for ranking."""
+        financials, attendance, settlements = blocks["financials"], blocks["attendance"], blocks["settlements"]
+        gross = financials["gross_revenue"]
+        return {
+            "arppu": financials["arppu"],
+            "net_revenue": financials["net_revenue"],
+            "gross_revenue": gross,
+            "refunds": financials["refunds"],
+            "refund_ratio": round(financials["refunds"] / gross, 3) if gross else 0.0,
+            "active_members": financials["active_members"],
+            "repeat_rate": financials.get("repeat_rate", 0.0),
+            "attendance_rate": attendance["attendance_rate"],
+            "avg_sessions_per_member": attendance["avg_sessions_per_member"],
+            "total_payout": settlements["total_payout"],
+            "avg_fee_ratio": settlements["avg_fee_ratio"],
+            "avg_payout_lag_days": settlements["avg_payout_lag_days"],
+        }
+
+    @staticmethod
+    def _portfolio_totals(entries: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        gross = sum(entry["metrics"]["gross_revenue"] for entry in entries)
+        refunds = sum(entry["metrics"]["refunds"] for entry in entries)
+        sessions = sum(entry["attendance"]["total"] for entry in entries)
+        attended = sum(entry["attendance"].get("attended", 0) for entry in entries)
+        return {
+            "gross_revenue": round(gross, 2),
+            "net_revenue": round(sum(entry["metrics"]["net_revenue"] for entry in entries), 2),
+            "refunds": round(refunds, 2),
+            "refund_ratio": round(refunds / gross, 3) if gross else 0.0,
+            "sessions": sessions,
+            "attendance_rate": round(attended / sessions, 3) if sessions else 0.0,
+            "total_payout": round(sum(entry["metrics"]["total_payout"] for entry in entries), 2),
+        }
+
+    def _summarize_transactions(self, rows: Sequence[TransactionRow]) -> Dict[str, Any]:
         positive = 0.0
         refunds = 0.0
         members: Dict[str, int] = defaultdict(int)
@@ -181,37 +434,68 @@ class StudioAnalytics:
         first_date: Optional[datetime] = None
         last_date: Optional[datetime] = None
         for row in rows:
-            amt = _safe_float(row.get("amount"))
-            row_type = (row.get("type") or "").lower()
-            plan = (row.get("payment_plan") or "unknown").strip() or "unknown"
-            member = row.get("member_id") or ""
-            dt = _parse_iso(row.get("timestamp"))
+            amt = row.amount
+            plan = row.payment_plan
+            member = row.member_id
+            dt = row.timestamp
             if dt:
                 first_date = min(first_date or dt, dt)
                 last_date = max(last_date or dt, dt)
             if amt >= 0:
                 positive += amt
                 plan_revenue[plan] += amt
-            if amt < 0 or row_type in {"refund", "chargeback", "dispute"}:
+            if amt < 0 or row.type in REFUND_TYPES:
                 refunds += abs(amt)
             if member:
                 members[member] += 1
+        return self._financials_block(
+            rows=len(rows),
+            positive=positive,
+            refunds=refunds,
+            members=len(members),
+            repeat_members=len([cnt for cnt in members.values() if cnt > 1]),
+            top_plans=plan_revenue.most_common(5),
+            first_date=first_date,
+            last_date=last_date,
+        )
+
+    @staticmethod
+    def _financials_block(
+        *,
+        rows: int,
+        positive: float,
+        refunds: float,
+        members: int,
+        repeat_members: int,
+        top_plans: List[Tuple[str, float]],
+        first_date: Optional[datetime],
+        last_date: Optional[datetime],
+    ) -> Dict[str, Any]:
+        """Shape the ``financials`` block from transaction aggregates (shared by all backends)."""
+        if not rows:
+            return {
+                "gross_revenue": 0.0,
+                "net_revenue": 0.0,
+                "refunds": 0.0,
+                "active_members": 0,
+                "plan_mix": [],
+                "arppu": 0.0,
+            }
         net = max(positive - refunds, 0.0)
-        active_members = len(members) or 1
-        repeat_members = len([cnt for cnt in members.values() if cnt > 1])
+        active_members = members or 1
         plan_mix = [
             {
                 "plan": plan,
                 "share": round(rev / positive, 3) if positive else 0.0,
                 "revenue": round(rev, 2),
             }
-            for plan, rev in plan_revenue.most_common(5)
+            for plan, rev in top_plans
         ]
         return {
             "gross_revenue": round(positive, 2),
             "net_revenue": round(net, 2),
             "refunds": round(refunds, 2),
-            "active_members": len(members),
+            "active_members": members,
             "repeat_rate": round(repeat_members / active_members, 3) if active_members else 0.0,
             "plan_mix": plan_mix,
             "arppu": round(net / active_members, 2) if active_members else 0.0,
@@ -219,67 +503,88 @@ class StudioAnalytics:
             "period_end": last_date.isoformat() if last_date else None,
         }
 
-    def _summarize_sessions(self, sessions: List[Dict[str, Any]], tx_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _summarize_sessions(self, sessions: Sequence[SessionRow], tx_rows: Sequence[TransactionRow]) -> Dict[str, Any]:
         if not sessions:
-            active_members = {row.get("member_id") for row in tx_rows if row.get("member_id")}
+            active_members = {row.member_id for row in tx_rows if row.member_id}
+            return self._attendance_block(total=0, attended=0, missed=0, members=len(active_members), tx_rows=len(tx_rows))
+        statuses = Counter(row.attendance_status for row in sessions)
+        attended = statuses["attended"]
+        missed = statuses["missed"]
+        members = {row.member_id for row in sessions if row.member_id}
+        return self._attendance_block(
+            total=len(sessions), attended=attended, missed=missed, members=len(members), tx_rows=len(tx_rows)
+        )
+
+    @staticmethod
+    def _attendance_block(*, total: int, attended: int, missed: int, members: int, tx_rows: int) -> Dict[str, Any]:
+        """Shape the ``attendance`` block; ``members`` falls back to transaction members when there are no sessions."""
+        if not total:
             return {
                 "total": 0,
                 "attendance_rate": 0.0,
                 "avg_sessions_per_member": 0.0,
-                "unique_members": len(active_members),
+                "unique_members": members,
             }
-        total = len(sessions)
-        attended = sum(1 for row in sessions if (row.get("attendance_status") or "").lower() == "attended")
-        missed = sum(1 for row in sessions if (row.get("attendance_status") or "").lower() == "missed")
-        members = {row.get("member_id") for row in sessions if row.get("member_id")}
-        avg_sessions = total / max(len(members) or len(tx_rows) or 1, 1)
+        avg_sessions = total / max(members or tx_rows or 1, 1)
         return {
             "total": total,
             "attended": attended,
             "missed": missed,
             "attendance_rate": round(attended / total, 3) if total else 0.0,
             "avg_sessions_per_member": round(avg_sessions, 2),
-            "unique_members": len(members),
+            "unique_members": members,
         }
 
-    def _summarize_settlements(self, settlements: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not settlements:
+    def _summarize_settlements(self, settlements: Sequence[SettlementRow]) -> Dict[str, Any]:
+        total_amount = 0.0
+        fee_sum = 0.0
+        lags = []
+        for row in settlements:
+            total_amount += row.amount
+            fee_sum += row.fee_ratio
+            if row.period_end and row.payout_date:
+                lags.append((row.payout_date - row.period_end).days)
+        return self._settlements_block(
+            rows=len(settlements),
+            total_amount=total_amount,
+            fee_sum=fee_sum,
+            lag_sum=sum(lags),
+            lag_count=len(lags),
+        )
+
+    @staticmethod
+    def _settlements_block(*, rows: int, total_amount: float, fee_sum: float, lag_sum: float, lag_count: int) -> Dict[str, Any]:
+        """Shape the ``settlements`` block from settlement aggregates."""
+        if not rows:
             return {
                 "total_payout": 0.0,
                 "avg_fee_ratio": 0.0,
                 "avg_payout_lag_days": None,
             }
-        total_amount = 0.0
-        fee_ratios = []
-        lags = []
-        for row in settlements:
-            total_amount += _safe_float(row.get("amount"))
-            fee_ratios.append(_safe_float(row.get("fee_ratio")))
-            period_field = row.get("period") or ""
-            _, _, period_end = period_field.partition("/")
-            period_end_dt = _parse_iso(period_end)
-            payout_dt = _parse_iso(row.get("payout_date"))
-            if period_end_dt and payout_dt:
-                lags.append((payout_dt - period_end_dt).days)
-        avg_fee = sum(fee_ratios) / len(fee_ratios)
-        avg_lag = sum(lags) / len(lags) if lags else None
+        avg_fee = fee_sum / rows
+        avg_lag = lag_sum / lag_count if lag_count else None
         return {
             "total_payout": round(total_amount, 2),
-            "avg_fee_ratio": round(avg_fee, 3) if fee_ratios else 0.0,
+            "avg_fee_ratio": round(avg_fee, 3),
             "avg_payout_lag_days": round(avg_lag, 1) if avg_lag is not None else None,
         }
 
-    def _build_plan_stats(self) -> Dict[str, Dict[str, Any]]:
+    def _plan_aggregates(self) -> Dict[str, Dict[str, float]]:
+        if self._store:
+            return self._store.plan_aggregates()
         aggregates: Dict[str, Dict[str, float]] = defaultdict(lambda: {"positive": 0.0, "refund": 0.0, "count": 0})
         for row in self.transactions:
-            plan = (row.get("payment_plan") or "unknown").strip() or "unknown"
-            amt = _safe_float(row.get("amount"))
-            bucket = aggregates[plan]
+            amt = row.amount
+            bucket = aggregates[row.payment_plan]
             if amt >= 0:
                 bucket["positive"] += amt
                 bucket["count"] += 1
             else:
                 bucket["refund"] += abs(amt)
+        return aggregates
+
+    def _build_plan_stats(self) -> Dict[str, Dict[str, Any]]:
+        aggregates = self._plan_aggregates()
         totals = sum(bucket["positive"] for bucket in aggregates.values())
         global_count = sum(bucket["count"] for bucket in aggregates.values()) or 1
         stats: Dict[str, Dict[str, Any]] = {}
@@ -316,4 +621,9 @@ class StudioAnalytics:
 @lru_cache(maxsize=1)
 def get_studio_analytics() -> StudioAnalytics:
     """Return singleton analytics accessor to avoid repeated file I/O."""
-    return StudioAnalytics()
+    settings = get_settings()
+    return StudioAnalytics(
+        settings.analytics_data_dir,
+        backend=settings.analytics_backend,
+        dataset_dir=settings.analytics_dataset_dir,
+    )
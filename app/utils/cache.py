@@ -1,20 +1,235 @@
-"""Simple TTL + size-bound in-memory cache for deterministic demos."""
+"""Simple TTL + size-bound cache for deterministic demos, with optional shared backends.
+
+Without a backend ``TTLCache`` keeps live objects in process memory (FIFO eviction).
+With a ``CacheBackend`` values are encoded by a ``Codec`` and stored out of process, so
+every Uvicorn worker and Streamlit on a node share one warm cache:
+
+- ``SqliteCacheBackend``: one WAL-mode SQLite file (node-local, no extra service).
+- ``RedisCacheBackend``: any Redis-protocol server (Redis, KeyDB, Dragonfly or
+  ``scripts/fake_redis_server.py``) over a minimal RESP client.
+"""
 from __future__ import annotations
 
+import json
+import logging
+import pickle
+import socket
+import sqlite3
+import threading
 import time
-from typing import Any, Dict, Hashable, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class Codec(NamedTuple):
+    """Value (de)serialization for out-of-process backends."""
+
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+PICKLE_CODEC = Codec(lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads)
+
+
+class CacheBackend:
+    """Byte store shared between processes; entries expire after ``ttl_seconds``."""
+
+    name = "backend"
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_seconds: float, max_entries: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self, prefix: str = "") -> None:
+        raise NotImplementedError
+
+
+class SqliteCacheBackend(CacheBackend):
+    """Entries in one SQLite file (WAL: concurrent readers, one writer at a time across processes).
+
+    ``max_entries`` is enforced per key prefix (cache namespace) by dropping the oldest rows.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connection().execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float, max_entries: Optional[int] = None) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO entries (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(value), now, now + ttl_seconds),
+        )
+        if max_entries:
+            prefix = key.split("|", 1)[0] + "|"
+            connection.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries WHERE substr(key, 1, ?) = ? "
+                "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (len(prefix), prefix, max_entries),
+            )
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self, prefix: str = "") -> None:
+        self._connection().execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-protocol backend (RESP2 over TCP; one connection per thread).
+
+    Size is bounded by the server's ``maxmemory`` policy, so ``max_entries`` is ignored.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", *, timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int((parsed.path or "/0").strip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._command("PING")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            connection = (sock, sock.makefile("rb"))
+            self._local.connection = connection
+            if self.password:
+                self._command("AUTH", self.password)
+            if self.db:
+                self._command("SELECT", str(self.db))
+        return connection
+
+    def _command(self, *args: Any) -> Any:
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode("utf-8") for arg in args]
+        payload = b"*%d\r\n" % len(parts) + b"".join(b"$%d\r\n%s\r\n" % (len(part), part) for part in parts)
+        sock, reader = self._connection()
+        try:
+            sock.sendall(payload)
+            return self._read(reader)
+        except OSError:
+            self._local.connection = None
+            raise
+
+    def _read(self, reader) -> Any:
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RuntimeError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read(reader) for _ in range(count)]
+        raise RuntimeError(f"Unexpected RESP reply: {line!r}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float, max_entries: Optional[int] = None) -> None:
+        self._command("SET", key, value, "PX", max(1, int(ttl_seconds * 1000)))
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", key)
+
+    def clear(self, prefix: str = "") -> None:
+        cursor = b"0"
+        while True:
+            cursor, keys = self._command("SCAN", cursor, "MATCH", f"{prefix}*", "COUNT", 500)
+            if keys:
+                self._command("DEL", *keys)
+            if cursor in (b"0", "0"):
+                return
 
 
 class TTLCache:
-    """Minimal TTL cache with max size eviction (FIFO)."""
+    """Minimal TTL cache with max size eviction (FIFO).
 
-    def __init__(self, ttl_seconds: int = 300, max_size: int = 5):
+    ``backend`` moves entries out of process: keys become ``"<namespace>|<json key>"``
+    and values pass through ``codec`` (pickle by default). Backend errors are logged
+    and treated as misses, so a missing cache file or server never fails a request.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_size: int = 5,
+        *,
+        backend: CacheBackend | None = None,
+        namespace: str = "default",
+        codec: Codec = PICKLE_CODEC,
+    ):
         self.ttl_seconds = ttl_seconds
         self.max_size = max_size
+        self.backend = backend
+        self.namespace = namespace
+        self.codec = codec
         self._store: Dict[Hashable, tuple[float, Any]] = {}
         self._order: list[Hashable] = []
 
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}|{json.dumps(key, ensure_ascii=False, separators=(',', ':'), default=str)}"
+
     def get(self, key: Hashable) -> Optional[Any]:
+        if self.backend is not None:
+            try:
+                raw = self.backend.get(self._key(key))
+                return self.codec.decode(raw) if raw is not None else None
+            except Exception as err:  # pragma: no cover - backend dependent
+                logger.warning("%s cache read failed: %s", self.backend.name, err)
+                return None
         now = time.time()
         item = self._store.get(key)
         if not item:
@@ -26,6 +241,12 @@ class TTLCache:
         return value
 
     def set(self, key: Hashable, value: Any) -> None:
+        if self.backend is not None:
+            try:
+                self.backend.set(self._key(key), self.codec.encode(value), self.ttl_seconds, self.max_size)
+            except Exception as err:  # pragma: no cover - backend dependent
+                logger.warning("%s cache write failed: %s", self.backend.name, err)
+            return
         now = time.time()
         if key not in self._order:
             self._order.append(key)
@@ -33,11 +254,43 @@ class TTLCache:
         self._evict_if_needed()
 
     def delete(self, key: Hashable) -> None:
+        if self.backend is not None:
+            try:
+                self.backend.delete(self._key(key))
+            except Exception as err:  # pragma: no cover - backend dependent
+                logger.warning("%s cache delete failed: %s", self.backend.name, err)
+            return
         self._store.pop(key, None)
         if key in self._order:
             self._order.remove(key)
 
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear(f"{self.namespace}|")
+            return
+        self._store.clear()
+        self._order.clear()
+
     def _evict_if_needed(self) -> None:
         while len(self._order) > self.max_size:
             oldest = self._order.pop(0)
-            self._store.pop(oldest, None)
\ No newline at end of file
+            self._store.pop(oldest, None)
+
+
+@lru_cache(maxsize=1)
+def get_cache_backend() -> Optional[CacheBackend]:
+    """Shared backend from ``LCP_CACHE_BACKEND`` (``memory`` | ``sqlite`` | ``redis``); ``None`` keeps caches in process."""
+    settings = get_settings()
+    kind = (settings.cache_backend or "memory").lower()
+    try:
+        if kind == "sqlite":
+            path = Path(settings.cache_path)
+            return SqliteCacheBackend(path if path.is_absolute() else PROJECT_ROOT / path)
+        if kind == "redis":
+            return RedisCacheBackend(settings.cache_redis_url)
+    except (OSError, sqlite3.Error, RuntimeError) as err:
+        logger.warning("%s cache backend unavailable (%s); using in-process cache", kind, err)
+        return None
+    if kind != "memory":
+        logger.warning("Unknown cache backend %r; using in-process cache", kind)
+    return None
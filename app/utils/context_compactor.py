@@ -0,0 +1,236 @@
+"""Per-agent context compaction applied before LLM calls.
+
+Agents hand the LLM their whole working context (raw graph triples, Neo4j rows,
+every vector hit, ``graph_meta`` and upstream agent outputs). ``ContextCompactor``
+projects that context onto the fields each agent actually uses, dedupes evidence
+lists and keeps their highest-ranked entries (retrievers already return hits in
+relevance order), clips long strings, and then shrinks the largest lists until
+the serialized context fits the agent's token budget. Prompt tokens before and
+after are recorded per agent in ``stats``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:  # pragma: no cover - optional dependency
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Fields are dotted paths into the agent context; list caps apply to lists under that key anywhere.
+AGENT_CONTEXT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "wellness_insight": {
+        "budget": 1200,
+        "fields": ("meta", "workflow", "kpis", "vector", "knowledge"),
+    },
+    "risk_guard": {
+        "budget": 1200,
+        "fields": ("meta", "workflow", "risk_score", "signals", "policies", "evidence", "vector"),
+    },
+    "revenue_architect": {
+        "budget": 1000,
+        "fields": ("meta", "workflow", "vector", "graph", "neo4j", "knowledge"),
+    },
+    "strategy_framework": {
+        "budget": 1600,
+        "fields": (
+            "meta",
+            "workflow",
+            "frameworks",
+            "knowledge",
+            "insight.summary",
+            "insight.kpis.studio",
+            "risk.risk_score",
+            "risk.signals",
+            "risk.policies",
+            "recommendation.items",
+        ),
+    },
+    "consumer_explainer": {
+        "budget": 1000,
+        "fields": (
+            "insight.summary",
+            "risk.risk_score",
+            "risk.signals",
+            "risk.narrative",
+            "recommendation.items",
+            "strategy.key_actions",
+        ),
+    },
+}
+DEFAULT_LIST_LIMITS: Dict[str, int] = {
+    "vector": 5,
+    "vector_flags": 3,
+    "graph": 10,
+    "neo4j": 10,
+    "knowledge": 3,
+    "knowledge_refs": 3,
+    "policies": 5,
+    "items": 5,
+    "plan_mix": 3,
+}
+DEFAULT_MAX_STRING = 400
+_MIN_STRING = 48
+# Keys that identify an evidence entry for de-duplication (ids/scores differ between copies).
+_IDENTITY_KEYS = ("content", "snippet", "text")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class TokenCounter:
+    """Prompt token estimate: ``tiktoken`` when installed, else ~4 UTF-8 bytes per token."""
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+
+    def __call__(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+class ContextCompactor:
+    """Shrinks agent contexts to per-agent field sets and token budgets."""
+
+    def __init__(
+        self,
+        profiles: Mapping[str, Mapping[str, Any]] | None = None,
+        *,
+        list_limits: Mapping[str, int] | None = None,
+        max_string: int = DEFAULT_MAX_STRING,
+        counter: TokenCounter | None = None,
+    ):
+        self.profiles = dict(profiles or AGENT_CONTEXT_PROFILES)
+        self.list_limits = dict(list_limits or DEFAULT_LIST_LIMITS)
+        self.max_string = max_string
+        self.count_tokens = counter or TokenCounter()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def compact(self, profile: Optional[str], context: Mapping[str, Any]) -> Dict[str, Any]:
+        """Compacted copy of ``context`` for ``profile``; unknown profiles pass through unchanged."""
+        spec = self.profiles.get(profile or "")
+        if spec is None:
+            return dict(context)
+        before = self.count_tokens(_dumps(context))
+        projected = self._project(context, spec.get("fields") or ())
+        max_string = self.max_string
+        compacted = self._trim(projected, max_string, self.list_limits)
+        after = self.count_tokens(_dumps(compacted))
+        budget = spec.get("budget")
+        limits = dict(self.list_limits)
+        while budget and after > budget:
+            shrunk = self._shrink_largest_list(compacted, limits)
+            if not shrunk:
+                if max_string <= _MIN_STRING:
+                    break
+                max_string //= 2
+            compacted = self._trim(projected, max_string, limits)
+            after = self.count_tokens(_dumps(compacted))
+        self._record(profile, before, after, budget)
+        return compacted
+
+    def _record(self, profile: str, before: int, after: int, budget: Optional[int]) -> None:
+        with self._lock:
+            entry = self.stats.setdefault(profile, {"calls": 0, "tokens_before": 0, "tokens_after": 0, "over_budget": 0})
+            entry["calls"] += 1
+            entry["tokens_before"] += before
+            entry["tokens_after"] += after
+            if budget and after > budget:
+                entry["over_budget"] += 1
+        logger.debug("context compaction %s: %d -> %d tokens (budget %s)", profile, before, after, budget)
+
+    @staticmethod
+    def _project(context: Mapping[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+        projected: Dict[str, Any] = {}
+        for field in fields:
+            path = field.split(".")
+            value: Any = context
+            for part in path:
+                if not isinstance(value, Mapping) or part not in value:
+                    break
+                value = value[part]
+            else:
+                target = projected
+                for part in path[:-1]:
+                    target = target.setdefault(part, {})
+                target[path[-1]] = value
+        return projected
+
+    def _trim(self, value: Any, max_string: int, limits: Mapping[str, int], key: str = "") -> Any:
+        if isinstance(value, Mapping):
+            return {name: self._trim(item, max_string, limits, str(name)) for name, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            items = self._dedupe(value)
+            limit = limits.get(key)
+            if limit is not None:
+                items = items[:limit]
+            return [self._trim(item, max_string, limits, key) for item in items]
+        if isinstance(value, str) and len(value) > max_string:
+            return value[: max_string - 1] + "…"
+        if isinstance(value, float):
+            return round(value, 4)
+        return value
+
+    @staticmethod
+    def _dedupe(items: Sequence[Any]) -> list:
+        seen = set()
+        unique = []
+        for item in items:
+            identity: Any = None
+            if isinstance(item, Mapping):
+                identity = next((item[name] for name in _IDENTITY_KEYS if item.get(name)), None)
+            if identity is None:
+                try:
+                    identity = _dumps(item)
+                except (TypeError, ValueError):
+                    identity = id(item)
+            if not isinstance(identity, (str, int, float, tuple)):
+                identity = _dumps(identity)
+            if identity in seen:
+                continue
+            seen.add(identity)
+            unique.append(item)
+        return unique
+
+    def _shrink_largest_list(self, compacted: Any, limits: Dict[str, int]) -> bool:
+        """Halve the cap of the list key contributing the most serialized text; False if none can shrink."""
+        sizes: Dict[str, Tuple[int, int]] = {}
+
+        def walk(value: Any, key: str = "") -> None:
+            if isinstance(value, Mapping):
+                for name, item in value.items():
+                    walk(item, str(name))
+            elif isinstance(value, list):
+                if key and len(value) > 1:
+                    size, length = sizes.get(key, (0, 0))
+                    sizes[key] = (size + len(_dumps(value)), max(length, len(value)))
+                for item in value:
+                    walk(item, key)
+
+        walk(compacted)
+        if not sizes:
+            return False
+        key = max(sizes, key=lambda name: sizes[name][0])
+        limits[key] = max(1, sizes[key][1] // 2)
+        return True
+
+
+@lru_cache(maxsize=1)
+def get_context_compactor() -> ContextCompactor:
+    """Process-wide compactor shared by agents (stats aggregate across the pipeline)."""
+    return ContextCompactor()
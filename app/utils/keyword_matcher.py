@@ -0,0 +1,132 @@
+"""Compiled multi-pattern keyword matcher for risk signal extraction.
+
+All keywords of all categories are folded into one trie-shaped regular
+expression (longest keyword first at every position), so a document is scanned
+once no matter how many categories or terms are configured. Each match also
+implies every keyword it contains (``"환불"`` inside ``"환불요청"``, ``"fraud"``
+inside ``"fraudulent"``), and the few keywords that could start inside a match
+and run past its end are checked directly. The result is exactly the set of
+keywords for which ``keyword in text`` holds.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Sequence, Set, Tuple
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation factored by shared prefixes; greedy, so the longest keyword wins."""
+    trie: Dict[str, dict] = {}
+    for word in keywords:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Substring matcher over ``{category: keywords}``; matching is case-insensitive."""
+
+    def __init__(self, categories: Mapping[str, Iterable[str]]):
+        self.categories: Dict[str, Tuple[str, ...]] = {}
+        self._compile(categories)
+
+    def _compile(self, categories: Mapping[str, Iterable[str]]) -> None:
+        merged: Dict[str, Tuple[str, ...]] = {}
+        for label, words in categories.items():
+            normalized = [word.lower() for word in words if word]
+            merged[label] = tuple(dict.fromkeys(merged.get(label, ()) + tuple(normalized)))
+        self.categories = merged
+        owners: Dict[str, Set[str]] = {}
+        for label, words in merged.items():
+            for word in words:
+                owners.setdefault(word, set()).add(label)
+        self._owners = {word: frozenset(labels) for word, labels in owners.items()}
+        keywords = sorted(owners, key=lambda word: (-len(word), word))
+        # Every keyword occurring inside each keyword (itself included).
+        self._implied: Dict[str, Tuple[str, ...]] = {
+            word: tuple(other for other in keywords if other in word) for word in keywords
+        }
+        # Keywords that may start inside a match of each keyword and run past its end.
+        self._crossing: Dict[str, Tuple[str, ...]] = {}
+        for word in keywords:
+            crossing = tuple(
+                other
+                for other in keywords
+                if any(
+                    other.startswith(word[start:]) and len(other) > len(word) - start
+                    for start in range(1, len(word))
+                )
+            )
+            if crossing:
+                self._crossing[word] = crossing
+        self._pattern = re.compile(_trie_pattern(keywords)) if keywords else None
+
+    def extend(self, categories: Mapping[str, Iterable[str]]) -> "KeywordMatcher":
+        """Add keywords (e.g. Korean terms) to new or existing categories and recompile."""
+        self._compile({**self.categories, **{
+            label: self.categories.get(label, ()) + tuple(words) for label, words in categories.items()
+        }})
+        return self
+
+    def scan(self, text: str | None) -> Dict[str, FrozenSet[str]]:
+        """``{category: matched keywords}`` for one document (categories without hits omitted)."""
+        return self.scan_batch([text])[0]
+
+    def scan_batch(self, texts: Sequence[str | None]) -> List[Dict[str, FrozenSet[str]]]:
+        """Scan many documents; each one is a single ``findall`` over the compiled pattern."""
+        if self._pattern is None:
+            return [{} for _ in texts]
+        findall, crossing = self._pattern.findall, self._crossing
+        results: List[Dict[str, FrozenSet[str]]] = []
+        for text in texts:
+            content = (text or "").lower()
+            words = set(findall(content))
+            for word in [word for word in words if word in crossing]:
+                words.update(other for other in crossing[word] if other in content)
+            found: Dict[str, Set[str]] = {}
+            for word in words:
+                for keyword in self._implied[word]:
+                    for label in self._owners[keyword]:
+                        found.setdefault(label, set()).add(keyword)
+            results.append({label: frozenset(hits) for label, hits in found.items()})
+        return results
+
+    def count(self, texts: Sequence[str | None]) -> Dict[str, int]:
+        """Number of documents that mention each category at least once."""
+        counts = {label: 0 for label in self.categories}
+        for found in self.scan_batch(texts):
+            for label in found:
+                counts[label] += 1
+        return counts
+
+
+SUSPICIOUS_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "refund": ("refund", "chargeback", "dispute"),
+    "decline": ("decline", "fraud", "blocked", "failed"),
+    "safety": ("injury", "incident", "hazard"),
+}
+SUSPICIOUS_KEYWORDS_KO: Dict[str, Tuple[str, ...]] = {
+    "refund": ("환불", "차지백", "분쟁"),
+    "decline": ("결제 거절", "승인 거절", "사기", "결제 실패", "차단"),
+    "safety": ("부상", "안전사고", "사고"),
+}
+
+
+@lru_cache(maxsize=1)
+def get_risk_keyword_matcher() -> KeywordMatcher:
+    """Shared matcher over the English and Korean risk keyword categories."""
+    return KeywordMatcher(SUSPICIOUS_KEYWORDS).extend(SUSPICIOUS_KEYWORDS_KO)
+
+
+__all__ = ["KeywordMatcher", "SUSPICIOUS_KEYWORDS", "SUSPICIOUS_KEYWORDS_KO", "get_risk_keyword_matcher"]
@@ -0,0 +1,196 @@
+"""Content-addressed LLM response cache: in-memory LRU + SQLite TTL tier + in-flight coalescing."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def canonical_json(value: Any) -> str:
+    """Stable JSON text for hashing: sorted keys, no whitespace, non-JSON values via ``str``."""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def response_key(
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    context: Optional[Dict[str, Any]] = None,
+    *,
+    source: str = "",
+) -> str:
+    """SHA-256 over source, model, system prompt, user prompt and the canonicalized context hash.
+
+    ``source`` names what produced the completion (endpoint URL or ``local:<backend>``), so
+    responses from a local or test backend never answer calls to a real provider.
+    """
+    context_hash = hashlib.sha256(canonical_json(context).encode("utf-8")).hexdigest() if context else ""
+    material = canonical_json([source, model, system_prompt, prompt, context_hash])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier cache for completions with duplicate-request coalescing.
+
+    Lookups hit a per-process LRU first, then the shared SQLite file (WAL mode, so
+    several workers and restarts reuse the same responses). Entries expire after
+    ``ttl_seconds`` in both tiers. ``get_or_compute`` lets exactly one caller run
+    the completion for a key while concurrent callers with the same key wait for
+    its result; failures are not cached.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        ttl_seconds: int = 86400,
+        max_entries: int = 256,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.path:
+            try:
+                self._connection().execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            except sqlite3.Error as err:
+                logger.warning("LLM response cache disk tier disabled (%s): %s", self.path, err)
+                self.path = None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, created_at REAL, expires_at REAL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        """Fresh in-memory entry for ``key``; caller holds ``_lock``."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        self.stats["memory_hits"] += 1
+        return entry[1]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            cached = self._memory_get(key, now)
+        if cached is not None:
+            return cached
+        if not self.path:
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error as err:
+            logger.warning("LLM response cache read failed: %s", err)
+            return None
+        if row is None:
+            return None
+        self._remember(key, row[0], row[1])
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        return row[0]
+
+    def set(self, key: str, response: str, *, model: str = "") -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, response, expires_at)
+        if not self.path:
+            return
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, expires_at),
+            )
+        except sqlite3.Error as err:
+            logger.warning("LLM response cache write failed: %s", err)
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], str], *, model: str = "") -> str:
+        """Cached response for ``key``; otherwise run ``compute`` once even under concurrent callers."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            # A concurrent owner may have stored the response and left _inflight since our miss.
+            cached = self._memory_get(key, time.time())
+            if cached is not None:
+                return cached
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return pending.result()
+        try:
+            response = compute()
+        except BaseException as err:
+            pending.set_exception(err)
+            raise
+        else:
+            self.set(key, response, model=model)
+            pending.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            self._connection().execute("DELETE FROM responses")
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide response cache configured from settings (``LCP_LLM_CACHE_*``)."""
+    settings = get_settings()
+    path = settings.llm_cache_path
+    if path and not Path(path).is_absolute():
+        path = PROJECT_ROOT / path
+    return LLMResponseCache(
+        path,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_entries=settings.llm_cache_max_entries,
+    )
@@ -1,47 +1,197 @@
-﻿"""LLM client abstraction with OpenAI support and stub fallback."""
+﻿"""LLM client abstraction with OpenAI or local backends and stub fallback."""
 import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 
+from app.utils.context_compactor import TokenCounter
+from app.utils.llm_cache import LLMResponseCache, canonical_json, response_key
+from app.utils.llm_limiter import LLMRateLimiter, get_llm_limiter
+from app.utils.local_llm import BatchingLLMServer
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+SYSTEM_PROMPT = "You are an analytics copilot for lifestyle commerce partners. Always answer in Korean."
+# Completion tokens reserved per call in the tokens/min budget until real usage is known.
+EXPECTED_COMPLETION_TOKENS = 512
+
 
 class LLMClient:
-    """Abstracts LLM interactions to allow stubbing or OpenAI-backed calls."""
+    """Abstracts LLM interactions to allow stubbing or OpenAI-backed calls.
+
+    Completions go through ``limiter`` (the process-wide ``LLMRateLimiter`` by default):
+    rate/concurrency admission, per-call timeout, retries with backoff and hedging. The
+    OpenAI SDK's own retries are disabled so the limiter's policy is the only one.
+    With a local ``backend`` (``BatchingLLMServer``) completions run in-process and
+    batched instead, without the remote limiter.
+    """
 
-    def __init__(self, endpoint: str | None = None, api_key: str | None = None, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        endpoint: str | None = None,
+        api_key: str | None = None,
+        model: str = "gpt-4o-mini",
+        *,
+        cache: LLMResponseCache | None = None,
+        limiter: LLMRateLimiter | None = None,
+        backend: BatchingLLMServer | None = None,
+    ):
         self.endpoint = endpoint
         self.api_key = api_key
         self.model = model
+        self.cache = cache
+        self.limiter = limiter or get_llm_limiter()
+        self.backend = backend
+        self._count_tokens = TokenCounter(model)
         self._client = None
         try:
             from openai import OpenAI  # type: ignore
 
-            if self.api_key:
-                self._client = OpenAI(api_key=self.api_key, base_url=self.endpoint)
+            if self.api_key and backend is None:
+                self._client = OpenAI(api_key=self.api_key, base_url=self.endpoint, max_retries=0)
         except ImportError:
-            logger.warning("openai package not installed; using stubbed LLM responses")
+            if backend is None:
+                logger.warning("openai package not installed; using stubbed LLM responses")
+
+    @property
+    def live(self) -> bool:
+        """True when completions come from a model (remote or local) rather than the stub."""
+        return self.backend is not None or bool(self._client and self.api_key)
 
     def generate(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
-        """Generate completion; falls back to stubbed string when OpenAI unavailable."""
-        if self._client and self.api_key:
+        """Generate completion; falls back to stubbed string when no model is available."""
+        if self.live:
             try:
-                user_content = prompt
-                if context:
-                    ctxt = json.dumps(context, ensure_ascii=False)
-                    user_content = f"{prompt}\n\nContext:\n{ctxt}"
-                resp = self._client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are an analytics copilot for lifestyle commerce partners. Always answer in Korean."},
-                        {"role": "user", "content": user_content},
-                    ],
-                    temperature=0.2,
-                )
-                return resp.choices[0].message.content or ""
+                if self.cache is None:
+                    return self._complete(prompt, context)
+                key = self._cache_key(prompt, context)
+                return self.cache.get_or_compute(key, lambda: self._complete(prompt, context), model=self.model)
             except Exception as err:  # pragma: no cover - network/keys/runtime dependent
                 logger.warning("LLM call failed, falling back to stub: %s", err)
+        return self._stub(prompt, context)
+
+    def generate_json(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        schema: Dict[str, Any],
+        *,
+        name: str = "response",
+    ) -> Optional[Dict[str, Any]]:
+        """One completion constrained to a JSON ``schema`` (structured outputs).
+
+        Returns ``None`` when no LLM is configured, the call fails or the output is not a
+        JSON object; unparseable outputs are never cached.
+        """
+        if not self.live:
+            return None
+        response_format = {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+        def complete() -> str:
+            text = self._complete(prompt, context, response_format=response_format)
+            if not isinstance(json.loads(text), dict):
+                raise ValueError("structured output is not a JSON object")
+            return text
+
+        try:
+            if self.cache is None:
+                return json.loads(complete())
+            key = self._cache_key(f"{prompt}\n{canonical_json(response_format)}", context)
+            return json.loads(self.cache.get_or_compute(key, complete, model=self.model))
+        except Exception as err:  # pragma: no cover - network/keys/runtime dependent
+            logger.warning("Structured LLM call failed: %s", err)
+            return None
+
+    def generate_stream(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yield the completion as text deltas; cached or stubbed responses arrive as one chunk.
+
+        A streamed completion is written to the response cache once it finishes, so later
+        ``generate``/``generate_stream`` calls with the same key are served from the cache.
+        """
+        if not self.live:
+            yield self._stub(prompt, context)
+            return
+        if self.backend is not None:
+            # Local backends decode in batches and return whole completions.
+            yield self.generate(prompt, context)
+            return
+        key = self._cache_key(prompt, context) if self.cache is not None else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        messages = self._messages(prompt, context)
+        estimate = self._estimate_tokens(messages)
+        try:
+            with self.limiter.slot(estimate):
+                stream = self.limiter.with_retries(
+                    lambda: self._client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=0.2,
+                        stream=True,
+                        timeout=self.limiter.timeout,
+                    )
+                )
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+        except Exception as err:  # pragma: no cover - network/keys/runtime dependent
+            logger.warning("LLM stream failed%s: %s", "" if parts else ", falling back to stub", err)
+            if not parts:
+                yield self._stub(prompt, context)
+            return
+        if key:
+            self.cache.set(key, "".join(parts), model=self.model)
+
+    @property
+    def source(self) -> str:
+        """Where completions come from; part of every response-cache key."""
+        if self.backend is not None:
+            return f"local:{self.backend.backend.name}"
+        return self.endpoint or "openai"
+
+    def _cache_key(self, prompt: str, context: Optional[Dict[str, Any]]) -> str:
+        return response_key(self.model, SYSTEM_PROMPT, prompt, context, source=self.source)
+
+    @staticmethod
+    def _stub(prompt: str, context: Optional[Dict[str, Any]]) -> str:
         context_info = f" context={context}" if context else ""
         return f"[LLM 스텁 응답] 요청을 처리했고 한국어 응답을 생성했습니다. prompt='{prompt[:50]}...' {context_info}"
+
+    @staticmethod
+    def _messages(prompt: str, context: Optional[Dict[str, Any]]) -> list:
+        user_content = prompt
+        if context:
+            ctxt = json.dumps(context, ensure_ascii=False)
+            user_content = f"{prompt}\n\nContext:\n{ctxt}"
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_content},
+        ]
+
+    def _estimate_tokens(self, messages: list) -> int:
+        return sum(self._count_tokens(message["content"]) for message in messages) + EXPECTED_COMPLETION_TOKENS
+
+    def _complete(self, prompt: str, context: Optional[Dict[str, Any]], **options: Any) -> str:
+        messages = self._messages(prompt, context)
+        if self.backend is not None:
+            return self.backend.generate(messages, **options)
+        estimate = self._estimate_tokens(messages)
+        resp = self.limiter.call(
+            lambda: self._client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.2,
+                timeout=self.limiter.timeout,
+                **options,
+            ),
+            tokens=estimate,
+        )
+        usage = getattr(resp, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None):
+            self.limiter.settle(estimate, usage.total_tokens)
+        return resp.choices[0].message.content or ""
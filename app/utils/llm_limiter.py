@@ -0,0 +1,312 @@
+"""Process-wide admission control for LLM calls: rate limits, concurrency, retries and hedging."""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+from app.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+RETRYABLE_ERRORS = frozenset({"APITimeoutError", "APIConnectionError", "Timeout", "ConnectError", "ReadTimeout"})
+
+
+class LLMQueueTimeout(TimeoutError):
+    """Raised when a call waits longer than ``acquire_timeout`` for a slot or rate budget."""
+
+
+class _Saturated(RuntimeError):
+    """No free slot/budget for a hedged duplicate; the primary keeps running alone."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute / 60`` units per second.
+
+    ``per_minute <= 0`` disables the bucket. ``settle`` charges (or refunds) the difference
+    between the estimate taken up front and the actual usage, so the level may go negative.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.per_minute = per_minute
+        self.capacity = float(burst or per_minute)
+        self.level = self.capacity
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0, deadline: Optional[float] = None) -> bool:
+        if self.per_minute <= 0:
+            return True
+        amount = min(amount, self.capacity)
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.level >= amount:
+                    self.level -= amount
+                    return True
+                delay = (amount - self.level) / self._rate
+                if deadline is not None:
+                    if now >= deadline:
+                        return False
+                    delay = min(delay, deadline - now)
+                self._condition.wait(delay)
+
+    def settle(self, delta: float) -> None:
+        if self.per_minute <= 0 or not delta:
+            return
+        with self._condition:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level - delta)
+            self._condition.notify_all()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for throttling, 5xx, timeouts and connection errors."""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def status_of(err: BaseException) -> Optional[int]:
+        status = getattr(err, "status_code", None)
+        if status is None:
+            status = getattr(getattr(err, "response", None), "status_code", None)
+        return status if isinstance(status, int) else None
+
+    def retryable(self, err: BaseException) -> bool:
+        if isinstance(err, LLMQueueTimeout):
+            return False  # already waited acquire_timeout; retrying would multiply it
+        status = self.status_of(err)
+        if status is not None:
+            return status in RETRYABLE_STATUS or status >= 500
+        return isinstance(err, (TimeoutError, ConnectionError)) or type(err).__name__ in RETRYABLE_ERRORS
+
+    def delay(self, attempt: int, err: BaseException) -> Optional[float]:
+        """Seconds to sleep before retry ``attempt + 1``; ``None`` when the error is final."""
+        if attempt >= self.max_retries or not self.retryable(err):
+            return None
+        backoff = random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        headers = getattr(getattr(err, "response", None), "headers", None) or {}
+        try:
+            retry_after = float(headers.get("retry-after", 0) or 0)
+        except (TypeError, ValueError):
+            retry_after = 0.0
+        return min(max(backoff, retry_after), self.max_delay)
+
+
+class LLMRateLimiter:
+    """Requests/min and tokens/min buckets, a concurrency cap, retries and hedged requests.
+
+    ``call`` is the full policy for a blocking completion: wait for a slot and rate budget
+    (queue wait is recorded), run the call, retry retryable failures with backoff, and when
+    ``hedge_after`` is set and the call is still running after that many seconds, start one
+    duplicate and return whichever finishes first. Streams use ``slot`` + ``with_retries``
+    directly so the slot is held for the whole stream.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = 30.0,
+        acquire_timeout: Optional[float] = 60.0,
+        hedge_after: Optional[float] = None,
+        retry: RetryPolicy | None = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self.hedge_after = hedge_after or None
+        self.retry = retry or RetryPolicy()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=1024)
+        self._counters: Dict[str, int] = {
+            "calls": 0,
+            "in_flight": 0,
+            "retries": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "timeouts": 0,
+            "queue_timeouts": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "failures": 0,
+        }
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += delta
+
+    def _acquire(self, tokens: int, *, blocking: bool = True) -> float:
+        """Take a concurrency slot plus rate budget; returns the queue wait in seconds."""
+        started = time.monotonic()
+        if blocking:
+            deadline = started + self.acquire_timeout if self.acquire_timeout else None
+            acquired = self._slots.acquire(timeout=self.acquire_timeout)
+        else:
+            deadline = started
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise self._rejected(blocking, "concurrency slot")
+        if not (self.requests.acquire(1, deadline) and self.tokens.acquire(tokens, deadline)):
+            self._slots.release()
+            raise self._rejected(blocking, "rate budget")
+        waited = time.monotonic() - started
+        with self._lock:
+            if blocking:
+                self._waits.append(waited)
+            self._counters["calls"] += 1
+            self._counters["in_flight"] += 1
+        return waited
+
+    def _rejected(self, blocking: bool, what: str) -> Exception:
+        if not blocking:
+            return _Saturated(what)
+        self._count("queue_timeouts")
+        return LLMQueueTimeout(f"timed out waiting for LLM {what}")
+
+    def _release(self) -> None:
+        self._count("in_flight", -1)
+        self._slots.release()
+
+    @contextmanager
+    def slot(self, tokens: int = 0) -> Iterator[float]:
+        """Hold one concurrency slot plus request/token budget; yields the queue wait in seconds."""
+        waited = self._acquire(tokens)
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        self.tokens.settle(actual_tokens - estimated_tokens)
+
+    def with_retries(self, fn: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as err:
+                self._classify(err)
+                delay = self.retry.delay(attempt, err)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                logger.info("LLM call failed (%s); retry %d in %.2fs", err, attempt + 1, delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def _classify(self, err: BaseException) -> None:
+        status = self.retry.status_of(err)
+        if status == 429:
+            self._count("throttled")
+        elif status is not None and status >= 500:
+            self._count("server_errors")
+        elif isinstance(err, TimeoutError) or "Timeout" in type(err).__name__:
+            self._count("timeouts")
+
+    def call(self, fn: Callable[[], T], *, tokens: int = 0, hedge: bool = True) -> T:
+        """Run ``fn`` under the limiter with retries and (optionally) a hedged duplicate."""
+        return self.with_retries(lambda: self._attempt(fn, tokens, hedge))
+
+    def _attempt(self, fn: Callable[[], T], tokens: int, hedge: bool) -> T:
+        if not (hedge and self.hedge_after):
+            with self.slot(tokens):
+                return fn()
+        # The hedge timer starts once the primary is admitted: queue wait is not tail latency.
+        self._acquire(tokens)
+        primary = self._executor().submit(fn)
+        primary.add_done_callback(lambda _: self._release())
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        backup = self._executor().submit(self._backup, fn, tokens)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    return future.result()
+        # Both failed (or the hedge found no free slot): surface the primary's error.
+        return primary.result()
+
+    def _backup(self, fn: Callable[[], T], tokens: int) -> T:
+        """Hedged duplicate; runs only if a slot and budget are free right now (it never queues)."""
+        self._acquire(tokens, blocking=False)
+        self._count("hedges")
+        try:
+            return fn()
+        finally:
+            self._release()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency * 2, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            counters = dict(self._counters)
+
+        def percentile(fraction: float) -> float:
+            return round(waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000, 2) if waits else 0.0
+
+        return {
+            **counters,
+            "queue_wait_ms": {
+                "samples": len(waits),
+                "avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(waits[-1] * 1000, 2) if waits else 0.0,
+            },
+            "limits": {
+                "requests_per_minute": self.requests.per_minute,
+                "tokens_per_minute": self.tokens.per_minute,
+                "max_concurrency": self.max_concurrency,
+                "hedge_after": self.hedge_after,
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def get_llm_limiter() -> LLMRateLimiter:
+    """Process-wide limiter configured from settings (``LCP_LLM_*``)."""
+    settings = get_settings()
+    return LLMRateLimiter(
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        max_concurrency=settings.llm_max_concurrency,
+        timeout=settings.llm_timeout_seconds,
+        hedge_after=settings.llm_hedge_after_seconds,
+        retry=RetryPolicy(max_retries=settings.llm_max_retries),
+    )
@@ -0,0 +1,249 @@
+"""Local, network-free LLM backends with request batching.
+
+``LLMClient(backend=...)`` sends completions here instead of the OpenAI endpoint.
+``BatchingLLMServer`` queues requests from concurrent callers and hands them to the
+backend in batches of up to ``max_batch_size`` (waiting at most ``max_wait_ms`` for a
+batch to fill), the way llama.cpp/vLLM servers decode several sequences per step.
+
+``TemplateBackend`` is the CPU-only model: it writes a deterministic Korean answer from
+the prompt and the scalar facts in the context, and charges a simulated cost shaped like
+real inference (prefill proportional to prompt tokens, then one decode step per output
+token shared by the whole batch), so throughput and batch tuning can be measured
+offline. ``LlamaCppBackend`` runs a GGUF model when ``llama-cpp-python`` is installed.
+A llama.cpp or vLLM *server* needs no backend: point ``LCP_LLM_ENDPOINT`` at its
+OpenAI-compatible ``/v1`` URL.
+"""
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from app.config import get_settings
+from app.utils.context_compactor import TokenCounter
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+try:  # pragma: no cover - optional dependency
+    from llama_cpp import Llama  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    Llama = None
+
+
+@dataclass
+class LocalRequest:
+    """One chat completion queued for a local backend."""
+
+    messages: List[Dict[str, str]]
+    response_format: Optional[Dict[str, Any]] = None
+    max_tokens: int = 256
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class LocalLLMBackend:
+    """Interface for local models: complete a batch of chat requests in one call."""
+
+    name = "local"
+
+    def generate_batch(self, requests: Sequence[LocalRequest]) -> List[str]:
+        raise NotImplementedError
+
+
+def _facts(value: Any, prefix: str = "", limit: int = 6) -> List[str]:
+    """First ``limit`` scalar ``path=value`` pairs of a JSON context, depth first."""
+    facts: List[str] = []
+
+    def walk(item: Any, path: str) -> None:
+        if len(facts) >= limit:
+            return
+        if isinstance(item, Mapping):
+            for key, child in item.items():
+                walk(child, f"{path}.{key}" if path else str(key))
+        elif isinstance(item, list):
+            for child in item[:2]:
+                walk(child, path)
+        elif isinstance(item, (int, float)) and not isinstance(item, bool):
+            facts.append(f"{path}={round(item, 3)}")
+        elif isinstance(item, str) and item and len(item) <= 40:
+            facts.append(f"{path}={item}")
+
+    walk(value, prefix)
+    return facts
+
+
+class TemplateBackend(LocalLLMBackend):
+    """Deterministic template "model" with an inference-shaped cost model.
+
+    A batch costs ``prefill_ms_per_token`` x prompt tokens (summed over the batch) plus
+    ``decode_ms_per_step`` x the longest output in tokens: sequences decode in lockstep,
+    so batching amortizes the decode steps exactly as on a GPU/CPU inference server.
+    Set both costs to 0 for instant responses.
+    """
+
+    name = "template"
+
+    def __init__(self, *, prefill_ms_per_token: float = 0.02, decode_ms_per_step: float = 4.0, max_batch_size: int = 16):
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.decode_ms_per_step = decode_ms_per_step
+        self.max_batch_size = max_batch_size
+        self.count_tokens = TokenCounter()
+
+    def generate_batch(self, requests: Sequence[LocalRequest]) -> List[str]:
+        outputs = [self._render(request) for request in requests]
+        prompt_tokens = sum(self.count_tokens(message["content"]) for request in requests for message in request.messages)
+        steps = max((min(self.count_tokens(text), request.max_tokens) for text, request in zip(outputs, requests)), default=0)
+        cost = prompt_tokens * self.prefill_ms_per_token + steps * self.decode_ms_per_step
+        if cost > 0:
+            time.sleep(cost / 1000)
+        return outputs
+
+    def _render(self, request: LocalRequest) -> str:
+        content = request.messages[-1]["content"]
+        prompt, _, raw_context = content.partition("\n\nContext:\n")
+        try:
+            context = json.loads(raw_context) if raw_context else {}
+        except ValueError:
+            context = {}
+        facts = ", ".join(_facts(context)) or "추가 컨텍스트 없음"
+        instruction = prompt.strip().splitlines()[0][:80] if prompt.strip() else ""
+        text = f"[로컬 {self.name} 응답] {instruction} — 근거: {facts}."
+        schema = ((request.response_format or {}).get("json_schema") or {}).get("schema")
+        if schema:
+            properties = schema.get("properties", {})
+            return json.dumps({name: f"{text} ({name})" for name in properties}, ensure_ascii=False)
+        return text
+
+
+class LlamaCppBackend(LocalLLMBackend):
+    """GGUF model through ``llama-cpp-python`` (sequential within a batch; one model per process)."""
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str, *, n_ctx: int = 4096, n_threads: Optional[int] = None):
+        if Llama is None:
+            raise RuntimeError("llama-cpp-python is not installed")
+        self.model = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        self.max_batch_size = 4
+
+    def generate_batch(self, requests: Sequence[LocalRequest]) -> List[str]:
+        outputs = []
+        for request in requests:
+            options: Dict[str, Any] = {"max_tokens": request.max_tokens, "temperature": 0.2}
+            schema = ((request.response_format or {}).get("json_schema") or {}).get("schema")
+            if schema:
+                options["response_format"] = {"type": "json_object", "schema": schema}
+            response = self.model.create_chat_completion(messages=request.messages, **options)
+            outputs.append(response["choices"][0]["message"]["content"] or "")
+        return outputs
+
+
+class BatchingLLMServer:
+    """Queues completions from any thread and runs them on ``backend`` in batches.
+
+    One worker thread takes the first queued request, keeps collecting until the batch
+    has ``max_batch_size`` requests or ``max_wait_ms`` elapsed, and resolves every
+    caller's future with its output. ``stats`` tracks batches, batch sizes and queue wait.
+    """
+
+    def __init__(self, backend: LocalLLMBackend, *, max_batch_size: Optional[int] = None, max_wait_ms: float = 10.0):
+        self.backend = backend
+        self.max_batch_size = max_batch_size or getattr(backend, "max_batch_size", 8)
+        self.max_wait_ms = max_wait_ms
+        self.stats: Dict[str, float] = {"requests": 0, "batches": 0, "max_batch": 0, "queue_wait_ms": 0.0, "failures": 0}
+        self._queue: "queue.Queue[tuple[LocalRequest, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._loop, name=f"local-llm-{backend.name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, request: LocalRequest) -> "Future[str]":
+        future: "Future[str]" = Future()
+        self._queue.put((request, future))
+        return future
+
+    def generate(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        response_format: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **_: Any,
+    ) -> str:
+        """Blocking completion for ``messages``; extra OpenAI-style options are ignored."""
+        return self.submit(LocalRequest(messages, response_format=response_format)).result(timeout)
+
+    def _collect(self) -> List[tuple[LocalRequest, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            requests = [request for request, _ in batch]
+            try:
+                outputs = self.backend.generate_batch(requests)
+            except Exception as err:  # pragma: no cover - backend dependent
+                logger.warning("Local LLM batch of %d failed: %s", len(batch), err)
+                with self._lock:
+                    self.stats["failures"] += 1
+                for _, future in batch:
+                    future.set_exception(err)
+                continue
+            with self._lock:
+                self.stats["requests"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                self.stats["queue_wait_ms"] += sum((started - request.enqueued_at) * 1000 for request in requests)
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        requests = stats["requests"] or 1
+        return {
+            "backend": self.backend.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "requests": int(stats["requests"]),
+            "batches": int(stats["batches"]),
+            "avg_batch": round(stats["requests"] / (stats["batches"] or 1), 2),
+            "max_batch": int(stats["max_batch"]),
+            "avg_queue_wait_ms": round(stats["queue_wait_ms"] / requests, 2),
+            "failures": int(stats["failures"]),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_local_llm() -> Optional[BatchingLLMServer]:
+    """Process-wide local server when ``LCP_LLM_BACKEND`` is ``template`` or ``llama_cpp``; else ``None``."""
+    settings = get_settings()
+    kind = (settings.llm_backend or "openai").lower()
+    if kind == "template":
+        backend: LocalLLMBackend = TemplateBackend()
+    elif kind == "llama_cpp":
+        if Llama is None or not settings.llm_local_model_path:
+            logger.warning("llama_cpp backend needs llama-cpp-python and LCP_LLM_LOCAL_MODEL_PATH; using template backend")
+            backend = TemplateBackend()
+        else:
+            backend = LlamaCppBackend(settings.llm_local_model_path)
+    else:
+        return None
+    return BatchingLLMServer(
+        backend,
+        max_batch_size=settings.llm_local_max_batch_size,
+        max_wait_ms=settings.llm_local_max_wait_ms,
+    )
@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional
+from typing import Iterable, Iterator, List, Optional, Sequence
 
 import yaml
 
@@ -19,15 +20,37 @@ class ConfigError(RuntimeError):
     """Raised when a configuration file is missing or malformed."""
 
 
+def _is_pattern(entry: str) -> bool:
+    return any(char in entry for char in "*?[")
+
+
+def _matches(relative_path: str, pattern: str) -> bool:
+    """``fnmatch`` on ontology-root relative paths where ``**/`` may also match no directory."""
+    return fnmatchcase(relative_path, pattern) or ("/**/" in pattern and fnmatchcase(relative_path, pattern.replace("/**/", "/")))
+
+
 @dataclass(frozen=True)
 class Layer:
     name: str
     description: str
     files: List[str]
     optional: bool = False
+    opt_in: bool = False
+    depends_on: List[str] = field(default_factory=list)
 
     def iter_files(self) -> Iterator[str]:
-        yield from self.files
+        """Layer files in declaration order; glob entries (``raw/FND/**/*.rdf``) expand sorted."""
+        for entry in self.files:
+            if _is_pattern(entry):
+                yield from sorted(
+                    path.relative_to(ONTOLOGY_ROOT).as_posix() for path in ONTOLOGY_ROOT.glob(entry) if path.is_file()
+                )
+            else:
+                yield entry
+
+    def is_affected_by(self, relative_path: str) -> bool:
+        """True if the layer loads ``relative_path`` (ontology-root relative), including files since removed."""
+        return any(relative_path == entry or (_is_pattern(entry) and _matches(relative_path, entry)) for entry in self.files)
 
 
 @dataclass(frozen=True)
@@ -67,23 +90,91 @@ def load_graphdb_layers(config_path: Optional[Path] = None) -> List[Layer]:
                 description=raw.get("description", ""),
                 files=[str(f) for f in files],
                 optional=bool(raw.get("optional", False)),
+                opt_in=bool(raw.get("opt_in", False)),
+                depends_on=[str(dep) for dep in raw.get("depends_on") or []],
             )
         )
+    for layer in results:
+        unknown = [dep for dep in layer.depends_on if dep not in seen]
+        if unknown:
+            raise ConfigError(f"Layer '{layer.name}' depends on unknown layers {unknown}")
     return results
 
 
+def select_layers(
+    *,
+    include_optional: bool = True,
+    only_layers: Optional[Iterable[str]] = None,
+    config_path: Optional[Path] = None,
+) -> List[Layer]:
+    """Layers in declaration order; ``opt_in`` layers are selected only when named in ``only_layers``."""
+    selected = {name for name in only_layers} if only_layers else None
+    return [
+        layer
+        for layer in load_graphdb_layers(config_path)
+        if (layer.name in selected if selected else not layer.opt_in) and (include_optional or not layer.optional)
+    ]
+
+
+def layer_waves(layers: Sequence[Layer]) -> List[List[Layer]]:
+    """Group layers into waves; layers in one wave have no dependencies on each other.
+
+    Dependencies on layers outside ``layers`` are treated as already satisfied.
+    """
+    names = {layer.name for layer in layers}
+    remaining = list(layers)
+    done: set[str] = set()
+    waves: List[List[Layer]] = []
+    while remaining:
+        wave = [
+            layer
+            for layer in remaining
+            if all(dep in done or dep not in names for dep in layer.depends_on)
+        ]
+        if not wave:
+            raise ConfigError(f"Dependency cycle between layers {[layer.name for layer in remaining]}")
+        waves.append(wave)
+        done.update(layer.name for layer in wave)
+        remaining = [layer for layer in remaining if layer.name not in done]
+    return waves
+
+
+def affected_layers(changed_paths: Iterable[str], layers: Sequence[Layer]) -> List[Layer]:
+    """Layers touched by ``changed_paths`` plus every layer that (transitively) depends on them."""
+    paths = list(changed_paths)
+    hit = {layer.name for layer in layers if any(layer.is_affected_by(path) for path in paths)}
+    grew = True
+    while grew:
+        dependents = {layer.name for layer in layers if hit.intersection(layer.depends_on)} - hit
+        grew = bool(dependents)
+        hit |= dependents
+    return [layer for layer in layers if layer.name in hit]
+
+
+def changed_layer_names(
+    change_list: dict,
+    *,
+    include_optional: bool = True,
+    only_layers: Optional[Iterable[str]] = None,
+    config_path: Optional[Path] = None,
+) -> List[str]:
+    """Names of the layers a loader must reload for a sync change list, among ``select_layers``."""
+    layers = select_layers(include_optional=include_optional, only_layers=only_layers, config_path=config_path)
+    paths = list(change_list.get("changed", [])) + list(change_list.get("removed", []))
+    return [layer.name for layer in affected_layers(paths, layers)]
+
+
 def iter_layer_files(
     *,
     include_optional: bool = True,
     only_layers: Optional[Iterable[str]] = None,
     config_path: Optional[Path] = None,
 ) -> Iterator[str]:
-    selected = {name for name in only_layers} if only_layers else None
-    for layer in load_graphdb_layers(config_path):
-        if selected and layer.name not in selected:
-            continue
-        if layer.optional and not include_optional:
-            continue
+    for layer in select_layers(
+        include_optional=include_optional,
+        only_layers=only_layers,
+        config_path=config_path,
+    ):
         yield from layer.iter_files()
 
 
@@ -129,8 +220,12 @@ __all__ = [
     "REPO_ROOT",
     "Layer",
     "SyncModule",
+    "affected_layers",
+    "changed_layer_names",
     "iter_layer_files",
+    "layer_waves",
     "load_graphdb_layers",
     "load_sync_modules",
     "resolve_ontology_path",
+    "select_layers",
 ]
@@ -4,9 +4,13 @@ from __future__ import annotations
 import argparse
 import os
 import sys
+import tempfile
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import httpx
 
@@ -16,23 +20,75 @@ if __name__ == "__main__" and __package__ is None:
 from data.ontology.pipelines import rdflib_loader  # type: ignore  # pylint:disable=import-error
 from data.ontology.pipelines.config_loader import (  # type: ignore  # pylint:disable=import-error
     ConfigError,
+    PIPELINES_DIR,
+    Layer,
+    changed_layer_names,
     iter_layer_files,
+    layer_waves,
     resolve_ontology_path,
+    select_layers,
+)
+from data.ontology.pipelines.manifest import (  # type: ignore  # pylint:disable=import-error
+    DEFAULT_CHANGES_PATH,
+    ChecksumManifest,
+    file_sha256,
+    read_change_list,
 )
 
 DEFAULT_ENDPOINT = os.environ.get("GRAPHDB_ENDPOINT")
 DEFAULT_REPOSITORY = os.environ.get("GRAPHDB_REPOSITORY")
+DEFAULT_MANIFEST = PIPELINES_DIR / ".graphdb_seed_manifest.json"
+STREAM_CHUNK_SIZE = 1 << 20
+CONTENT_TYPES = {
+    ".ttl": "application/x-turtle",
+    ".nt": "application/n-triples",
+    ".rdf": "application/rdf+xml",
+    ".owl": "application/rdf+xml",
+}
+
+
+@dataclass
+class FileResult:
+    layer: str
+    path: Path
+    triples: Optional[int] = None
+    seconds: float = 0.0
+    skipped: bool = False
+    finished_at: float = 0.0
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Seed GraphDB with LOP ontology")
     parser.add_argument("--endpoint", default=DEFAULT_ENDPOINT, help="GraphDB endpoint base URL")
     parser.add_argument("--repository", default=DEFAULT_REPOSITORY, help="Repository ID")
-    parser.add_argument("--layers", nargs="*", help="Subset of layers to load")
+    parser.add_argument("--layers", nargs="*", help="Subset of layers to load (opt-in layers such as fibo load only when named)")
     parser.add_argument("--skip-optional", action="store_true", help="Skip optional datasets layer")
-    parser.add_argument("--validate", action="store_true", help="Run rdflib validation before POSTing")
+    parser.add_argument("--validate", action="store_true", help="Run rdflib validation before POSTing (also reports per-file triple counts)")
     parser.add_argument("--dry-run", action="store_true", help="Print actions without uploading")
     parser.add_argument("--delay", type=float, default=0.0, help="Delay between requests")
+    parser.add_argument("--parallel", type=int, default=1, help="Max concurrent uploads within a layer wave")
+    parser.add_argument("--gzip", action="store_true", help="gzip request bodies (Content-Encoding: gzip)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request read timeout in seconds")
+    parser.add_argument(
+        "--split-mb",
+        type=float,
+        default=64.0,
+        help="Split files larger than this into N-Triples chunks (blank-node triples go in one final request)",
+    )
+    parser.add_argument("--chunk-triples", type=int, default=200_000, help="Triples per N-Triples chunk when splitting")
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=DEFAULT_MANIFEST,
+        help="Checksum manifest path; it records successful POSTs only and is not checked against the repository",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Upload even if the manifest says the file is loaded (needed after the repository was cleared or replaced)",
+    )
+    parser.add_argument("--changed-only", action="store_true", help="Only reload layers affected by the last FIBO sync")
+    parser.add_argument("--changes", type=Path, default=DEFAULT_CHANGES_PATH, help="Change list written by sync_fibo_modules.py")
     return parser.parse_args()
 
 
@@ -55,36 +111,188 @@ def collect_files(args: argparse.Namespace) -> List[Path]:
     return files
 
 
-def post_file(client: httpx.Client, url: str, ttl_path: Path, dry_run: bool) -> None:
-    if dry_run:
-        print(f"[DRY-RUN] Would POST {ttl_path} -> {url}")
-        return
-    response = client.post(
-        url,
-        headers={"Content-Type": "application/x-turtle"},
-        content=ttl_path.read_bytes(),
-        timeout=60.0,
-    )
+def _iter_file(path: Path) -> Iterator[bytes]:
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(STREAM_CHUNK_SIZE), b""):
+            yield chunk
+
+
+def _gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _iter_ntriples_chunks(path: Path, chunk_triples: int) -> Iterator[Tuple[Iterator[bytes], int]]:
+    """Stream a large file as N-Triples request bodies of ``chunk_triples`` lines.
+
+    Non N-Triples input is converted once to an on-disk N-Triples cache file; only
+    one chunk is held in memory while uploading. Blank-node labels are scoped to a
+    single request, so every triple mentioning a blank node is spooled to a
+    temporary file and sent last as one streamed body, keeping each blank node one node.
+    """
+    lines: List[bytes] = []
+    with tempfile.TemporaryFile() as spool:
+        spooled = 0
+        with rdflib_loader.cached_ntriples(path).open("rb") as handle:
+            for line in handle:
+                if not line.strip() or line.lstrip().startswith(b"#"):
+                    continue
+                if b"_:" in line:  # may also match inside a literal; that triple just travels with the blank nodes
+                    spool.write(line)
+                    spooled += 1
+                    continue
+                lines.append(line)
+                if len(lines) >= chunk_triples:
+                    yield iter([b"".join(lines)]), len(lines)
+                    lines = []
+        if lines:
+            yield iter([b"".join(lines)]), len(lines)
+        if spooled:
+            spool.seek(0)
+            yield iter(lambda: spool.read(STREAM_CHUNK_SIZE), b""), spooled
+
+
+def repository_size(client: httpx.Client, endpoint: str, repository: str) -> Optional[int]:
+    """Statement count reported by GraphDB; ``None`` when the endpoint does not answer."""
+    try:
+        response = client.get(endpoint.rstrip("/") + f"/repositories/{repository}/size")
+        response.raise_for_status()
+        return int(response.text.strip())
+    except (httpx.HTTPError, ValueError) as exc:
+        print(f"[WARN] Could not read repository size: {exc}")
+        return None
+
+
+def _post(client: httpx.Client, url: str, body: Iterator[bytes], content_type: str, use_gzip: bool) -> None:
+    headers = {"Content-Type": content_type}
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        body = _gzip_stream(body)
+    response = client.post(url, headers=headers, content=body)
     response.raise_for_status()
-    print(f"[INFO] Loaded {ttl_path.name}")
+
+
+def post_file(
+    client: httpx.Client,
+    url: str,
+    layer: Layer,
+    ttl_path: Path,
+    args: argparse.Namespace,
+    manifest: ChecksumManifest,
+) -> FileResult:
+    key = str(ttl_path.relative_to(resolve_ontology_path(".")))
+    result = FileResult(layer=layer.name, path=ttl_path)
+    digest = file_sha256(ttl_path)
+    if not args.force and manifest.is_current(key, digest):
+        result.skipped = True
+        print(f"[SKIP] {key} unchanged since last load")
+        return result
+    size_mb = ttl_path.stat().st_size / (1 << 20)
+    split = size_mb > args.split_mb
+    if args.dry_run:
+        mode = "split N-Triples" if split else "stream"
+        print(f"[DRY-RUN] Would POST {ttl_path} -> {url} ({mode}, {size_mb:.1f} MB)")
+        return result
+    started = time.perf_counter()
+    if split:
+        result.triples = 0
+        for idx, (body, count) in enumerate(_iter_ntriples_chunks(ttl_path, args.chunk_triples), start=1):
+            _post(client, url, body, CONTENT_TYPES[".nt"], args.gzip)
+            result.triples += count
+            print(f"[INFO] {ttl_path.name} chunk {idx} ({count} triples)")
+    else:
+        content_type = CONTENT_TYPES.get(ttl_path.suffix.lower(), CONTENT_TYPES[".ttl"])
+        _post(client, url, _iter_file(ttl_path), content_type, args.gzip)
+        if args.validate:
+            # Served from the parse cache --validate just filled; without it nothing is re-parsed.
+            result.triples = rdflib_loader.count_triples(ttl_path)
+    result.finished_at = time.perf_counter()
+    result.seconds = result.finished_at - started
+    manifest.record(key, digest, triples=result.triples, layer=layer.name)
+    counted = f"{result.triples} triples, " if result.triples is not None else ""
+    print(f"[INFO] Loaded {ttl_path.name} ({counted}{result.seconds:.2f}s)")
+    if args.delay:
+        time.sleep(args.delay)
+    return result
+
+
+def report_layers(results: List[FileResult], layer_seconds: Dict[str, float]) -> None:
+    per_layer: Dict[str, List[FileResult]] = {}
+    for item in results:
+        per_layer.setdefault(item.layer, []).append(item)
+    for name, items in per_layer.items():
+        loaded = [item for item in items if not item.skipped]
+        counts = [item.triples for item in loaded]
+        triples = f", {sum(counts)} triples" if counts and None not in counts else ""
+        print(
+            f"[STATS] {name}: {len(loaded)} loaded, {len(items) - len(loaded)} skipped{triples} "
+            f"in {layer_seconds.get(name, 0.0):.2f}s"
+        )
+
+
+def report_wave(layers: List[Layer], before: Optional[int], after: Optional[int], seconds: float) -> None:
+    """Statements GraphDB gained during one wave (duplicates of existing statements are not counted)."""
+    if before is None or after is None:
+        return
+    added = after - before
+    rate = added / seconds if seconds else 0.0
+    names = ", ".join(layer.name for layer in layers)
+    print(f"[STATS] wave [{names}]: +{added} statements ({after} total) in {seconds:.2f}s ({rate:,.0f} statements/s)")
 
 
 def main() -> None:
     args = parse_args()
     if not args.endpoint or not args.repository:
         raise ConfigError("endpoint and repository must be provided")
+    if args.changed_only:
+        changes = read_change_list(args.changes)
+        if changes["removed"]:
+            print(f"[WARN] {len(changes['removed'])} removed files keep their triples until a full reload")
+        args.layers = changed_layer_names(changes, include_optional=not args.skip_optional, only_layers=args.layers)
+        if not args.layers:
+            print("[INFO] No layers affected by the last sync")
+            return
+        args.force = True
     files = collect_files(args)
 
     if args.validate:
         relatives = [str(path.relative_to(resolve_ontology_path("."))) for path in files]
         rdflib_loader.load_graph(relatives)
 
+    layers = select_layers(include_optional=not args.skip_optional, only_layers=args.layers)
     base_url = args.endpoint.rstrip("/") + f"/repositories/{args.repository}/statements"
-    with httpx.Client() as client:
-        for ttl_path in files:
-            post_file(client, base_url, ttl_path, args.dry_run)
-            if args.delay:
-                time.sleep(args.delay)
+    manifest = ChecksumManifest(args.manifest, scope=f"{args.endpoint.rstrip('/')}|{args.repository}")
+    results: List[FileResult] = []
+    layer_seconds: Dict[str, float] = {}
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    try:
+        with httpx.Client(timeout=timeout) as client, ThreadPoolExecutor(max_workers=max(args.parallel, 1)) as pool:
+            size_before = None if args.dry_run else repository_size(client, args.endpoint, args.repository)
+            for wave in layer_waves(layers):
+                futures = []
+                for layer in wave:
+                    for rel in layer.iter_files():
+                        path = resolve_ontology_path(rel)
+                        if path.exists():
+                            futures.append(pool.submit(post_file, client, base_url, layer, path, args, manifest))
+                wave_started = time.perf_counter()
+                for future in futures:
+                    item = future.result()
+                    results.append(item)
+                    if item.finished_at:
+                        layer_seconds[item.layer] = max(layer_seconds.get(item.layer, 0.0), item.finished_at - wave_started)
+                if not args.dry_run:
+                    size_after = repository_size(client, args.endpoint, args.repository)
+                    report_wave(wave, size_before, size_after, time.perf_counter() - wave_started)
+                    size_before = size_after
+    finally:
+        if not args.dry_run:
+            manifest.save()
+    report_layers(results, layer_seconds)
     print(f"[INFO] Completed GraphDB seeding ({len(files)} files)")
 
 
@@ -94,4 +302,3 @@ if __name__ == "__main__":
     except (ConfigError, httpx.HTTPError) as exc:
         print(f"[ERROR] {exc}")
         sys.exit(1)
-
@@ -0,0 +1,135 @@
+"""Checksum manifests shared by the ontology pipelines."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_CHANGES_PATH = Path(__file__).resolve().parent / ".sync_changes.json"
+
+
+def file_sha256(path: Path) -> str:
+    """Stream a file through SHA-256 without reading it into memory."""
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ChecksumManifest:
+    """JSON manifest of ``key -> sha256`` entries grouped by scope.
+
+    A scope identifies the target (e.g. a GraphDB repository or Neo4j URI) so
+    one manifest file can track several destinations. Writes are atomic.
+    """
+
+    def __init__(self, path: Path, scope: str):
+        self.path = Path(path)
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = self._read()
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {"scopes": {}}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            print(f"[WARN] Ignoring unreadable manifest {self.path}: {exc}")
+            return {"scopes": {}}
+        data.setdefault("scopes", {})
+        return data
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        return self._data["scopes"].setdefault(self.scope, {})
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def is_current(self, key: str, digest: str) -> bool:
+        entry = self.entries.get(key)
+        return bool(entry) and entry.get("sha256") == digest
+
+    def record(self, key: str, digest: str, **meta: Any) -> None:
+        with self._lock:
+            self.entries[key] = {
+                "sha256": digest,
+                "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+                **meta,
+            }
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def clear_scope(self) -> None:
+        with self._lock:
+            self._data["scopes"][self.scope] = {}
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(self._data, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+
+def write_change_list(
+    path: Path,
+    *,
+    changed: Iterable[str],
+    removed: Iterable[str] = (),
+    layers: Iterable[str] = (),
+) -> None:
+    """Persist the paths (relative to the ontology root) touched by the last sync."""
+    payload = {
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "changed": list(changed),
+        "removed": list(removed),
+        "layers": list(layers),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def merge_change_lists(
+    previous: Dict[str, Any],
+    *,
+    changed: Iterable[str],
+    removed: Iterable[str],
+) -> Tuple[List[str], List[str]]:
+    """Fold a sync run into the pending change list: a path ends up in whichever list saw it last."""
+    changed, removed = set(changed), set(removed)
+    return (
+        sorted((set(previous.get("changed", [])) - removed) | changed),
+        sorted((set(previous.get("removed", [])) - changed) | removed),
+    )
+
+
+def read_change_list(path: Path = DEFAULT_CHANGES_PATH) -> Dict[str, Any]:
+    """Load a change list written by ``write_change_list``; missing files mean no changes."""
+    if not path.exists():
+        return {"changed": [], "removed": [], "layers": []}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for key in ("changed", "removed", "layers"):
+        data.setdefault(key, [])
+    return data
+
+
+__all__ = [
+    "ChecksumManifest",
+    "DEFAULT_CHANGES_PATH",
+    "file_sha256",
+    "merge_change_lists",
+    "read_change_list",
+    "write_change_list",
+]
@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import shutil
+import time
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 from neo4j import GraphDatabase
 
@@ -14,19 +17,45 @@ if __name__ == "__main__" and __package__ is None:
 from data.ontology.pipelines._settings import neo4j_credentials  # type: ignore  # pylint:disable=import-error
 from data.ontology.pipelines.config_loader import (  # type: ignore  # pylint:disable=import-error
     ConfigError,
+    PIPELINES_DIR,
+    REPO_ROOT,
+    Layer,
+    changed_layer_names,
     iter_layer_files,
+    layer_waves,
     resolve_ontology_path,
+    select_layers,
 )
+from data.ontology.pipelines.manifest import (  # type: ignore  # pylint:disable=import-error
+    DEFAULT_CHANGES_PATH,
+    ChecksumManifest,
+    file_sha256,
+    read_change_list,
+)
+from app.services.neo4j_templates import GRAPH_VERSION_BUMP, entity_index_statements
 
 NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD = neo4j_credentials()
+DEFAULT_IMPORT_DIR = REPO_ROOT / "neo4j" / "import"
+DEFAULT_IMPORT_URL = "file:///var/lib/neo4j/import"
+DEFAULT_MANIFEST = PIPELINES_DIR / ".neo4j_ingest_manifest.json"
+IMPORT_SUBDIR = "lop-ontology"
+N10S_FORMATS = {".ttl": "Turtle", ".nt": "N-Triples", ".rdf": "RDF/XML", ".owl": "RDF/XML"}
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Import LOP ontology TTL into Neo4j using n10s")
-    parser.add_argument("--layers", nargs="*", help="Subset of layers to import")
+    parser.add_argument("--layers", nargs="*", help="Subset of layers to import (opt-in layers such as fibo load only when named)")
     parser.add_argument("--skip-optional", action="store_true", help="Skip optional dataset layer")
     parser.add_argument("--skip-wipe", action="store_true", help="Keep existing graph data")
     parser.add_argument("--dry-run", action="store_true", help="List file paths without importing")
+    parser.add_argument("--wipe-batch-size", type=int, default=10_000, help="Nodes deleted per transaction when wiping")
+    parser.add_argument("--import-dir", type=Path, default=DEFAULT_IMPORT_DIR, help="Local path mounted as Neo4j's import directory")
+    parser.add_argument("--import-url", default=DEFAULT_IMPORT_URL, help="URL of the import directory as seen by Neo4j")
+    parser.add_argument("--inline", action="store_true", help="Send TTL text inline instead of n10s.rdf.import.fetch")
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST, help="Checksum manifest path")
+    parser.add_argument("--force", action="store_true", help="Import layers even if unchanged")
+    parser.add_argument("--changed-only", action="store_true", help="Only reload layers affected by the last FIBO sync")
+    parser.add_argument("--changes", type=Path, default=DEFAULT_CHANGES_PATH, help="Change list written by sync_fibo_modules.py")
     return parser.parse_args()
 
 
@@ -75,27 +104,143 @@ def register_prefixes(session) -> None:
         session.run("CALL n10s.nsprefixes.add($prefix, $namespace)", prefix=prefix, namespace=namespace)
 
 
+def wipe_graph(session, batch_size: int) -> None:
+    """Delete all data nodes in batches so large graphs do not exhaust the transaction heap.
+
+    The ``LOPGraphMeta`` node survives so the version bump after the import moves
+    past the version readers cached paths under.
+    """
+    if batch_size < 1:
+        raise ConfigError("--wipe-batch-size must be positive")
+    session.run(
+        f"MATCH (n) WHERE NOT n:LOPGraphMeta CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF {int(batch_size)} ROWS"
+    ).consume()
+
+
+def ensure_constraints(session) -> None:
+    session.run(
+        "CREATE CONSTRAINT n10s_unique_uri IF NOT EXISTS FOR (r:Resource) REQUIRE r.uri IS UNIQUE"
+    ).consume()
+
+
+def layer_digest(paths: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(path.relative_to(resolve_ontology_path("."))).encode("utf-8"))
+        digest.update(file_sha256(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+def stage_file(path: Path, import_dir: Path) -> str:
+    """Copy a TTL into the mounted import directory (only when changed); return its relative path."""
+    relative = Path(IMPORT_SUBDIR) / path.relative_to(resolve_ontology_path("."))
+    target = import_dir / relative
+    if not target.exists() or file_sha256(target) != file_sha256(path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, target)
+    return relative.as_posix()
+
+
+def import_layer(driver, layer: Layer, paths: List[Path], args: argparse.Namespace) -> Dict[str, Any]:
+    stats = {"layer": layer.name, "files": len(paths), "triples_loaded": 0, "triples_parsed": 0, "seconds": 0.0}
+    started = time.perf_counter()
+    with driver.session() as session:
+        for path in paths:
+            rdf_format = N10S_FORMATS.get(path.suffix.lower(), "Turtle")
+            if args.inline:
+                record = session.run(
+                    "CALL n10s.rdf.import.inline($ttl, $format) YIELD terminationStatus, triplesLoaded, triplesParsed, extraInfo "
+                    "RETURN terminationStatus, triplesLoaded, triplesParsed, extraInfo",
+                    ttl=path.read_text(encoding="utf-8"),
+                    format=rdf_format,
+                ).single()
+            else:
+                url = f"{args.import_url.rstrip('/')}/{stage_file(path, args.import_dir)}"
+                record = session.run(
+                    "CALL n10s.rdf.import.fetch($url, $format) YIELD terminationStatus, triplesLoaded, triplesParsed, extraInfo "
+                    "RETURN terminationStatus, triplesLoaded, triplesParsed, extraInfo",
+                    url=url,
+                    format=rdf_format,
+                ).single()
+            if record is None or record["terminationStatus"] != "OK":
+                detail = record["extraInfo"] if record else "no result"
+                raise RuntimeError(f"n10s import failed for {path}: {detail}")
+            stats["triples_loaded"] += record["triplesLoaded"] or 0
+            stats["triples_parsed"] += record["triplesParsed"] or 0
+            print(f"[INFO] [{layer.name}] {path.name}: {record['triplesLoaded']} triples")
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
 def main() -> None:
     args = parse_args()
+    if args.changed_only:
+        changes = read_change_list(args.changes)
+        if changes["removed"]:
+            print(f"[WARN] {len(changes['removed'])} removed files keep their triples until a full reload")
+        args.layers = changed_layer_names(changes, include_optional=not args.skip_optional, only_layers=args.layers)
+        if not args.layers:
+            print("[INFO] No layers affected by the last sync")
+            return
+        args.force = True
+        args.skip_wipe = True
     ttl_paths = collect_ttl_paths(args)
     if args.dry_run:
         for path in ttl_paths:
             print(f"[DRY-RUN] {path}")
         return
 
+    layers = select_layers(include_optional=not args.skip_optional, only_layers=args.layers)
+    layer_files: Dict[str, List[Path]] = {
+        layer.name: [path for path in (resolve_ontology_path(rel) for rel in layer.iter_files()) if path.exists()]
+        for layer in layers
+    }
+    manifest = ChecksumManifest(args.manifest, scope=NEO4J_URI)
     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    with driver.session() as session:
-        if not args.skip_wipe:
-            print("[INFO] Wiping existing graph ...")
-            session.run("MATCH (n) DETACH DELETE n")
-        print("[INFO] Initializing n10s config ...")
-        init_graphconfig(session)
-        register_prefixes(session)
-        for idx, path in enumerate(ttl_paths, start=1):
-            ttl_text = path.read_text(encoding="utf-8")
-            print(f"[INFO] ({idx}/{len(ttl_paths)}) Importing {path}")
-            session.run("CALL n10s.rdf.import.inline($ttl, 'Turtle')", ttl=ttl_text)
-    driver.close()
+    results: List[Dict[str, Any]] = []
+    try:
+        with driver.session() as session:
+            if not args.skip_wipe:
+                print(f"[INFO] Wiping existing graph in batches of {args.wipe_batch_size} ...")
+                wipe_graph(session, args.wipe_batch_size)
+                manifest.clear_scope()
+            print("[INFO] Initializing n10s config ...")
+            ensure_constraints(session)
+            init_graphconfig(session)
+            register_prefixes(session)
+        for wave in layer_waves(layers):
+            pending: List[Tuple[Layer, List[Path], str]] = []
+            for layer in wave:
+                paths = layer_files[layer.name]
+                if not paths:
+                    continue
+                digest = layer_digest(paths)
+                if not args.force and manifest.is_current(layer.name, digest):
+                    print(f"[SKIP] Layer {layer.name} unchanged since last import")
+                    continue
+                pending.append((layer, paths, digest))
+            # Sequential on purpose: n10s imports MERGE the shared class and Resource nodes
+            # (unique ``uri``), so concurrent layers into one database contend for the same
+            # locks and can deadlock. Waves still order layers by ``depends_on``.
+            for layer, paths, digest in pending:
+                stats = import_layer(driver, layer, paths, args)
+                manifest.record(layer.name, digest, triples=stats["triples_loaded"])
+                results.append(stats)
+        if results:
+            with driver.session() as session:
+                # n10s labels every imported node ``Resource``; index it for Neo4jReasoner.find_entities.
+                for statement in entity_index_statements(["Resource"]):
+                    session.run(statement).consume()
+                session.run(GRAPH_VERSION_BUMP).consume()
+    finally:
+        manifest.save()
+        driver.close()
+    for stats in results:
+        rate = stats["triples_loaded"] / stats["seconds"] if stats["seconds"] else 0.0
+        print(
+            f"[STATS] {stats['layer']}: {stats['files']} files, {stats['triples_loaded']} loaded / "
+            f"{stats['triples_parsed']} parsed in {stats['seconds']:.2f}s ({rate:,.0f} triples/s)"
+        )
     print("[INFO] Neo4j ingest completed")
 
 
@@ -2,9 +2,17 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import hashlib
+import os
+import pickle
 import sys
-from typing import Iterable, List, Sequence
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+import rdflib
 from rdflib import Graph
 
 if __name__ == "__main__" and __package__ is None:
@@ -14,9 +22,21 @@ if __name__ == "__main__" and __package__ is None:
 
 from data.ontology.pipelines.config_loader import (  # type: ignore  # pylint:disable=import-error
     ConfigError,
+    PIPELINES_DIR,
+    changed_layer_names,
     iter_layer_files,
     resolve_ontology_path,
 )
+from data.ontology.pipelines.manifest import (  # type: ignore  # pylint:disable=import-error
+    DEFAULT_CHANGES_PATH,
+    file_sha256,
+    read_change_list,
+)
+
+DEFAULT_CACHE_DIR = PIPELINES_DIR / ".cache" / "rdflib"
+CACHE_FORMAT = 1
+
+Triple = Tuple[object, object, object]
 
 
 def _collect_files(include_optional: bool, layer_filter: Sequence[str] | None) -> List[str]:
@@ -28,37 +48,148 @@ def _collect_files(include_optional: bool, layer_filter: Sequence[str] | None) -
     )
 
 
-def load_graph(files: Iterable[str] | None = None) -> Graph:
+def parse_file(path: Path) -> Graph:
+    graph = Graph()
+    graph.parse(path)
+    return graph
+
+
+def _cache_key(path: Path) -> str:
+    salt = f"{CACHE_FORMAT}:{rdflib.__version__}:{path.suffix.lower()}:"
+    return hashlib.sha256((salt + file_sha256(path)).encode("ascii")).hexdigest()
+
+
+def _cache_file(cache_dir: Path, key: str) -> Path:
+    return cache_dir / key[:2] / f"{key}.pickle"
+
+
+def _parse_to_cache(path_str: str, cache_file_str: str) -> int:
+    """Worker: parse one file and write its triples to the cache; return the triple count."""
+    triples = list(parse_file(Path(path_str)))
+    cache_file = Path(cache_file_str)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    with tmp_file.open("wb") as handle:
+        pickle.dump(triples, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, cache_file)
+    return len(triples)
+
+
+def _read_cache(cache_file: Path) -> List[Triple]:
+    with cache_file.open("rb") as handle:
+        return pickle.load(handle)
+
+
+def cached_triples(path: Path, cache_dir: Path = DEFAULT_CACHE_DIR) -> List[Triple]:
+    """Triples of one file, parsed at most once per content hash."""
+    cache_file = _cache_file(cache_dir, _cache_key(path))
+    if not cache_file.exists():
+        _parse_to_cache(str(path), str(cache_file))
+    return _read_cache(cache_file)
+
+
+def cached_ntriples(path: Path, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+    """N-Triples rendering of one file on disk (written once per content hash), for line-wise streaming."""
+    if path.suffix.lower() == ".nt":
+        return path
+    target = _cache_file(cache_dir, _cache_key(path)).with_suffix(".nt")
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = target.with_suffix(f".{os.getpid()}.tmp")
+        parse_file(path).serialize(destination=str(tmp_file), format="nt", encoding="utf-8")
+        os.replace(tmp_file, target)
+    return target
+
+
+def count_triples(path: Path) -> int:
+    """Triple count of one file; N-Triples is counted line-wise without parsing."""
+    if path.suffix.lower() == ".nt":
+        with path.open("rb") as handle:
+            return sum(1 for line in handle if line.strip() and not line.lstrip().startswith(b"#"))
+    return len(cached_triples(path))
+
+
+def parse_files(
+    paths: Sequence[Path],
+    *,
+    workers: Optional[int] = None,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+) -> Dict[Path, Path]:
+    """Ensure every file has a cache entry, parsing misses across a process pool.
+
+    Returns ``{path: cache_file}``. Unchanged files cost one hash each.
+    """
+    cache_files = {path: _cache_file(cache_dir, _cache_key(path)) for path in paths}
+    misses = [path for path, cache_file in cache_files.items() if not cache_file.exists()]
+    workers = workers or os.cpu_count() or 1
+    if len(misses) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(misses))) as pool:
+            futures = {path: pool.submit(_parse_to_cache, str(path), str(cache_files[path])) for path in misses}
+            for path, future in futures.items():
+                print(f"[INFO] Parsed {path} ({future.result()} triples)")
+    else:
+        for path in misses:
+            print(f"[INFO] Parsed {path} ({_parse_to_cache(str(path), str(cache_files[path]))} triples)")
+    return cache_files
+
+
+def load_graph(
+    files: Iterable[str] | None = None,
+    *,
+    workers: Optional[int] = None,
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+) -> Graph:
+    """Parse layer files in parallel (cached by content hash) and merge them into one graph.
+
+    Pass ``cache_dir=None`` to parse into a throwaway cache.
+    """
     graph = Graph()
     targets = list(files) if files else _collect_files(include_optional=True, layer_filter=None)
+    paths: List[Path] = []
     for relative in targets:
         ttl_path = resolve_ontology_path(relative)
         if not ttl_path.exists():
             print(f"[WARN] Missing TTL skipped: {ttl_path}")
             continue
-        print(f"[INFO] Loading {ttl_path}")
-        graph.parse(ttl_path)
+        paths.append(ttl_path)
+    with tempfile.TemporaryDirectory() if cache_dir is None else contextlib.nullcontext(cache_dir) as active_dir:
+        cache_files = parse_files(paths, workers=workers, cache_dir=Path(active_dir))
+        for path in paths:
+            print(f"[INFO] Loading {path}")
+            graph.addN((s, p, o, graph) for s, p, o in _read_cache(cache_files[path]))
     print(f"[INFO] Triples loaded: {len(graph)}")
     return graph
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="rdflib loader for LOP ontology")
-    parser.add_argument("--layers", nargs="*", help="Limit to specific layer names")
+    parser.add_argument("--layers", nargs="*", help="Limit to specific layer names (opt-in layers such as fibo load only when named)")
     parser.add_argument("--skip-optional", action="store_true", help="Skip optional layers")
     parser.add_argument("--list", action="store_true", help="List files without loading")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="Parsed-triple cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Do not reuse or keep parsed-triple cache")
+    parser.add_argument("--changed-only", action="store_true", help="Only reload layers affected by the last FIBO sync")
+    parser.add_argument("--changes", type=Path, default=DEFAULT_CHANGES_PATH, help="Change list written by sync_fibo_modules.py")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    if args.changed_only:
+        args.layers = changed_layer_names(
+            read_change_list(args.changes), include_optional=not args.skip_optional, only_layers=args.layers
+        )
+        if not args.layers:
+            print("[INFO] No layers affected by the last sync")
+            return
     files = _collect_files(include_optional=not args.skip_optional, layer_filter=args.layers)
     if args.list:
         print("[INFO] Files in load order:")
         for relative in files:
             print(f" - {relative}")
         return
-    load_graph(files)
+    load_graph(files, workers=args.workers, cache_dir=None if args.no_cache else args.cache_dir)
 
 
 if __name__ == "__main__":
@@ -2,9 +2,12 @@
 from __future__ import annotations
 
 import argparse
+import os
 import shutil
 import sys
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List, Optional
 
 if __name__ == "__main__" and __package__ is None:
     sys.path.append(str(Path(__file__).resolve().parents[3]))
@@ -12,12 +15,25 @@ if __name__ == "__main__" and __package__ is None:
 from data.ontology.pipelines.config_loader import (  # type: ignore  # pylint:disable=import-error
     ConfigError,
     ONTOLOGY_ROOT,
+    PIPELINES_DIR,
     REPO_ROOT,
     SyncModule,
+    affected_layers,
+    load_graphdb_layers,
     load_sync_modules,
 )
+from data.ontology.pipelines.manifest import (  # type: ignore  # pylint:disable=import-error
+    DEFAULT_CHANGES_PATH,
+    ChecksumManifest,
+    file_sha256,
+    merge_change_lists,
+    read_change_list,
+    write_change_list,
+)
 
 FIBO_DIR_NAME = "fibo-master"
+DEFAULT_MANIFEST = PIPELINES_DIR / ".sync_manifest.json"
+MANIFEST_SCOPE = "raw"
 
 
 def ensure_fibo_root() -> Path:
@@ -29,20 +45,85 @@ def ensure_fibo_root() -> Path:
     return fibo_root
 
 
-def copy_path(src: Path, dest: Path, *, clean: bool, dry_run: bool) -> None:
-    if dry_run:
-        print(f"[DRY-RUN] Would sync {src} -> {dest}")
-        return
-    if clean and dest.exists():
-        if dest.is_file():
-            dest.unlink()
-        else:
-            shutil.rmtree(dest)
-    if src.is_dir():
-        shutil.copytree(src, dest, dirs_exist_ok=True)
-    else:
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dest)
+@dataclass
+class SyncReport:
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> List[str]:
+        return sorted(self.added + self.updated)
+
+
+def _stat_key(path: Path) -> Dict[str, int]:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _stats_match(src: Path, dest: Path, entry: Optional[Dict]) -> bool:
+    """Matching size/mtime on both sides since the last sync means no hashing is needed."""
+    return (
+        bool(entry)
+        and dest.exists()
+        and entry.get("source") == _stat_key(src)
+        and entry.get("target") == _stat_key(dest)
+    )
+
+
+def _copy_file(src: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f".{dest.name}.sync-tmp")
+    shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+def copy_path(
+    src: Path,
+    dest: Path,
+    *,
+    manifest: ChecksumManifest,
+    report: SyncReport,
+    clean: bool,
+    dry_run: bool,
+) -> None:
+    """Copy ``src`` onto ``dest`` file by file, writing only files whose content changed.
+
+    With ``clean``, files under ``dest`` that no longer exist in ``src`` are removed.
+    """
+    pairs = (
+        [(path, dest / path.relative_to(src)) for path in sorted(src.rglob("*")) if path.is_file()]
+        if src.is_dir()
+        else [(src, dest)]
+    )
+    for src_file, dest_file in pairs:
+        key = dest_file.relative_to(ONTOLOGY_ROOT).as_posix()
+        if _stats_match(src_file, dest_file, manifest.get(key)):
+            report.unchanged += 1
+            continue
+        digest = file_sha256(src_file)
+        if dest_file.exists() and file_sha256(dest_file) == digest:
+            report.unchanged += 1
+            if not dry_run:
+                manifest.record(key, digest, source=_stat_key(src_file), target=_stat_key(dest_file))
+            continue
+        (report.updated if dest_file.exists() else report.added).append(key)
+        if dry_run:
+            print(f"[DRY-RUN] Would copy {src_file} -> {dest_file}")
+            continue
+        _copy_file(src_file, dest_file)
+        manifest.record(key, digest, source=_stat_key(src_file), target=_stat_key(dest_file))
+    if clean and src.is_dir() and dest.is_dir():
+        expected = {dest_file for _, dest_file in pairs}
+        for stale in sorted(path for path in dest.rglob("*") if path.is_file() and path not in expected):
+            key = stale.relative_to(ONTOLOGY_ROOT).as_posix()
+            report.removed.append(key)
+            if dry_run:
+                print(f"[DRY-RUN] Would remove {stale}")
+                continue
+            stale.unlink()
+            manifest.forget(key)
     print(f"[SYNC] {src} -> {dest}")
 
 
@@ -54,7 +135,15 @@ def resolve_destination(module: SyncModule, rel_path: str) -> Path:
     return target_root / relative.name if relative.is_file() else target_root / relative
 
 
-def sync_module(module: SyncModule, fibo_root: Path, *, clean: bool, dry_run: bool) -> None:
+def sync_module(
+    module: SyncModule,
+    fibo_root: Path,
+    *,
+    manifest: ChecksumManifest,
+    report: SyncReport,
+    clean: bool,
+    dry_run: bool,
+) -> None:
     module_root = (fibo_root / module.source).resolve()
     for rel in module.paths:
         src = (module_root / rel).resolve()
@@ -62,14 +151,17 @@ def sync_module(module: SyncModule, fibo_root: Path, *, clean: bool, dry_run: bo
             print(f"[WARN] Missing source {src} for module {module.name}")
             continue
         dest = resolve_destination(module, rel)
-        copy_path(src, dest, clean=clean, dry_run=dry_run)
+        copy_path(src, dest, manifest=manifest, report=report, clean=clean, dry_run=dry_run)
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Sync Bloomberg FIBO modules into ontology/raw")
     parser.add_argument("--module", action="append", dest="modules", help="Only sync specific module names")
-    parser.add_argument("--clean", action="store_true", help="Remove target directories before copying")
+    parser.add_argument("--clean", action="store_true", help="Remove target files that no longer exist upstream")
     parser.add_argument("--dry-run", action="store_true", help="Print actions without copying")
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST, help="Content-hash manifest path")
+    parser.add_argument("--changes", type=Path, default=DEFAULT_CHANGES_PATH, help="Where to write the change list for loaders")
+    parser.add_argument("--reset-changes", action="store_true", help="Start a new change list instead of adding to the pending one")
     return parser.parse_args()
 
 
@@ -81,9 +173,25 @@ def main() -> None:
         print("[INFO] No modules selected (check --module names)")
         return
     fibo_root = ensure_fibo_root()
+    manifest = ChecksumManifest(args.manifest, scope=MANIFEST_SCOPE)
+    report = SyncReport()
     for module in selected:
         print(f"[INFO] Syncing {module.name}: {module.description}")
-        sync_module(module, fibo_root, clean=args.clean, dry_run=args.dry_run)
+        sync_module(module, fibo_root, manifest=manifest, report=report, clean=args.clean, dry_run=args.dry_run)
+    # Merge with the pending list so a no-op sync does not hide changes the loaders have not picked up yet.
+    previous = {} if args.reset_changes else read_change_list(args.changes)
+    changed, removed = merge_change_lists(previous, changed=report.changed, removed=report.removed)
+    layers = [layer.name for layer in affected_layers(changed + removed, load_graphdb_layers())]
+    print(
+        f"[STATS] {len(report.added)} added, {len(report.updated)} updated, "
+        f"{len(report.removed)} removed, {report.unchanged} unchanged; "
+        f"pending: {len(changed)} changed, {len(removed)} removed; affected layers: {layers or 'none'}"
+    )
+    if args.dry_run:
+        return
+    manifest.save()
+    write_change_list(args.changes, changed=changed, removed=removed, layers=layers)
+    print(f"[INFO] Change list written to {args.changes}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+"""Generate production-scale LOP datasets for load testing.
+
+``--scale 1.0`` is the production reference (10,000 studios); every other
+volume is derived per studio, so the generated tables keep the columns that
+``StudioAnalytics`` reads (``transactions``, ``sessions``, ``settlements``,
+``studios``). Studios are generated in shards; each shard owns an RNG seeded
+with ``(seed, shard_index)`` so output is identical regardless of ``--workers``.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+OUTPUT_DIR = BASE_DIR / "scale"
+
+PRODUCTION_STUDIOS = 10_000
+TABLES = ("studios", "transactions", "sessions", "settlements")
+FORMATS = ("csv", "parquet", "ttl")
+
+CITIES = np.array(["Seoul", "Busan", "Daegu", "Incheon", "Gwangju", "Daejeon", "Ulsan", "Suwon"])
+TIERS = np.array(["Tier-1", "Tier-2", "Tier-3"])
+PROGRAMS = np.array(["PRG-STR-12", "PRG-RHB-07", "PRG-PLT-03", "PRG-HYB-09", "PRG-MOB-05"])
+PROGRAM_NAMES = np.array([
+    "Strength Alignment Intensive",
+    "Spine Recovery Intensive",
+    "Core Flow Signature",
+    "Hybrid Conditioning Camp",
+    "Joint Mobility Sprint",
+])
+PLANS = np.array(["LITE", "BASIC", "PLUS", "PRO", "PREMIUM", "SIGNATURE"])
+PLAN_WEIGHTS = np.array([0.12, 0.30, 0.24, 0.14, 0.14, 0.06])
+PLAN_TICKETS = np.array([39_000, 69_000, 99_000, 129_000, 189_000, 290_000], dtype=np.float64)
+TX_TYPES = np.array(["purchase", "renewal", "refund", "chargeback"])
+ATTENDANCE = np.array(["attended", "missed", "cancelled"])
+ATTENDANCE_WEIGHTS = np.array([0.82, 0.12, 0.06])
+
+
+@dataclass(frozen=True)
+class ScaleConfig:
+    studios: int
+    shard_size: int = 250
+    weeks: int = 26
+    members_per_studio: int = 150
+    tx_per_member_week: float = 0.6
+    sessions_per_member_week: float = 1.2
+    refund_rate: float = 0.04
+    chargeback_rate: float = 0.005
+    end_date: str = "2025-11-30"
+    seed: int = 20251202
+
+    @property
+    def shard_count(self) -> int:
+        return -(-self.studios // self.shard_size)
+
+    @property
+    def start(self) -> np.datetime64:
+        return np.datetime64(self.end_date, "D") - np.timedelta64(7 * self.weeks, "D")
+
+
+def _prefixed(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    return np.char.add(prefix, np.char.zfill(numbers.astype(str), width))
+
+
+def generate_shard(config: ScaleConfig, shard_index: int) -> Dict[str, pd.DataFrame]:
+    """Generate every table for one shard of studios with a shard-local RNG."""
+    rng = np.random.default_rng([config.seed, shard_index])
+    first = shard_index * config.shard_size
+    count = min(config.shard_size, config.studios - first)
+    studio_numbers = np.arange(first, first + count)
+    studio_ids = _prefixed("ST", studio_numbers, 6)
+    program_idx = rng.integers(0, len(PROGRAMS), count)
+    agreement_ids = _prefixed("AGR-LOP-", rng.integers(1, 500, count), 3)
+    studios = pd.DataFrame({
+        "studio_id": studio_ids,
+        "studio_iri": np.char.add("https://lop.apple.com/partners/studios/", studio_ids),
+        "legal_name": np.char.add("Synthetic Studio ", studio_numbers.astype(str)),
+        "city": CITIES[rng.integers(0, len(CITIES), count)],
+        "engagement_tier": TIERS[rng.integers(0, len(TIERS), count)],
+        "trainer_lead": _prefixed("trainer:PT-", rng.integers(1, 999, count), 3),
+        "agreement_id": agreement_ids,
+        "program_id": PROGRAMS[program_idx],
+        "primary_program": PROGRAM_NAMES[program_idx],
+        "watch_opt_in_rate": rng.uniform(0.6, 0.97, count).round(2),
+        "risk_score": rng.beta(2.0, 8.0, count).round(2),
+    })
+
+    members = np.maximum(rng.poisson(config.members_per_studio, count), 1)
+    member_offset = np.concatenate(([0], np.cumsum(members)[:-1]))
+    member_plan = rng.choice(len(PLANS), members.sum(), p=PLAN_WEIGHTS)
+    span_seconds = config.weeks * 7 * 86_400
+    start = config.start.astype("datetime64[s]")
+
+    def member_rows(rate: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Studio index and studio-local member index for ``rate`` events per member-week."""
+        per_studio = rng.poisson(members * rate * config.weeks)
+        studio_idx = np.repeat(np.arange(count), per_studio)
+        local_member = (rng.random(studio_idx.size) * members[studio_idx]).astype(np.int64)
+        return studio_idx, local_member
+
+    def offsets_by_studio(studio_idx: np.ndarray, high: int) -> np.ndarray:
+        """Random offsets in ``[0, high)``, ascending within each studio's contiguous block."""
+        offsets = rng.integers(0, high, studio_idx.size)
+        return offsets[np.lexsort((offsets, studio_idx))]
+
+    def member_ids(studio_idx: np.ndarray, local_member: np.ndarray) -> np.ndarray:
+        return np.char.add(np.char.add(studio_ids[studio_idx], "-M"), np.char.zfill(local_member.astype(str), 5))
+
+    tx_studio, tx_member = member_rows(config.tx_per_member_week)
+    n_tx = tx_studio.size
+    tx_seconds = offsets_by_studio(tx_studio, span_seconds)
+    plan_idx = member_plan[member_offset[tx_studio] + tx_member]
+    amount = np.round(PLAN_TICKETS[plan_idx] * rng.lognormal(0.0, 0.15, n_tx), -2)
+    roll = rng.random(n_tx)
+    tx_type = np.where(rng.random(n_tx) < 0.35, 1, 0)
+    tx_type[roll < config.refund_rate + config.chargeback_rate] = 2
+    tx_type[roll < config.chargeback_rate] = 3
+    amount[tx_type >= 2] *= -1
+    tx_ids = _prefixed(f"TX{shard_index:05d}-", np.arange(n_tx), 9)
+    transactions = pd.DataFrame({
+        "txn_id": tx_ids,
+        "studio_id": studio_ids[tx_studio],
+        "member_id": member_ids(tx_studio, tx_member),
+        "timestamp": np.datetime_as_string(start + tx_seconds.astype("timedelta64[s]"), unit="s"),
+        "type": TX_TYPES[tx_type],
+        "payment_plan": PLANS[plan_idx],
+        "amount": amount,
+    })
+
+    ses_studio, ses_member = member_rows(config.sessions_per_member_week)
+    n_ses = ses_studio.size
+    ses_days = offsets_by_studio(ses_studio, config.weeks * 7)
+    sessions = pd.DataFrame({
+        "session_id": _prefixed(f"SES{shard_index:05d}-", np.arange(n_ses), 9),
+        "session_date": np.datetime_as_string(config.start + ses_days.astype("timedelta64[D]"), unit="D"),
+        "studio_id": studio_ids[ses_studio],
+        "member_id": member_ids(ses_studio, ses_member),
+        "program_id": PROGRAMS[program_idx[ses_studio]],
+        "attendance_status": ATTENDANCE[rng.choice(len(ATTENDANCE), n_ses, p=ATTENDANCE_WEIGHTS)],
+    })
+
+    tx_months = (start + tx_seconds.astype("timedelta64[s]")).astype("datetime64[M]")
+    months = np.unique(tx_months)
+    month_idx = np.searchsorted(months, tx_months)
+    net = np.bincount(tx_studio * months.size + month_idx, weights=amount, minlength=count * months.size)
+    cell_studio = np.repeat(np.arange(count), months.size)
+    cell_month = np.tile(months, count)
+    keep = net != 0
+    fee_ratio = rng.uniform(0.18, 0.35, keep.sum()).round(3)
+    period_start = cell_month[keep].astype("datetime64[D]")
+    period_end = (cell_month[keep] + 1).astype("datetime64[D]") - 1
+    payout = period_end + np.ceil(rng.gamma(2.0, 3.0, keep.sum())).astype("timedelta64[D]")
+    start_text = np.datetime_as_string(period_start, unit="D")
+    end_text = np.datetime_as_string(period_end, unit="D")
+    settlements = pd.DataFrame({
+        "cycle_id": np.char.add("CY-", np.datetime_as_string(cell_month[keep], unit="M")),
+        "studio_id": studio_ids[cell_studio[keep]],
+        "agreement_id": agreement_ids[cell_studio[keep]],
+        "period": np.char.add(np.char.add(start_text, "/"), end_text),
+        "amount": np.round(net[keep] * (1 - fee_ratio), 2),
+        "fee_ratio": fee_ratio,
+        "payout_date": np.datetime_as_string(payout, unit="D"),
+    })
+    return {"studios": studios, "transactions": transactions, "sessions": sessions, "settlements": settlements}
+
+
+def iter_shards(config: ScaleConfig, workers: int) -> Iterator[Tuple[int, Dict[str, pd.DataFrame]]]:
+    """Yield shards in order; at most ``2 * workers`` shards are held in memory."""
+    if workers <= 1:
+        for index in range(config.shard_count):
+            yield index, generate_shard(config, index)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Tuple[int, Future]] = deque()
+        next_index = 0
+        while pending or next_index < config.shard_count:
+            while next_index < config.shard_count and len(pending) < 2 * workers:
+                pending.append((next_index, pool.submit(generate_shard, config, next_index)))
+                next_index += 1
+            index, future = pending.popleft()
+            yield index, future.result()
+
+
+class CsvSink:
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+        self._started: set[str] = set()
+
+    def write(self, table: str, frame: pd.DataFrame) -> None:
+        first = table not in self._started
+        self._started.add(table)
+        frame.to_csv(self.output_dir / f"{table}.csv", mode="w" if first else "a", header=first, index=False)
+
+    def close(self) -> None:
+        return None
+
+
+class ParquetSink:
+    """One Parquet file per table; each shard becomes a row group."""
+
+    def __init__(self, output_dir: Path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)") from exc
+        self._pa = pa
+        self._pq = pq
+        self.output_dir = output_dir
+        self._writers: Dict[str, "pq.ParquetWriter"] = {}
+
+    def write(self, table: str, frame: pd.DataFrame) -> None:
+        arrow_table = self._pa.Table.from_pandas(frame, preserve_index=False)
+        writer = self._writers.get(table)
+        if writer is None:
+            writer = self._pq.ParquetWriter(self.output_dir / f"{table}.parquet", arrow_table.schema, compression="zstd")
+            self._writers[table] = writer
+        writer.write_table(arrow_table)
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+
+
+# table -> (class, id column, [(column, predicate, kind)])
+TTL_SPECS: Dict[str, Tuple[str, str, List[Tuple[str, str, str]]]] = {
+    "studios": ("Studio", "studio_id", [
+        ("city", "city", "string"),
+        ("engagement_tier", "engagementTier", "string"),
+        ("program_id", "program", "ref"),
+        ("agreement_id", "agreement", "ref"),
+        ("risk_score", "riskScore", "decimal"),
+    ]),
+    "transactions": ("Transaction", "txn_id", [
+        ("studio_id", "studio", "ref"),
+        ("member_id", "member", "string"),
+        ("timestamp", "timestamp", "dateTime"),
+        ("type", "transactionType", "string"),
+        ("payment_plan", "paymentPlan", "string"),
+        ("amount", "amountKRW", "decimal"),
+    ]),
+    "sessions": ("Session", "session_id", [
+        ("studio_id", "studio", "ref"),
+        ("member_id", "member", "string"),
+        ("session_date", "sessionDate", "date"),
+        ("attendance_status", "attendanceStatus", "string"),
+    ]),
+    "settlements": ("Settlement", "cycle_id", [
+        ("studio_id", "studio", "ref"),
+        ("period", "period", "string"),
+        ("amount", "payoutKRW", "decimal"),
+        ("fee_ratio", "feeRatio", "decimal"),
+        ("payout_date", "payoutDate", "date"),
+    ]),
+}
+TTL_PREFIXES = (
+    "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n"
+    "@prefix lop: <https://lop.apple.com/ontology/lifestyle/core/> .\n"
+    "@prefix lopsim: <https://lop.apple.com/ontology/lifestyle/sim/> .\n\n"
+)
+
+
+def _ttl_object(values: pd.Series, kind: str) -> pd.Series:
+    text = values.astype(str)
+    if kind == "ref":
+        return "lop:" + text
+    if kind == "string":
+        return '"' + text + '"'
+    return '"' + text + '"^^xsd:' + kind
+
+
+class TtlSink:
+    """Single Turtle file; each shard is rendered column-wise and appended."""
+
+    def __init__(self, output_dir: Path):
+        self.handle = (output_dir / "scale_dataset.ttl").open("w", encoding="utf-8")
+        self.handle.write(TTL_PREFIXES)
+
+    def write(self, table: str, frame: pd.DataFrame) -> None:
+        if frame.empty:  # joining no subjects would leave a bare " ." in the file
+            return
+        class_name, id_column, columns = TTL_SPECS[table]
+        subject = frame[id_column].astype(str)
+        if table == "settlements":
+            subject = subject + "-" + frame["studio_id"]
+        block = "lopsim:" + class_name + "-" + subject + " a lopsim:" + class_name
+        for column, predicate, kind in columns:
+            block = block + " ;\n    lopsim:" + predicate + " " + _ttl_object(frame[column], kind)
+        self.handle.write(" .\n".join(block) + " .\n")
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+SINKS: Dict[str, Callable[[Path], object]] = {"csv": CsvSink, "parquet": ParquetSink, "ttl": TtlSink}
+
+
+def generate(
+    config: ScaleConfig,
+    output_dir: Path,
+    formats: Sequence[str] = ("csv",),
+    *,
+    workers: int = 1,
+) -> Dict[str, int]:
+    """Stream every shard into the selected sinks and return row counts per table."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sinks = [SINKS[fmt](output_dir) for fmt in formats]
+    counts = {table: 0 for table in TABLES}
+    started = time.perf_counter()
+    try:
+        for index, shard in iter_shards(config, workers):
+            for table in TABLES:
+                frame = shard[table]
+                counts[table] += len(frame)
+                for sink in sinks:
+                    sink.write(table, frame)
+            print(f"[INFO] Shard {index + 1}/{config.shard_count} written ({time.perf_counter() - started:.1f}s)")
+    finally:
+        for sink in sinks:
+            sink.close()
+    return counts
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate production-scale LOP datasets")
+    parser.add_argument("--scale", type=float, default=0.01, help=f"1.0 = {PRODUCTION_STUDIOS:,} studios")
+    parser.add_argument("--weeks", type=int, default=26, help="History length in weeks")
+    parser.add_argument("--members-per-studio", type=int, default=150, help="Mean members per studio")
+    parser.add_argument("--tx-per-member-week", type=float, default=0.6, help="Mean transactions per member-week")
+    parser.add_argument("--sessions-per-member-week", type=float, default=1.2, help="Mean sessions per member-week")
+    parser.add_argument("--shard-size", type=int, default=250, help="Studios per shard (changes RNG streams)")
+    parser.add_argument("--seed", type=int, default=20251202, help="Base seed; shard i uses (seed, i)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["csv"], help="Output formats")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating shards")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help="Output directory")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    config = ScaleConfig(
+        studios=max(int(round(PRODUCTION_STUDIOS * args.scale)), 1),
+        shard_size=args.shard_size,
+        weeks=args.weeks,
+        members_per_studio=args.members_per_studio,
+        tx_per_member_week=args.tx_per_member_week,
+        sessions_per_member_week=args.sessions_per_member_week,
+        seed=args.seed,
+    )
+    started = time.perf_counter()
+    counts = generate(config, args.output_dir, args.formats, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    for table, rows in counts.items():
+        print(f"{table.capitalize()} rows: {rows:,}")
+    print(f"Written to {args.output_dir} ({', '.join(args.formats)}) in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -131,7 +131,7 @@ def write_csv(path: Path, rows: List[Dict[str, str]]) -> None:
 def write_ttl(rows: List[Dict[str, str]]) -> None:
     if not rows:
         return
-    lines = [
+    header = [
         "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .",
         "@prefix owl: <http://www.w3.org/2002/07/owl#> .",
         "@prefix lop: <https://lop.apple.com/ontology/lifestyle/core/> .",
@@ -154,10 +154,12 @@ def write_ttl(rows: List[Dict[str, str]]) -> None:
         "lopsim:recommendedAction a owl:DatatypeProperty .",
         "",
     ]
-    for row in rows:
-        identifier = f"lopsim:Metric-{row['studio_id']}-{row['week_start']}"
-        lines.extend(
-            [
+    OUTPUT_TTL.parent.mkdir(parents=True, exist_ok=True)
+    with OUTPUT_TTL.open("w", encoding="utf-8") as handle:
+        handle.write("\n".join(header) + "\n")
+        for row in rows:
+            identifier = f"lopsim:Metric-{row['studio_id']}-{row['week_start']}"
+            lines = [
                 f"{identifier} a lopsim:ProviderMetric ;",
                 f"    lopsim:studio lop:{row['studio_id']} ;",
                 f"    lopsim:program lop:{row['program_id']} ;",
@@ -175,9 +177,7 @@ def write_ttl(rows: List[Dict[str, str]]) -> None:
                 f"    lopsim:recommendedAction \"{row['recommended_action']}\" .",
                 "",
             ]
-        )
-    OUTPUT_TTL.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_TTL.write_text("\n".join(lines), encoding="utf-8")
+            handle.write("\n".join(lines) + "\n")
 
 
 def main() -> None:
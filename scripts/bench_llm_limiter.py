@@ -0,0 +1,92 @@
+"""Drive LLMClient against the local fake OpenAI server and report latency and limiter metrics."""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import uvicorn
+
+from app.utils.llm_client import LLMClient
+from app.utils.llm_limiter import LLMRateLimiter, RetryPolicy
+from fake_openai_server import FakeServerConfig, create_app
+
+
+def start_server(config: FakeServerConfig, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent callers")
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--rpm", type=float, default=3000)
+    parser.add_argument("--tpm", type=float, default=0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--hedge-after", type=float, default=0.5, help="Seconds before a hedged duplicate (0 disables)")
+    parser.add_argument("--stream", action="store_true", help="Use generate_stream instead of generate")
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency_ms=args.latency_ms,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        retry_after=0.1,
+    )
+    server = start_server(config, args.port)
+    limiter = LLMRateLimiter(
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        max_concurrency=args.concurrency,
+        timeout=10.0,
+        hedge_after=args.hedge_after,
+        retry=RetryPolicy(max_retries=4, base_delay=0.1, max_delay=2.0),
+    )
+    client = LLMClient(f"http://127.0.0.1:{args.port}/v1", api_key="fake", limiter=limiter)
+
+    def one(index: int) -> tuple[float, bool]:
+        started = time.perf_counter()
+        if args.stream:
+            text = "".join(client.generate_stream(f"요청 {index}", {"studio_id": "SGANG01", "n": index}))
+        else:
+            text = client.generate(f"요청 {index}", {"studio_id": "SGANG01", "n": index})
+        return time.perf_counter() - started, text.startswith("[LLM 스텁")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    server.should_exit = True
+
+    latencies = sorted(latency for latency, _ in results)
+    quantile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{args.requests} calls in {elapsed:.2f}s; stub fallbacks: {sum(stub for _, stub in results)}")
+    print(
+        f"latency ms p50={statistics.median(latencies) * 1000:.0f} p95={quantile(0.95):.0f} "
+        f"p99={quantile(0.99):.0f} max={latencies[-1] * 1000:.0f}"
+    )
+    print("server:", json.dumps(config.stats))
+    print("limiter:", json.dumps(limiter.metrics(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark LLM throughput on the local batching backend (no network) for several batch sizes.
+
+Without ``--pipelines`` concurrent callers issue raw ``LLMClient.generate`` calls; with it,
+concurrent ``AgentOrchestrator`` runs (five agent completions each) share one local server.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.utils.llm_client import LLMClient
+from app.utils.local_llm import BatchingLLMServer, TemplateBackend
+
+
+def run(args: argparse.Namespace, batch_size: int, orchestrator: Any = None) -> Dict[str, Any]:
+    backend = TemplateBackend(prefill_ms_per_token=args.prefill_ms, decode_ms_per_step=args.decode_ms)
+    server = BatchingLLMServer(backend, max_batch_size=batch_size, max_wait_ms=args.max_wait_ms)
+    if orchestrator is not None:
+        orchestrator.llm.backend = server
+
+        def one(index: int) -> float:
+            started = time.perf_counter()
+            orchestrator.run_full_pipeline(f"bench {batch_size} {index}", args.studio_id)
+            return time.perf_counter() - started
+    else:
+        client = LLMClient(backend=server)
+
+        def one(index: int) -> float:
+            started = time.perf_counter()
+            client.generate(f"요청 {index}: 주요 지표를 요약하세요.", {"studio_id": args.studio_id, "n": index, "kpi": {"arppu": 51000 + index}})
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        latencies = sorted(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    metrics = server.metrics()
+    return {
+        "batch_size": batch_size,
+        "runs": args.requests,
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_s": round(args.requests / elapsed, 2),
+        "completions_per_s": round(metrics["requests"] / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+        "avg_batch": metrics["avg_batch"],
+        "avg_queue_wait_ms": metrics["avg_queue_wait_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200, help="Calls (or pipeline runs with --pipelines)")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent callers")
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--prefill-ms", type=float, default=0.02, help="Simulated prefill cost per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=4.0, help="Simulated cost per decode step")
+    parser.add_argument("--pipelines", action="store_true", help="Run full orchestrator pipelines instead of raw calls")
+    parser.add_argument("--studio-id", default="SGANG01")
+    args = parser.parse_args()
+
+    orchestrator = None
+    if args.pipelines:
+        from app.config import get_settings
+        from app.services.agent_orchestrator import AgentOrchestrator
+
+        orchestrator = AgentOrchestrator(get_settings())
+        orchestrator.llm.cache = None  # every run must reach the backend
+    for size in (int(value) for value in args.batch_sizes.split(",")):
+        print(json.dumps(run(args, size, orchestrator), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark PolicyEngine.evaluate_batch against the per-studio evaluate loop."""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.services.policy_engine import PolicyEngine
+
+
+def synthetic_table(studios: int, seed: int) -> dict:
+    """Per-studio state where roughly 10-20% of rows trip at least one policy."""
+    rng = np.random.default_rng(seed)
+    attendance = rng.uniform(0.65, 0.98, studios)
+    attendance[rng.random(studios) < 0.05] = np.nan
+    return {
+        "studio_id": np.array([f"S{index:06d}" for index in range(studios)]),
+        "refund_ratio": rng.beta(2, 40, studios),
+        "attendance_rate": attendance,
+        "avg_sessions_per_member": rng.gamma(6.0, 0.5, studios),
+        "avg_payout_lag_days": rng.normal(6.0, 2.0, studios).round(1),
+        "keyword_refund": rng.poisson(0.2, studios),
+        "keyword_chargeback": rng.poisson(0.05, studios),
+        "keyword_decline": rng.poisson(0.02, studios),
+        "graph_hits": rng.poisson(60, studios),
+        "neo4j_hits": np.zeros(studios, dtype=np.int64),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--studios", type=int, default=100_000, help="Rows in the synthetic state table")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--scalar-sample", type=int, default=10_000, help="Rows timed through evaluate() for comparison")
+    parser.add_argument("--analytics", action="store_true", help="Sweep the configured StudioAnalytics portfolio instead")
+    args = parser.parse_args()
+
+    engine = PolicyEngine()
+    if args.analytics:
+        from app.services.studio_analytics import get_studio_analytics
+
+        started = time.perf_counter()
+        table = engine.portfolio_table(get_studio_analytics().compute_portfolio_kpis())
+        print(f"portfolio KPIs: {time.perf_counter() - started:.3f}s ({len(table['studio_id'])} studios)")
+    else:
+        table = synthetic_table(args.studios, args.seed)
+    rows = len(table["studio_id"])
+
+    started = time.perf_counter()
+    hits = engine.evaluate_batch(table)
+    elapsed = time.perf_counter() - started
+    total_hits = sum(len(studio_hits) for studio_hits in hits.values())
+    print(f"evaluate_batch: {elapsed * 1000:,.1f} ms for {rows:,} studios ({len(hits):,} flagged, {total_hits:,} hits)")
+
+    sample = min(args.scalar_sample, rows)
+    if sample:
+        states = []
+        for index in range(sample):
+            state = {"keyword_counts": {}}
+            for name, values in table.items():
+                value = values[index]
+                value = value.item() if hasattr(value, "item") else value
+                if name.startswith("keyword_"):
+                    state["keyword_counts"][name[len("keyword_"):]] = value
+                elif name != "studio_id":
+                    state[name] = None if value != value else value
+            states.append(state)
+        started = time.perf_counter()
+        for state in states:
+            engine.evaluate(state)
+        per_row = (time.perf_counter() - started) / sample
+        print(f"evaluate loop: {per_row * rows * 1000:,.1f} ms projected for {rows:,} studios")
+
+    if hits and not args.analytics:
+        first = next(iter(hits))
+        print(json.dumps({first: hits[first]}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Microbenchmark for StudioAnalytics load time and per-call compute_kpis latency."""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.services.studio_analytics import DEFAULT_DATA_DIR, StudioAnalytics, _parse_iso
+
+WINDOW = {"from": "2025-08-01", "to": "2025-09-15"}
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="CSV dataset directory")
+    parser.add_argument("--backend", default="csv", help="csv, parquet or sqlite")
+    parser.add_argument("--dataset-dir", default=None, help="Parquet directory or SQLite file")
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per measurement (median reported)")
+    parser.add_argument("--studios", type=int, default=5, help="Studios sampled per measurement")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    analytics = StudioAnalytics(str(args.data_dir), backend=args.backend, dataset_dir=args.dataset_dir)
+    print(f"load: {time.perf_counter() - started:.3f}s ({analytics.backend})")
+
+    window = analytics.derive_window(WINDOW)
+    studio_ids = [sid for sid in analytics.studios if sid][: args.studios]
+    for label, call_window in (("all-time", None), ("windowed", window)):
+        latencies = [
+            _per_call_us(lambda sid=sid: analytics.compute_kpis(sid, call_window), args.repeat) for sid in studio_ids
+        ]
+        if latencies:
+            print(f"compute_kpis {label}: {statistics.median(latencies):,.0f} us/call (median over {len(studio_ids)} studios)")
+
+    dates = [f"2025-{month:02d}-{day:02d}" for month in range(1, 13) for day in range(1, 29)]
+    started = time.perf_counter()
+    for _ in range(50):
+        for value in dates:
+            _parse_iso(value)
+            _parse_iso(value + "/" + value)
+    calls = 50 * len(dates) * 2
+    print(f"_parse_iso: {(time.perf_counter() - started) / calls * 1e9:,.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
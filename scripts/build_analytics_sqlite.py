@@ -0,0 +1,31 @@
+"""Build the embedded SQLite database used by the sqlite StudioAnalytics backend."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.services.analytics_sqlite import import_csv_dataset
+from app.services.studio_analytics import DEFAULT_DATA_DIR
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv-dir", type=Path, default=DEFAULT_DATA_DIR, help="Directory with transactions/sessions/settlements/studios CSV")
+    parser.add_argument("--db", type=Path, default=None, help="Database file (default: <csv-dir>/analytics.sqlite3)")
+    args = parser.parse_args()
+    db_path = args.db or args.csv_dir / "analytics.sqlite3"
+    started = time.perf_counter()
+    counts = import_csv_dataset(args.csv_dir, db_path)
+    for table, rows in counts.items():
+        print(f"{table}: {rows:,} rows")
+    print(f"SQLite database written to {db_path} in {time.perf_counter() - started:.1f}s")
+    print(f"Use with LCP_ANALYTICS_BACKEND=sqlite LCP_ANALYTICS_DATASET_DIR={db_path}")
+
+
+if __name__ == "__main__":
+    main()
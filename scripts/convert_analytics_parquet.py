@@ -0,0 +1,31 @@
+"""Convert StudioAnalytics CSV datasets into the partitioned Parquet layout."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.services.analytics_parquet import convert_csv_dataset
+from app.services.studio_analytics import DEFAULT_DATA_DIR
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv-dir", type=Path, default=DEFAULT_DATA_DIR, help="Directory with transactions/sessions/settlements/studios CSV")
+    parser.add_argument("--out-dir", type=Path, default=None, help="Parquet dataset directory (default: <csv-dir>/parquet)")
+    args = parser.parse_args()
+    out_dir = args.out_dir or args.csv_dir / "parquet"
+    started = time.perf_counter()
+    counts = convert_csv_dataset(args.csv_dir, out_dir)
+    for table, rows in counts.items():
+        print(f"{table}: {rows:,} rows")
+    print(f"Parquet dataset written to {out_dir} in {time.perf_counter() - started:.1f}s")
+    print(f"Use with LCP_ANALYTICS_BACKEND=parquet LCP_ANALYTICS_DATASET_DIR={out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Local OpenAI-compatible chat completions server with injectable latency, throttling and errors.
+
+Point ``LCP_LLM_ENDPOINT`` at ``http://127.0.0.1:<port>/v1`` (any ``OPENAI_API_KEY``) to exercise
+LLMClient's limiter, retries and hedging without a real provider.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeServerConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_factor: float = 10.0
+    retry_after: float = 0.2
+    chunks: int = 8
+    stats: Dict[str, int] = field(default_factory=lambda: {"requests": 0, "throttled": 0, "errors": 0, "slow": 0})
+
+
+def create_app(config: FakeServerConfig | None = None) -> FastAPI:
+    config = config or FakeServerConfig()
+    app = FastAPI(title="fake-openai")
+    app.state.config = config
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body: Dict[str, Any] = await request.json()
+        config.stats["requests"] += 1
+        roll = random.random()
+        if roll < config.throttle_rate:
+            config.stats["throttled"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"retry-after": str(config.retry_after)},
+            )
+        if roll < config.throttle_rate + config.error_rate:
+            config.stats["errors"] += 1
+            return JSONResponse({"error": {"message": "upstream error", "type": "server_error"}}, status_code=503)
+        latency = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        if random.random() < config.slow_rate:
+            config.stats["slow"] += 1
+            latency *= config.slow_factor
+        prompt = body["messages"][-1]["content"]
+        text = f"테스트 응답 ({len(prompt)}자 프롬프트 처리)"
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            # Structured outputs: one string per declared property.
+            properties = response_format["json_schema"]["schema"].get("properties", {})
+            text = json.dumps({name: f"{text} [{name}]" for name in properties}, ensure_ascii=False)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text), "total_tokens": len(prompt) // 4 + len(text)},
+            }
+
+        async def events():
+            step = len(text) // config.chunks + 1
+            pieces = [text[index : index + step] for index in range(0, len(text), step)]
+            for piece in pieces:
+                await asyncio.sleep(latency / len(pieces))
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    def stats() -> Dict[str, int]:
+        return config.stats
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests slowed by --slow-factor")
+    parser.add_argument("--slow-factor", type=float, default=10.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_factor=args.slow_factor,
+    )
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Precompute PipelineResult for every studio x workflow into the insight store (run nightly from cron).
+
+Example crontab entry (02:30 every night, 4 worker processes):
+    30 2 * * * cd /srv/lop && python scripts/materialize_insights.py --workers 4 >> logs/materialize.log 2>&1
+An interrupted run continues with ``--resume latest`` (or a run id) and skips the keys it already wrote.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.config import get_settings
+from app.services.agent_orchestrator import AgentOrchestrator, WORKFLOW_TEMPLATES
+from app.services.insight_materializer import InsightMaterializer
+from app.services.insight_store import get_insight_store
+
+DEFAULT_FLOW = "default"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes (1 runs inline)")
+    parser.add_argument("--studios", nargs="*", help="Studio ids (default: every studio in the analytics dataset)")
+    parser.add_argument(
+        "--workflows",
+        nargs="*",
+        help=f"Workflows: '{DEFAULT_FLOW}' and/or {', '.join(repr(name) for name in WORKFLOW_TEMPLATES)} (default: all)",
+    )
+    parser.add_argument("--resume", help="Run id to resume, or 'latest'")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+
+    store = get_insight_store()
+    if store is None:
+        parser.error("insight store is disabled; set LCP_INSIGHT_STORE_PATH")
+    resume = args.resume
+    if resume == "latest":
+        latest = store.latest_run()
+        resume = latest["run_id"] if latest else None
+    settings = get_settings()
+    materializer = InsightMaterializer(AgentOrchestrator(settings), store, max_age_seconds=settings.insight_max_age_seconds)
+    workflows = None
+    if args.workflows:
+        unknown = [name for name in args.workflows if name != DEFAULT_FLOW and name not in WORKFLOW_TEMPLATES]
+        if unknown:
+            parser.error(f"unknown workflows: {unknown}")
+        workflows = [None if name == DEFAULT_FLOW else name for name in args.workflows]
+    jobs = materializer.jobs(args.studios, workflows)
+    print(json.dumps(materializer.materialize(jobs, workers=args.workers, resume=resume), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
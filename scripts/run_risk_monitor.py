@@ -0,0 +1,44 @@
+"""Tail the transaction/session/settlement CSV feeds and print policy hit events as JSON lines."""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.services.risk_monitor import UNBOUNDED_WINDOW, RiskMonitor
+from app.services.studio_analytics import DEFAULT_DATA_DIR
+
+FEEDS = ("transactions", "sessions", "settlements")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Directory holding the feed CSVs")
+    parser.add_argument(
+        "--window-days", type=int, default=None, help="Sliding window, 0 keeps every row (default: LCP_RISK_MONITOR_WINDOW_DAYS)"
+    )
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between file polls")
+    parser.add_argument("--tail-only", action="store_true", help="Skip existing rows and only watch appended ones")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+
+    if args.window_days is None:
+        window = None
+    else:
+        window = timedelta(days=args.window_days) if args.window_days > 0 else UNBOUNDED_WINDOW
+    monitor = RiskMonitor(window=window, sinks=[lambda event: print(json.dumps(event, ensure_ascii=False), flush=True)])
+    paths = {feed: args.data_dir / f"{feed}.csv" for feed in FEEDS if (args.data_dir / f"{feed}.csv").exists()}
+    try:
+        monitor.watch(paths, poll_interval=args.interval, from_start=not args.tail_only)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ except ImportError:  # pragma: no cover - optional visual enhancement
 
 from app.config import get_settings
 from app.services.agent_orchestrator import AgentOrchestrator
+from app.services.studio_analytics import get_studio_analytics
 
 
 st.set_page_config(page_title="LOP Dashboard", page_icon="??", layout="wide")
@@ -501,6 +502,12 @@ def fetch_neo4j_stats_cached(uri: str, user: str, password: str) -> Dict[str, An
                 pass
 
 
+@st.cache_data(show_spinner=False)
+def fetch_portfolio_kpis(sort_by: str = "net_revenue", top_k: int = 10) -> Dict[str, Any]:
+    """Every studio's KPI snapshot ranked in one grouped analytics pass."""
+    return get_studio_analytics().compute_portfolio_kpis(sort_by=sort_by, top_k=top_k)
+
+
 @st.cache_data(show_spinner=False)
 def fetch_neo4j_stats() -> Dict[str, Any]:
     settings = get_settings()
@@ -1120,6 +1127,7 @@ def render_operator_network_section(model: Dict[str, Any]) -> None:
             "</div>")
         col.markdown(html_block, unsafe_allow_html=True)
     render_operator_graph_story(health)
+    render_portfolio_leaderboard()
     st.area_chart(model["risk_series"], use_container_width=True, height=220)
     render_list_card("Ops Alerts", model.get("risk_messages") or [])
     render_text_card("LLM Insight Summary", model.get("summary"))
@@ -1131,6 +1139,51 @@ def render_operator_network_section(model: Dict[str, Any]) -> None:
 
 
 
+PORTFOLIO_SORT_LABELS = {
+    "net_revenue": "순매출",
+    "arppu": "ARPPU",
+    "refund_ratio": "환불 비율",
+    "attendance_rate": "출석률",
+    "avg_payout_lag_days": "정산 지연(일)",
+}
+
+
+def render_portfolio_leaderboard() -> None:
+    """Portfolio KPI leaderboard loaded with a single analytics call."""
+    st.markdown("<div class='lop-section-title'>Portfolio Leaderboard</div>", unsafe_allow_html=True)
+    sort_by = st.radio(
+        "정렬 기준",
+        list(PORTFOLIO_SORT_LABELS),
+        horizontal=True,
+        format_func=lambda key: PORTFOLIO_SORT_LABELS[key],
+        key="portfolio_sort_by",
+    )
+    try:
+        portfolio = fetch_portfolio_kpis(sort_by=sort_by)
+    except Exception as exc:
+        st.info(f"포트폴리오 KPI를 불러오지 못했습니다: {exc}")
+        return
+    totals = portfolio.get("totals", {})
+    col1, col2, col3 = st.columns(3, gap="large")
+    render_metric_card(col1, "Portfolio Net Revenue", f"{totals.get('net_revenue', 0.0):,.0f}", f"{portfolio.get('total_studios', 0)} studios")
+    render_metric_card(col2, "Refund Ratio", f"{totals.get('refund_ratio', 0.0) * 100:.1f}%", "환불/총매출")
+    render_metric_card(col3, "Attendance", f"{totals.get('attendance_rate', 0.0) * 100:.1f}%", f"{totals.get('sessions', 0):,} sessions")
+    rows = [
+        {
+            "Rank": entry["rank"],
+            "Studio": entry.get("name") or entry["studio_id"],
+            "ARPPU": entry["metrics"]["arppu"],
+            "Net Revenue": entry["metrics"]["net_revenue"],
+            "Refund Ratio": entry["metrics"]["refund_ratio"],
+            "Attendance": entry["metrics"]["attendance_rate"],
+            "Payout Lag(d)": entry["metrics"]["avg_payout_lag_days"],
+        }
+        for entry in portfolio.get("studios", [])
+    ]
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+
 def render_operator_graph_story(health: Dict[str, Dict[str, Any]]) -> None:
     """Render dual graph story with lightweight visuals."""
     graph_meta = (health.get("GraphDB") or {}).get("meta", {}) or {}
@@ -1,7 +1,12 @@
+import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Ensure the lifestyle package root is on sys.path for tests
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
\ No newline at end of file
+    sys.path.insert(0, str(ROOT))
+
+# Keep live results written by ``InsightMaterializer.serve`` out of the shared data/cache store.
+os.environ.setdefault("LCP_INSIGHT_STORE_PATH", str(Path(tempfile.mkdtemp(prefix="lcp-tests-")) / "insights.sqlite3"))
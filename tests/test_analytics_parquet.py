@@ -0,0 +1,94 @@
+"""Parquet analytics backend: conversion at scale and KPI parity with the CSV path."""
+import csv
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.services.analytics_parquet import convert_csv_dataset
+from app.services.studio_analytics import StudioAnalytics
+
+STUDIOS = 300
+MONTHS = ("2025-06", "2025-07", "2025-08", "2025-09")
+
+
+def _write(path, header, rows):
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _dataset(tmp_path):
+    studios = [f"ST{index:05d}" for index in range(STUDIOS)]
+    _write(tmp_path / "studios.csv", ["studio_id", "legal_name"], [[studio, studio] for studio in studios])
+    _write(
+        tmp_path / "transactions.csv",
+        ["txn_id", "studio_id", "member_id", "timestamp", "type", "payment_plan", "amount"],
+        [
+            [f"TX-{studio}-{month}", studio, f"{studio}-M1", f"{month}-03T10:00:00", "purchase", "PRO", 1000.0 + index]
+            for index, studio in enumerate(studios)
+            for month in MONTHS
+        ],
+    )
+    _write(
+        tmp_path / "sessions.csv",
+        ["session_id", "session_date", "studio_id", "member_id", "attendance_status"],
+        [[f"SES-{studio}-{month}", f"{month}-05", studio, f"{studio}-M1", "attended"] for studio in studios for month in MONTHS],
+    )
+    return studios
+
+
+def test_convert_more_than_1024_partitions(tmp_path) -> None:
+    csv_dir, out_dir = tmp_path / "csv", tmp_path / "parquet"
+    csv_dir.mkdir()
+    studios = _dataset(csv_dir)
+
+    counts = convert_csv_dataset(csv_dir, out_dir)
+
+    assert counts["transactions"] == STUDIOS * len(MONTHS)
+    partitions = list((out_dir / "transactions").glob("studio_id=*/month=*"))
+    assert len(partitions) == STUDIOS * len(MONTHS) > 1024
+    csv_kpis = StudioAnalytics(str(csv_dir)).compute_kpis(studios[7])
+    parquet_kpis = StudioAnalytics(str(csv_dir), backend="parquet", dataset_dir=str(out_dir)).compute_kpis(studios[7])
+    assert parquet_kpis == csv_kpis
+
+
+def test_portfolio_kpis_match_csv(tmp_path) -> None:
+    csv_dir, out_dir = tmp_path / "csv", tmp_path / "parquet"
+    csv_dir.mkdir()
+    _write(csv_dir / "studios.csv", ["studio_id", "legal_name"], [["A", "Alpha"], ["B", "Beta"], ["C", "Idle"]])
+    _write(
+        csv_dir / "transactions.csv",
+        ["txn_id", "studio_id", "member_id", "timestamp", "type", "payment_plan", "amount"],
+        [
+            ["T1", "A", "m1", "2025-06-01T09:00:00", "purchase", "PRO", "120"],
+            ["T2", "A", "m1", "2025-07-02T09:00:00", "purchase", "BASIC", "120"],
+            ["T3", "A", "", "2025-07-03T09:00:00", "Refund", "PRO", "30"],
+            ["T4", "A", "m2", "2025-08-04T09:00:00", "purchase", "", "-15"],
+            ["T5", "B", "m3", "", "purchase", "LITE", "abc"],
+        ],
+    )
+    _write(
+        csv_dir / "sessions.csv",
+        ["session_id", "session_date", "studio_id", "member_id", "attendance_status"],
+        [["S1", "2025-06-05", "A", "m1", "Attended"], ["S2", "2025-07-05", "A", "", "missed"]],
+    )
+    _write(
+        csv_dir / "settlements.csv",
+        ["cycle_id", "studio_id", "period", "payout_date", "amount", "fee_ratio"],
+        [
+            ["C1", "A", "2025-06-01/2025-06-30", "2025-07-10T12:00:00", "900", "0.1"],
+            ["C2", "B", "2025-06-01/2025-06-30T18:00:00", "2025-06-30T06:00:00", "500", "0.2"],
+        ],
+    )
+    convert_csv_dataset(csv_dir, out_dir)
+    rows = StudioAnalytics(str(csv_dir))
+    arrow = StudioAnalytics(str(csv_dir), backend="parquet", dataset_dir=str(out_dir))
+    assert arrow.backend == "parquet"
+
+    for period in (None, {"from": "2025-07-01", "to": "2025-08-31"}):
+        window = rows.derive_window(period)
+        assert arrow.compute_portfolio_kpis(window, sort_by="avg_payout_lag_days") == rows.compute_portfolio_kpis(
+            window, sort_by="avg_payout_lag_days"
+        )
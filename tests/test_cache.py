@@ -0,0 +1,114 @@
+"""TTLCache in process and on the shared SQLite / Redis-protocol backends."""
+import asyncio
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils.cache import CacheBackend, RedisCacheBackend, SqliteCacheBackend, TTLCache
+from scripts.fake_redis_server import serve
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def redis_url() -> str:
+    port = _free_port()
+    threading.Thread(target=asyncio.run, args=(serve(port),), daemon=True).start()
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return f"redis://127.0.0.1:{port}/0"
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.02)
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request, tmp_path) -> CacheBackend:
+    if request.param == "sqlite":
+        return SqliteCacheBackend(tmp_path / "cache.sqlite3")
+    backend = RedisCacheBackend(request.getfixturevalue("redis_url"))
+    backend.clear()
+    return backend
+
+
+def test_in_process_cache_evicts_fifo_and_expires() -> None:
+    cache = TTLCache(ttl_seconds=300, max_size=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, "B", "C")
+
+    cache.ttl_seconds = -1
+    assert cache.get("b") is None
+
+
+def test_backend_entries_are_shared_between_caches(backend) -> None:
+    writer = TTLCache(backend=backend, namespace="results")
+    reader = TTLCache(backend=backend, namespace="results")
+    other = TTLCache(backend=backend, namespace="other")
+    key = ("SGANG01", "default", None)
+
+    writer.set(key, {"kpi": [1, 2, 3]})
+    other.set(key, "unrelated")
+    assert reader.get(key) == {"kpi": [1, 2, 3]}
+
+    reader.clear()
+    assert writer.get(key) is None
+    assert other.get(key) == "unrelated"
+
+    other.delete(key)
+    assert other.get(key) is None
+
+
+def test_backend_entries_expire(backend) -> None:
+    cache = TTLCache(ttl_seconds=0, backend=backend)
+    cache.set("k", "v")
+    time.sleep(0.01)
+    assert cache.get("k") is None
+
+
+def test_sqlite_caps_entries_per_namespace(tmp_path) -> None:
+    backend = SqliteCacheBackend(tmp_path / "cache.sqlite3")
+    small = TTLCache(max_size=2, backend=backend, namespace="small")
+    large = TTLCache(max_size=10, backend=backend, namespace="large")
+    for index in range(4):
+        small.set(index, index)
+        large.set(index, index)
+        time.sleep(0.002)  # distinct created_at for the oldest-first cut
+    assert [small.get(index) for index in range(4)] == [None, None, 2, 3]
+    assert [large.get(index) for index in range(4)] == [0, 1, 2, 3]
+
+
+def test_backend_errors_are_misses() -> None:
+    class Broken(CacheBackend):
+        name = "broken"
+
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl_seconds, max_entries=None):
+            raise ConnectionError("down")
+
+    cache = TTLCache(backend=Broken())
+    cache.set("k", "v")
+    assert cache.get("k") is None
+
+
+def test_unreachable_redis_falls_back_to_process_memory(monkeypatch) -> None:
+    settings = SimpleNamespace(cache_backend="redis", cache_redis_url=f"redis://127.0.0.1:{_free_port()}/0")
+    monkeypatch.setattr(cache_module, "get_settings", lambda: settings)
+    cache_module.get_cache_backend.cache_clear()
+    try:
+        assert cache_module.get_cache_backend() is None
+    finally:
+        cache_module.get_cache_backend.cache_clear()
@@ -0,0 +1,81 @@
+"""ContextCompactor: field projection, evidence dedupe, list caps and token budgets."""
+import json
+
+from app.utils.context_compactor import ContextCompactor
+
+
+def _chars(text: str) -> int:
+    return len(text)
+
+
+def _size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False))
+
+
+def test_projection_keeps_profile_fields_only() -> None:
+    compactor = ContextCompactor({"agent": {"fields": ("meta", "insight.kpis.studio", "risk.risk_score", "absent.path")}})
+    context = {
+        "meta": {"studio_id": "SGANG01"},
+        "graph_meta": {"triples": 900},
+        "insight": {"summary": "long", "kpis": {"studio": {"members": 12}, "portfolio": {"members": 400}}},
+        "risk": {"risk_score": 0.123456789, "signals": ["refund"]},
+    }
+    assert compactor.compact("agent", context) == {
+        "meta": {"studio_id": "SGANG01"},
+        "insight": {"kpis": {"studio": {"members": 12}}},
+        "risk": {"risk_score": 0.1235},
+    }
+    # Unknown (or no) profile: an unchanged copy.
+    assert compactor.compact("other", context) == context
+    assert compactor.compact(None, context) is not context
+
+
+def test_evidence_is_deduped_capped_and_clipped() -> None:
+    compactor = ContextCompactor({"agent": {"fields": ("vector", "nested")}}, list_limits={"vector": 2, "graph": 1}, max_string=10)
+    context = {
+        "vector": [
+            {"id": "a", "score": 0.9, "content": "refund spike"},
+            {"id": "b", "score": 0.8, "content": "refund spike"},  # same evidence from another retriever
+            {"id": "c", "score": 0.7, "content": "late payout"},
+            {"id": "d", "score": 0.6, "content": "low attendance"},
+        ],
+        "nested": {
+            "graph": [{"s": "s", "p": "p", "o": "o"}, {"s": "s", "p": "p", "o": "o"}, {"s": "s", "p": "p", "o": "o2"}],
+            "tags": ["x", "x", "y"],
+        },
+    }
+    compacted = compactor.compact("agent", context)
+    assert [hit["id"] for hit in compacted["vector"]] == ["a", "c"]
+    assert compacted["vector"][0]["content"] == "refund sp…"
+    assert compacted["nested"] == {"graph": [{"s": "s", "p": "p", "o": "o"}], "tags": ["x", "y"]}
+
+
+def test_budget_shrinks_the_largest_list_first() -> None:
+    compactor = ContextCompactor({"agent": {"budget": 450, "fields": ("vector", "graph")}}, counter=_chars)
+    context = {
+        "vector": [{"content": f"vector hit {index} " + "v" * 60} for index in range(5)],
+        "graph": [f"triple {index}" for index in range(10)],
+    }
+    compacted = compactor.compact("agent", context)
+
+    assert _size(compacted) <= 450
+    assert len(compacted["vector"]) < 5
+    assert len(compacted["graph"]) == 10  # the smaller list fits once the large one is cut
+    assert compacted["vector"] == [{"content": hit["content"]} for hit in context["vector"][: len(compacted["vector"])]]
+    stats = compactor.stats["agent"]
+    assert stats["calls"] == 1 and stats["over_budget"] == 0
+    assert stats["tokens_before"] == _size(context) and stats["tokens_after"] == _size(compacted)
+
+
+def test_unreachable_budget_terminates_and_is_reported() -> None:
+    compactor = ContextCompactor({"agent": {"budget": 10, "fields": ("meta", "vector")}}, counter=_chars)
+    context = {"meta": {"note": "n" * 2000}, "vector": [{"content": "c" * 500}, {"content": "d" * 500}]}
+
+    compacted = compactor.compact("agent", context)
+    assert len(compacted["vector"]) == 1
+    assert len(compacted["meta"]["note"]) < 100  # strings were halved down to the floor
+    assert _size(compacted) > 10
+    assert compactor.stats["agent"]["over_budget"] == 1
+
+    compactor.compact("agent", context)
+    assert compactor.stats["agent"]["calls"] == 2 and compactor.stats["agent"]["over_budget"] == 2
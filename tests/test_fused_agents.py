@@ -0,0 +1,121 @@
+"""Fused pipeline mode: deferred agent narratives, one structured call and the per-agent fallback."""
+import json
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from app.agents.base_agent import BaseAgent, DeferredNarrative, defer_narratives
+from app.config import get_settings
+from app.services.agent_orchestrator import AgentOrchestrator
+from app.services.fused_agents import FusedNarrator
+
+PROFILES = ["wellness_insight", "risk_guard", "revenue_architect", "strategy_framework", "consumer_explainer"]
+
+
+class FakeLLM:
+    """Stands in for ``LLMClient``: records calls and answers the structured call with ``sections``."""
+
+    def __init__(self, sections: Optional[Dict[str, Any]] = None) -> None:
+        self.sections = sections
+        self.json_calls: List[Dict[str, Any]] = []
+        self.calls: List[Dict[str, Any]] = []
+
+    def generate(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
+        self.calls.append({"prompt": prompt, "context": context})
+        return f"narrative {len(self.calls)}"
+
+    def generate_json(self, prompt, context, schema, *, name="response"):
+        self.json_calls.append({"prompt": prompt, "context": context, "schema": schema, "name": name})
+        return self.sections
+
+
+class IdentityCompactor:
+    def compact(self, profile: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        return context
+
+
+class EchoAgent(BaseAgent):
+    def __init__(self, llm, profile: str) -> None:
+        super().__init__(llm, compactor=IdentityCompactor())
+        self.context_profile = profile
+
+    def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        return {"summary": self._llm_or_stub(f"summarise {self.context_profile}", context)}
+
+
+def test_defer_narratives_captures_calls_in_order() -> None:
+    llm = FakeLLM()
+    first, second = EchoAgent(llm, "wellness_insight"), EchoAgent(llm, "risk_guard")
+    context = {"meta": {"studio_id": "SGANG01"}}
+
+    with defer_narratives() as deferred:
+        outputs = [first.run(context), second.run(context)]
+    assert list(deferred) == ["wellness_insight", "risk_guard"]
+    assert [output["summary"] for output in outputs] == ["<<fused:wellness_insight>>", "<<fused:risk_guard>>"]
+    assert deferred["risk_guard"].context == context
+    assert llm.calls == []
+
+    assert first.run(context)["summary"] == "narrative 1"
+
+
+def _deferred() -> Dict[str, DeferredNarrative]:
+    # Later agents see earlier outputs, so their contexts carry the earlier placeholders.
+    items: Dict[str, DeferredNarrative] = {}
+    for profile in PROFILES:
+        context = {"meta": {"studio_id": "SGANG01"}, "previous": [item.placeholder for item in items.values()]}
+        items[profile] = DeferredNarrative(profile, f"prompt {profile}", context, f"<<fused:{profile}>>")
+    return items
+
+
+def test_full_structured_response_fills_every_section_in_one_call() -> None:
+    llm = FakeLLM({profile: f"fused {profile}" for profile in PROFILES})
+    narrator = FusedNarrator(llm)
+    deferred = _deferred()
+
+    texts = narrator.generate(deferred)
+    assert len(llm.json_calls) == 1 and llm.calls == []
+    assert llm.json_calls[0]["schema"]["required"] == PROFILES
+    assert all(f"- {profile}: prompt {profile}" in llm.json_calls[0]["prompt"] for profile in PROFILES)
+    filled = narrator.fill({"insight": {"summary": "<<fused:wellness_insight>>", "items": ["<<fused:risk_guard>>"]}}, texts)
+    assert filled == {"insight": {"summary": "fused wellness_insight", "items": ["fused risk_guard"]}}
+    assert narrator.stats == {"fused": 1, "fallback": 0}
+
+
+INCOMPLETE = [
+    None,  # no LLM configured, or the structured call failed
+    {profile: "text" for profile in PROFILES[:-1]},
+    {**{profile: "text" for profile in PROFILES}, "risk_guard": " "},
+]
+
+
+@pytest.mark.parametrize("sections", INCOMPLETE)
+def test_missing_section_falls_back_to_ordered_per_agent_calls(sections) -> None:
+    llm = FakeLLM(sections)
+    narrator = FusedNarrator(llm)
+
+    texts = narrator.generate(_deferred())
+    assert [call["prompt"] for call in llm.calls] == [f"prompt {profile}" for profile in PROFILES]
+    # Each replayed call sees the narratives generated before it, never a placeholder.
+    assert [call["context"]["previous"] for call in llm.calls] == [
+        [f"narrative {index}" for index in range(1, position + 1)] for position in range(len(PROFILES))
+    ]
+    assert texts == {f"<<fused:{profile}>>": f"narrative {index}" for index, profile in enumerate(PROFILES, 1)}
+    assert narrator.stats == {"fused": 0, "fallback": 1}
+
+
+@pytest.mark.parametrize("complete", [True, False])
+def test_fused_pipeline_leaves_no_placeholders(complete) -> None:
+    orchestrator = AgentOrchestrator(settings=get_settings())
+    sections = {profile: f"fused {profile}" for profile in PROFILES}
+    if not complete:
+        del sections["strategy_framework"]
+    llm = FakeLLM(sections)
+    orchestrator.narrator = FusedNarrator(llm)
+
+    result = orchestrator.run_full_pipeline(user_query="fused test", studio_id="SGANG01", fused=True, force_refresh=True)
+    assert len(llm.json_calls) == 1
+    assert len(llm.calls) == (0 if complete else len(PROFILES))
+    outputs = [result.insight, result.risk, result.recommendation, result.strategy_framework, result.explanation]
+    dumped = json.dumps([outputs, result.trace_log], ensure_ascii=False, default=str)
+    assert "<<fused:" not in dumped
+    assert ("fused wellness_insight" in dumped) is complete
@@ -0,0 +1,95 @@
+"""InsightMaterializer: store-first serving, freshness and resumable materialization."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.pipeline import PipelineResult
+from app.services.insight_materializer import InsightMaterializer, workflow_label
+from app.services.insight_store import InsightStore
+
+
+class FakeOrchestrator:
+    """Records pipeline runs; studios in ``failing`` raise."""
+
+    def __init__(self, studios=("S1", "S2"), failing=()) -> None:
+        self.analytics = SimpleNamespace(studios=list(studios))
+        self.failing = set(failing)
+        self.calls = []
+
+    def run_full_pipeline(self, user_query, studio_id, workflow=None, force_refresh=False):
+        self.calls.append((user_query, studio_id, workflow, force_refresh))
+        if studio_id in self.failing:
+            raise RuntimeError("pipeline failed")
+        return PipelineResult(
+            trace_id=f"live-{len(self.calls)}",
+            insight={"studio": studio_id, "query": user_query},
+            risk={"risk_score": 0.1},
+            recommendation={},
+            strategy_framework={},
+            explanation={},
+            workflow=workflow_label(workflow),
+        )
+
+
+@pytest.fixture
+def store(tmp_path) -> InsightStore:
+    return InsightStore(tmp_path / "insights.sqlite3")
+
+
+def test_serve_answers_from_the_store_then_refreshes_stale_rows(store) -> None:
+    orchestrator = FakeOrchestrator()
+    materializer = InsightMaterializer(orchestrator, store, max_age_seconds=3600)
+
+    live = materializer.serve("S1")
+    assert live["freshness"]["source"] == "live" and len(orchestrator.calls) == 1
+    hit = materializer.serve("S1")
+    assert hit["freshness"]["source"] == "materialized" and hit["freshness"]["stale"] is False
+    assert hit["cached"] is True and hit["insight"] == live["insight"]
+    assert len(orchestrator.calls) == 1
+
+    store._connection().execute("UPDATE insights SET computed_at = computed_at - 7200")
+    stale = materializer.serve("S1")
+    assert stale["freshness"]["source"] == "live" and len(orchestrator.calls) == 2
+    assert materializer.serve("S1")["freshness"]["source"] == "materialized"
+
+
+def test_force_refresh_recomputes_and_overwrites(store) -> None:
+    orchestrator = FakeOrchestrator()
+    materializer = InsightMaterializer(orchestrator, store)
+    materializer.serve("S1", workflow="Risk Review")
+
+    refreshed = materializer.serve("S1", workflow="Risk Review", force_refresh=True)
+    assert refreshed["freshness"]["source"] == "live"
+    assert orchestrator.calls[-1] == (None, "S1", "Risk Review", True)
+    assert store.get("S1", "Risk Review").result.trace_id == refreshed["trace_id"]
+
+
+def test_ad_hoc_queries_bypass_the_store(store) -> None:
+    orchestrator = FakeOrchestrator()
+    materializer = InsightMaterializer(orchestrator, store)
+    store.put("S1", workflow_label(None), orchestrator.run_full_pipeline(None, "S1"))
+
+    answer = materializer.serve("S1", query="why did refunds rise?")
+    assert answer["freshness"]["source"] == "live"
+    assert answer["insight"]["query"] == "why did refunds rise?"
+    assert store.get("S1", workflow_label(None)).result.insight["query"] is None
+    assert [key[:2] for key in store.keys()] == [("S1", workflow_label(None))]
+
+
+def test_resume_skips_keys_the_run_already_wrote(store) -> None:
+    orchestrator = FakeOrchestrator(failing={"S2"})
+    materializer = InsightMaterializer(orchestrator, store)
+    jobs = materializer.jobs(workflows=[None, "Growth Sprint"])
+    assert jobs == [("S1", None), ("S1", "Growth Sprint"), ("S2", None), ("S2", "Growth Sprint")]
+
+    first = materializer.materialize(jobs, workers=1)
+    assert (first["completed"], first["failed"], first["skipped"]) == (2, 2, 0)
+
+    orchestrator.failing.clear()
+    orchestrator.calls.clear()
+    resumed = materializer.materialize(jobs, workers=1, resume=first["run_id"])
+    assert resumed["run_id"] == first["run_id"]
+    assert (resumed["completed"], resumed["failed"], resumed["skipped"]) == (2, 0, 2)
+    assert [call[1:3] for call in orchestrator.calls] == [("S2", None), ("S2", "Growth Sprint")]
+    assert len(store.keys()) == 4
+    assert store.latest_run()["completed"] == 4
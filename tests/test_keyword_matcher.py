@@ -0,0 +1,46 @@
+"""KeywordMatcher: one regex pass with the semantics of per-keyword ``in`` checks."""
+import random
+
+from app.utils.keyword_matcher import KeywordMatcher, get_risk_keyword_matcher
+
+
+def _naive(categories, text):
+    content = (text or "").lower()
+    found = {}
+    for label, words in categories.items():
+        hits = frozenset(word.lower() for word in words if word and word.lower() in content)
+        if hits:
+            found[label] = hits
+    return found
+
+
+def test_contained_and_overlapping_keywords_are_all_reported() -> None:
+    matcher = KeywordMatcher({"refund": ["refund", "fund"], "fraud": ["fraud"], "overlap": ["abc", "bcd", "cde"]})
+    assert matcher.scan("Fraudulent REFUND request") == {"refund": {"refund", "fund"}, "fraud": {"fraud"}}
+    assert matcher.scan("xabcdex") == {"overlap": {"abc", "bcd", "cde"}}
+    assert matcher.scan(None) == {}
+    assert matcher.scan_batch(["", "nothing here"]) == [{}, {}]
+
+
+def test_matches_naive_substring_checks_on_random_documents() -> None:
+    rng = random.Random(3)
+    alphabet = "abc "
+    categories = {
+        f"c{index}": ["".join(rng.choice(alphabet.strip()) for _ in range(rng.randint(1, 4))) for _ in range(4)]
+        for index in range(5)
+    }
+    matcher = KeywordMatcher(categories)
+    texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30))) for _ in range(500)]
+    assert matcher.scan_batch(texts) == [_naive(categories, text) for text in texts]
+
+
+def test_extend_adds_terms_to_existing_categories() -> None:
+    matcher = KeywordMatcher({"refund": ["refund"]}).extend({"refund": ["환불"], "safety": ["부상"]})
+    assert matcher.categories == {"refund": ("refund", "환불"), "safety": ("부상",)}
+    assert matcher.count(["환불요청", "refund and 부상", "ok"]) == {"refund": 2, "safety": 1}
+
+
+def test_risk_matcher_covers_korean_terms() -> None:
+    found = get_risk_keyword_matcher().scan("고객 결제 거절 후 환불 분쟁 접수")
+    assert found["decline"] == {"결제 거절"}
+    assert found["refund"] == {"환불", "분쟁"}
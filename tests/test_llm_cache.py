@@ -0,0 +1,70 @@
+"""LLMResponseCache: tiers, expiry and in-flight coalescing."""
+import threading
+import time
+
+from app.utils.llm_cache import LLMResponseCache, response_key
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path) -> None:
+    path = tmp_path / "llm.sqlite3"
+    key = response_key("model", "system", "prompt", {"studio_id": "SGANG01"})
+    LLMResponseCache(path).set(key, "answer", model="model")
+
+    fresh = LLMResponseCache(path)
+    assert fresh.get(key) == "answer"
+    assert fresh.stats["disk_hits"] == 1
+    assert fresh.get(key) == "answer"
+    assert fresh.stats["memory_hits"] == 1
+
+
+def test_expired_entries_are_not_served(tmp_path) -> None:
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3", ttl_seconds=0)
+    cache.set("k", "stale")
+    assert cache.get("k") is None
+
+
+def test_concurrent_callers_compute_once() -> None:
+    cache = LLMResponseCache()
+    calls = []
+    start = threading.Barrier(16)
+
+    def compute() -> str:
+        calls.append(1)
+        time.sleep(0.05)
+        return "answer"
+
+    def worker(results: list) -> None:
+        start.wait()
+        results.append(cache.get_or_compute("k", compute))
+
+    results: list = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["answer"] * 16
+    assert len(calls) == 1
+
+
+def test_miss_racing_a_finished_owner_reuses_its_response() -> None:
+    cache = LLMResponseCache()
+    cache.get_or_compute("k", lambda: "first")
+    # Replay the window between the unlocked miss and taking the lock: the owner already
+    # stored its response and left _inflight, so a late caller must not compute again.
+    cache.get = lambda key: None  # type: ignore[method-assign]
+    assert cache.get_or_compute("k", lambda: "second") == "first"
+    assert cache.stats["misses"] == 1
+
+
+def test_failures_are_not_cached() -> None:
+    cache = LLMResponseCache()
+
+    def fail() -> str:
+        raise RuntimeError("upstream down")
+
+    try:
+        cache.get_or_compute("k", fail)
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
@@ -0,0 +1,28 @@
+"""LLMClient: local batching backend and response-cache isolation."""
+from app.utils.llm_cache import LLMResponseCache
+from app.utils.llm_client import LLMClient
+from app.utils.llm_limiter import LLMRateLimiter, RetryPolicy
+from app.utils.local_llm import BatchingLLMServer, TemplateBackend
+
+
+def _local_server() -> BatchingLLMServer:
+    return BatchingLLMServer(TemplateBackend(prefill_ms_per_token=0, decode_ms_per_step=0), max_wait_ms=1)
+
+
+def test_local_backend_answers_without_api_key(tmp_path) -> None:
+    client = LLMClient(cache=LLMResponseCache(tmp_path / "llm.sqlite3"), backend=_local_server())
+    text = client.generate("요약하세요", {"studio_id": "SGANG01"})
+    assert text.startswith("[로컬 template 응답]")
+    assert "studio_id=SGANG01" in text
+
+
+def test_local_responses_do_not_answer_remote_calls(tmp_path) -> None:
+    path = tmp_path / "llm.sqlite3"
+    local = LLMClient(cache=LLMResponseCache(path), backend=_local_server())
+    local.generate("요약하세요", {"studio_id": "SGANG01"})
+
+    # Unreachable endpoint, no retries: a cache miss falls back to the stub instead of the local answer.
+    limiter = LLMRateLimiter(max_concurrency=1, timeout=0.5, retry=RetryPolicy(max_retries=0))
+    remote = LLMClient("http://127.0.0.1:9/v1", api_key="test", cache=LLMResponseCache(path), limiter=limiter)
+    assert remote.source != local.source
+    assert not remote.generate("요약하세요", {"studio_id": "SGANG01"}).startswith("[로컬")
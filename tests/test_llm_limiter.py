@@ -0,0 +1,103 @@
+"""LLMRateLimiter: concurrency cap, rate buckets, retries and hedged requests."""
+import threading
+import time
+
+import pytest
+
+from app.utils.llm_limiter import LLMQueueTimeout, LLMRateLimiter, RetryPolicy, TokenBucket
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int, headers: dict | None = None) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+NO_BACKOFF = RetryPolicy(max_retries=3, base_delay=0, max_delay=0)
+
+
+def test_concurrency_is_capped() -> None:
+    limiter = LLMRateLimiter(max_concurrency=2)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def fn() -> None:
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=limiter.call, args=(fn,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+    assert limiter.metrics()["calls"] == 8
+    assert limiter.metrics()["in_flight"] == 0
+
+
+def test_queue_timeout_when_no_slot_frees_up() -> None:
+    limiter = LLMRateLimiter(max_concurrency=1, acquire_timeout=0.05)
+    with limiter.slot():
+        with pytest.raises(LLMQueueTimeout):
+            limiter.call(lambda: "never")
+    assert limiter.metrics()["queue_timeouts"] == 1
+
+
+def test_token_bucket_waits_for_budget_and_settles() -> None:
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.acquire(60)
+    assert not bucket.acquire(1, deadline=time.monotonic() + 0.01)
+    bucket.settle(-30)  # the call used 30 tokens fewer than estimated
+    assert bucket.acquire(30, deadline=time.monotonic())
+
+
+def test_retryable_errors_are_retried_and_final_errors_raised() -> None:
+    limiter = LLMRateLimiter(retry=NO_BACKOFF)
+    attempts = []
+
+    def flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise StatusError(503 if len(attempts) == 1 else 429)
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    metrics = limiter.metrics()
+    assert (metrics["retries"], metrics["server_errors"], metrics["throttled"]) == (2, 1, 1)
+
+    def invalid() -> str:
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        limiter.call(invalid)
+    assert limiter.metrics()["failures"] == 1
+    assert limiter.metrics()["retries"] == 2
+
+
+def test_retry_after_header_is_honoured_up_to_max_delay() -> None:
+    policy = RetryPolicy(max_retries=2, base_delay=0, max_delay=5)
+    assert policy.delay(0, StatusError(429, {"retry-after": "3"})) == 3
+    assert policy.delay(0, StatusError(429, {"retry-after": "30"})) == 5
+    assert policy.delay(2, StatusError(429)) is None
+    assert policy.delay(0, ValueError("bad prompt")) is None
+
+
+def test_hedged_duplicate_wins_over_a_slow_primary() -> None:
+    limiter = LLMRateLimiter(max_concurrency=2, hedge_after=0.05)
+    calls = []
+
+    def fn() -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return "primary"
+        return "backup"
+
+    assert limiter.call(fn) == "backup"
+    metrics = limiter.metrics()
+    assert (metrics["hedges"], metrics["hedge_wins"]) == (1, 1)
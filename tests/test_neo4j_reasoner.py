@@ -0,0 +1,189 @@
+"""Neo4jReasoner path cache against a fake driver whose graph version follows reloads."""
+from typing import Any, Dict, List
+
+from app.services.neo4j_reasoner import Neo4jConnectionConfig, Neo4jReasoner
+from app.services.neo4j_service import Neo4jService
+from app.services.neo4j_templates import ENTITY_INDEX_STATE, ENTITY_SEARCH, GRAPH_VERSION, GRAPH_VERSION_BUMP, LIST_LABELS
+
+
+class FakeStore:
+    """Just enough graph state for wipes and version bumps."""
+
+    def __init__(self) -> None:
+        self.meta_version: int | None = None
+        self.path_queries = 0
+
+    def apply(self, query: str) -> List[Dict[str, Any]]:
+        if "DETACH DELETE" in query:
+            if "NOT n:LOPGraphMeta" not in query:
+                self.meta_version = None
+            return []
+        if query == GRAPH_VERSION_BUMP:
+            self.meta_version = (self.meta_version or 0) + 1
+            return [{"version": self.meta_version}]
+        if query == GRAPH_VERSION:
+            return [{"version": self.meta_version or 0}]
+        self.path_queries += 1
+        return [{"start_id": "A", "end_id": "B", "nodes": ["A", "B"], "version": self.meta_version}]
+
+
+class _Record:
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self._data = data
+
+    def data(self) -> Dict[str, Any]:
+        return dict(self._data)
+
+
+class FakeDriver:
+    def __init__(self, store: FakeStore) -> None:
+        self.store = store
+
+    def session(self) -> "FakeDriver":
+        return self
+
+    def __enter__(self) -> "FakeDriver":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def run(self, query: str, parameters: Dict[str, Any] | None = None) -> List[_Record]:
+        return [_Record(row) for row in self.store.apply(query)]
+
+
+class _Result:
+    def evaluate(self) -> None:
+        return None
+
+
+class FakeGraph:
+    """py2neo stand-in: forwards wipes and version bumps, accepts every load statement."""
+
+    def __init__(self, store: FakeStore) -> None:
+        self.store = store
+
+    def run(self, query: str, parameters: Dict[str, Any] | None = None) -> _Result:
+        if "DETACH DELETE" in query or query == GRAPH_VERSION_BUMP:
+            self.store.apply(query)
+        return _Result()
+
+
+def test_path_cache_is_invalidated_by_reset_and_reload() -> None:
+    store = FakeStore()
+    service = Neo4jService("bolt://127.0.0.1:9", "neo4j", "neo4j")
+    service._graph = FakeGraph(store)
+    reasoner = Neo4jReasoner(Neo4jConnectionConfig("bolt://127.0.0.1:9", "neo4j", "neo4j"), version_check_seconds=0)
+    reasoner._driver = FakeDriver(store)
+
+    service.load_batches([{"nodes": [{"id": "A", "labels": ["Studio"], "properties": {}}], "relationships": []}])
+    first = reasoner.find_paths("A", "B")
+    assert reasoner.find_paths("A", "B") == first
+    assert store.path_queries == 1
+
+    # A wipe alone must already move the version past the one the cache was filled at.
+    service.reset()
+    reasoner.find_paths("A", "B")
+    assert store.path_queries == 2
+
+    service.load_batches([{"nodes": [{"id": "A", "labels": ["Studio"], "properties": {}}], "relationships": []}])
+    second = reasoner.find_paths("A", "B")
+    assert store.path_queries == 3
+    assert second[0]["version"] > first[0]["version"]
+
+
+def test_identical_endpoints_are_answered_without_a_query() -> None:
+    store = FakeStore()
+    sent: List[Any] = []
+
+    class RecordingDriver(FakeDriver):
+        def run(self, query: str, parameters: Dict[str, Any] | None = None) -> List[_Record]:
+            sent.append((parameters or {}).get("pairs"))
+            return super().run(query, parameters)
+
+    reasoner = Neo4jReasoner(Neo4jConnectionConfig("bolt://127.0.0.1:9", "neo4j", "neo4j"), version_check_seconds=0)
+    reasoner._driver = RecordingDriver(store)
+
+    results = reasoner.find_paths_batch([("A", "A"), ("A", "B")])
+    assert results[("A", "A")] == []
+    assert results[("A", "B")]
+    assert store.path_queries == 1
+    assert [{"start_id": "A", "end_id": "B"}] in sent
+    assert reasoner.find_paths("B", "B") == []
+    assert store.path_queries == 1
+
+
+class StreamingDriver(FakeDriver):
+    """Serves flat evidence rows lazily and records how many the client has pulled."""
+
+    def __init__(self, rows: List[Dict[str, Any]]) -> None:
+        super().__init__(FakeStore())
+        self.rows = rows
+        self.pulled = 0
+        self.queries: List[str] = []
+        self.parameters: List[Dict[str, Any]] = []
+
+    def run(self, query: str, parameters: Dict[str, Any] | None = None):  # type: ignore[override]
+        self.queries.append(query)
+        self.parameters.append(parameters or {})
+        for row in self.rows:
+            self.pulled += 1
+            yield _Record(row)
+
+
+def test_stream_evidence_yields_each_studio_before_the_batch_finishes() -> None:
+    rows = [
+        {"studio_id": studio, "relationship_type": "OFFERS", "relationship": {}, "neighbor_id": f"{studio}-{n}",
+         "neighbor_labels": ["Program"], "neighbor_label": f"{studio}-{n}"}
+        for studio in ("S1", "S2", "S3")
+        for n in range(3)
+    ]
+    driver = StreamingDriver(rows)
+    reasoner = Neo4jReasoner(Neo4jConnectionConfig("bolt://127.0.0.1:9", "neo4j", "neo4j"))
+    reasoner._driver = driver
+
+    stream = reasoner.stream_evidence(["S1", "S2", "S3"], limit=3)
+    studio_id, evidence = next(stream)
+    assert studio_id == "S1" and [row["neighbor_id"] for row in evidence] == ["S1-0", "S1-1", "S1-2"]
+    assert driver.pulled == 4  # only the first row of S2 has been read
+    assert "collect(" not in driver.queries[0]
+    assert [studio for studio, _ in stream] == ["S2", "S3"]
+
+    driver.parameters.clear()
+    assert [studio for studio, _ in reasoner.stream_evidence(["S1", "S2", "S1", "", "S3", "S2"], limit=3)] == ["S1", "S2", "S3"]
+    assert [params["studio_ids"] for params in driver.parameters] == [["S1", "S2", "S3"]]
+
+    grouped = reasoner.build_evidence_many(["S1", "S2", "S3", "S4"], limit=3)
+    assert {studio: len(items) for studio, items in grouped.items()} == {"S1": 3, "S2": 3, "S3": 3, "S4": 0}
+
+
+class IndexDriver(FakeDriver):
+    """Reports the full-text index state and records every statement."""
+
+    def __init__(self, state: str | None) -> None:
+        super().__init__(FakeStore())
+        self.state = state
+        self.queries: List[str] = []
+
+    def run(self, query: str, parameters: Dict[str, Any] | None = None) -> List[_Record]:  # type: ignore[override]
+        self.queries.append(query)
+        if query == ENTITY_INDEX_STATE:
+            return [_Record({"state": self.state})] if self.state else []
+        if query == LIST_LABELS:
+            return [_Record({"label": label}) for label in ("Resource", "WellnessStudio")]
+        return [_Record({"node_id": "SGANG01"})]
+
+
+def test_entity_search_uses_the_fulltext_index_only_once_it_is_online(monkeypatch) -> None:
+    driver = IndexDriver(state=None)
+    monkeypatch.setattr("app.services.neo4j_reasoner.GraphDatabase", type("GD", (), {"driver": staticmethod(lambda *a, **k: driver)}))
+    reasoner = Neo4jReasoner(Neo4jConnectionConfig("bolt://127.0.0.1:9", "neo4j", "neo4j"), version_check_seconds=0)
+    assert driver.queries == []  # construction runs no DDL or index checks
+
+    reasoner.find_entities(["gangnam"])
+    assert driver.queries[-1] == ENTITY_SEARCH
+
+    driver.state = "ONLINE"
+    reasoner.find_entities(["gangnam"])
+    assert "db.index.fulltext.queryNodes" in driver.queries[-1]
+    assert not any(query.startswith("CREATE") for query in driver.queries)
@@ -0,0 +1,71 @@
+"""Neo4jService batch loading against an in-memory stand-in for py2neo.Graph."""
+from typing import Any, Dict, List
+
+from app.services.neo4j_service import Neo4jService
+from app.services.ontology_service import OntologyService
+
+
+class _Result:
+    def evaluate(self) -> int:
+        return 1
+
+
+class FakeGraph:
+    def __init__(self) -> None:
+        self.calls: List[tuple[str, Dict[str, Any]]] = []
+
+    def run(self, query: str, parameters: Dict[str, Any] | None = None) -> _Result:
+        self.calls.append((query, parameters or {}))
+        return _Result()
+
+
+TTL = """
+@prefix ex: <http://example.org/lop/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+""" + "\n".join(f"ex:Studio{i} ex:operatedBy ex:Trainer{i} ; rdfs:label \"Studio {i}\" ." for i in range(40))
+
+
+def _service(graph: FakeGraph) -> Neo4jService:
+    service = Neo4jService("bolt://127.0.0.1:9", "neo4j", "neo4j")
+    service._graph = graph
+    return service
+
+
+def test_one_node_statement_per_batch(tmp_path) -> None:
+    path = tmp_path / "studios.ttl"
+    path.write_text(TTL, encoding="utf-8")
+    ontology = OntologyService("", ttl_paths=[str(path)])
+    ontology.load_ontologies()
+    graph = FakeGraph()
+
+    batches = list(ontology.iter_neo4j_batches(batch_size=50))
+    result = _service(graph).load_batches(batches)
+
+    node_statements = [params for query, params in graph.calls if "MERGE (n:Resource" in query]
+    assert len(batches) > 1
+    assert len(node_statements) == len(batches)
+    assert result["status"] == "loaded"
+    labels = {label for params in node_statements for row in params["rows"] for label in row["labels"]}
+    assert {"Studio0", "Trainer39"} <= labels
+
+
+def test_batches_only_dedupe_within_a_batch(tmp_path) -> None:
+    path = tmp_path / "studios.ttl"
+    path.write_text(TTL, encoding="utf-8")
+    ontology = OntologyService("", ttl_paths=[str(path)])
+    ontology.load_ontologies()
+
+    for batch in ontology.iter_neo4j_batches(batch_size=20):
+        plain = [node["id"] for node in batch["nodes"] if not node["properties"]]
+        assert len(plain) == len(set(plain))
+
+
+def test_load_batches_creates_the_entity_indexes() -> None:
+    graph = FakeGraph()
+    _service(graph).load_batches([{"nodes": [{"id": "A", "labels": ["Studio"], "properties": {}}], "relationships": []}])
+
+    queries = [query for query, _ in graph.calls]
+    fulltext = next(index for index, query in enumerate(queries) if query.startswith("CREATE FULLTEXT INDEX"))
+    assert "FOR (n:`Resource`)" in queries[fulltext]
+    assert fulltext > max(index for index, query in enumerate(queries) if "MERGE (n:Resource" in query)
+    assert "CALL db.awaitIndexes(300)" in queries
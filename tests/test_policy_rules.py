@@ -0,0 +1,179 @@
+"""Declarative policy rules: compilation, scalar/columnar evaluation, hot reload and parity."""
+import os
+import random
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from app.services.policy_engine import PolicyEngine
+from app.services.policy_rules import PolicyRuleError, PolicyRules, compile_rules
+
+RULES = {
+    "fields": {
+        "score": {},
+        "tier": {},
+        "count": {"default": 0},
+        "nested.hits": {"default": 0, "column": "nested_hits"},
+    },
+    "derived": {"total": {"sum": ["count", "nested.hits"]}},
+    "policies": [
+        {"id": "high_score", "severity": "high", "when": {"score": {"gt": 0.5}},
+         "rationale": "score {score}", "evidence": ["score"]},
+        {"id": "busy", "when": {"any": [{"total": {"gte": 3}}, {"score": {"gt": 0.5}}]},
+         "rationale": "total {total}", "evidence": ["total"]},
+        {"id": "gold_quiet", "severity": "low", "when": {"all": [{"tier": {"eq": "gold"}}, {"not": {"count": {"gt": 0}}}]}},
+        {"id": "unscored", "when": {"not": {"score": {"present": True}}}},
+    ],
+}
+
+
+def _ids(hits):
+    return [hit["id"] for hit in hits]
+
+
+def test_compile_rules_shares_slots_and_predicates() -> None:
+    program = compile_rules(RULES)
+    assert [slot.name for slot in program.slots] == ["score", "tier", "count", "nested.hits", "total"]
+    # ``score > 0.5`` is used by two policies but compiled (and memoised) once.
+    assert len(program.predicates) == 5
+    assert ":=" in program.code
+
+
+@pytest.mark.parametrize(
+    "document, message",
+    [
+        ({"policies": []}, "non-empty list"),
+        ({"policies": [{"id": "a", "when": {"missing": {"gt": 1}}}]}, "unknown value"),
+        ({"fields": {"x": {}}, "policies": [{"id": "a", "when": {"x": {"approx": 1}}}]}, "unknown operator"),
+        ({"fields": {"x": {}}, "policies": [{"id": "a", "when": {"x": {"gt": 1}}}] * 2}, "duplicate policy id"),
+        ({"fields": {"x": {}}, "policies": [{"id": "a", "severity": "urgent", "when": {"x": {"gt": 1}}}]}, "severity"),
+    ],
+)
+def test_compile_rules_rejects_malformed_documents(document, message) -> None:
+    with pytest.raises(PolicyRuleError, match=message):
+        compile_rules(document)
+
+
+def test_scalar_path_reads_thresholds_as_bound_constants() -> None:
+    threshold = "gold'); import os; ('"
+    program = compile_rules({"fields": {"tier": {}}, "policies": [{"id": "odd", "when": {"tier": {"eq": threshold}}}]})
+    assert threshold not in program.code
+    assert _ids(program.evaluate({"tier": threshold})) == ["odd"]
+    assert program.evaluate({"tier": "gold"}) == []
+
+
+def test_scalar_path_defaults_nullables_and_nested_fields() -> None:
+    program = compile_rules(RULES)
+    assert _ids(program.evaluate({})) == ["unscored"]
+    assert _ids(program.evaluate({"score": None, "tier": "gold"})) == ["gold_quiet", "unscored"]
+    hits = program.evaluate({"score": 0.9, "count": 1, "nested": {"hits": 2}})
+    assert _ids(hits) == ["high_score", "busy"]
+    assert hits[0]["severity"] == "high" and hits[0]["rationale"] == "score 0.9"
+    assert hits[1]["evidence"] == {"total": 3}
+
+
+def test_evaluate_batch_masks_match_the_scalar_path() -> None:
+    program = compile_rules(RULES)
+    states = [
+        {"score": 0.9, "tier": "gold", "count": 0, "nested": {"hits": 0}},
+        {"score": None, "tier": "gold", "count": None, "nested": {"hits": None}},
+        {"score": 0.1, "tier": None, "count": 2, "nested": {"hits": 1}},
+        {"score": 0.2, "tier": "silver", "count": 0, "nested": {"hits": 0}},
+    ]
+    table = {
+        "score": [state["score"] for state in states],
+        "tier": [state["tier"] for state in states],
+        "count": [state["count"] for state in states],
+        "nested_hits": [state["nested"]["hits"] for state in states],
+    }
+    keys = ["a", "b", "c", "d"]
+    batch = program.evaluate_batch(table, np.asarray(keys))
+    expected = {key: program.evaluate(state) for key, state in zip(keys, states)}
+    assert batch == {key: hits for key, hits in expected.items() if hits}
+    assert "d" not in batch
+
+
+def test_broken_edit_keeps_serving_the_previous_rules(tmp_path, caplog) -> None:
+    path = tmp_path / "rules.yml"
+    path.write_text("fields: {x: {}}\npolicies:\n  - {id: big, when: {x: {gt: 10}}}\n", encoding="utf-8")
+    rules = PolicyRules(path, reload_interval=0)
+    assert _ids(rules.program.evaluate({"x": 5})) == []
+
+    path.write_text("fields: {x: {}}\npolicies:\n  - {id: big, when: {x: {gt: 1}}}\n", encoding="utf-8")
+    os.utime(path, ns=(0, 10**9))
+    assert _ids(rules.program.evaluate({"x": 5})) == ["big"]
+
+    path.write_text("fields: {x: {}}\npolicies:\n  - {id: big, when: {y: {gt: 1}}}\n", encoding="utf-8")
+    os.utime(path, ns=(0, 2 * 10**9))
+    assert rules.reload() is False
+    assert _ids(rules.program.evaluate({"x": 5})) == ["big"]
+    assert "Keeping previous policy rules" in caplog.text
+
+
+def _legacy_policies():
+    """The hand-written checks PolicyEngine shipped before the rule file."""
+
+    def refund(state):
+        ratio = state.get("refund_ratio", 0.0) or 0.0
+        keywords = state.get("keyword_counts", {})
+        mentions = keywords.get("refund", 0) + keywords.get("chargeback", 0)
+        evidence = {"refund_ratio": ratio, "refund_mentions": mentions}
+        return ratio > 0.12 or mentions >= 2, f"환불비율 {ratio:.2%}, 키워드 감지 {mentions}건", evidence
+
+    def decline(state):
+        keywords = state.get("keyword_counts", {})
+        hits = keywords.get("decline", 0) + keywords.get("fraud", 0)
+        relations = state.get("neo4j_hits", 0)
+        evidence = {"decline_keywords": hits, "neo4j_relations": relations}
+        return hits >= 1 or relations > 0, f"결제 경고 키워드 {hits}건, Neo4j 연관 {relations}건", evidence
+
+    def density(state):
+        graph_hits = state.get("graph_hits", 0)
+        return graph_hits > 120, f"그래프 triple {graph_hits}건", {"graph_hits": graph_hits}
+
+    def engagement(state):
+        attendance = state.get("attendance_rate")
+        sessions = state.get("avg_sessions_per_member")
+        triggered = (attendance is not None and attendance < 0.7) or (sessions is not None and sessions < 1.0)
+        evidence = {"attendance_rate": attendance, "avg_sessions_per_member": sessions}
+        return triggered, f"출석률 {attendance}, 1인당 세션 {sessions}", evidence
+
+    def payout(state):
+        lag = state.get("avg_payout_lag_days")
+        return lag is not None and lag > 10, f"평균 정산 지연 {lag}일", {"avg_payout_lag_days": lag}
+
+    return [
+        {"id": "policy_refund_pressure", "title": "환불·차지백 급증", "severity": "high", "check": refund},
+        {"id": "policy_payment_decline", "title": "결제 거절/사기 징후", "severity": "medium", "check": decline},
+        {"id": "policy_graph_density", "title": "비정상 그래프 연관도", "severity": "medium", "check": density},
+        {"id": "policy_engagement_drop", "title": "출석률/세션 참여 저하", "severity": "medium", "check": engagement},
+        {"id": "policy_payout_delay", "title": "정산 지연 리스크", "severity": "low", "check": payout},
+    ]
+
+
+def _random_state(rng: random.Random) -> Dict[str, Any]:
+    def maybe(value):
+        return None if rng.random() < 0.2 else value
+
+    return {
+        "refund_ratio": maybe(round(rng.uniform(0, 0.3), 3)),
+        "attendance_rate": maybe(round(rng.uniform(0.4, 1.0), 3)),
+        "avg_sessions_per_member": maybe(round(rng.uniform(0.5, 3.0), 2)),
+        "avg_payout_lag_days": maybe(round(rng.uniform(0, 20), 1)),
+        "graph_hits": rng.randint(0, 200),
+        "neo4j_hits": rng.choice((0, 0, 0, 1)),
+        "keyword_counts": {word: rng.choice((0, 0, 1, 2)) for word in ("refund", "chargeback", "decline", "fraud")},
+    }
+
+
+def test_default_rule_file_matches_the_legacy_engine() -> None:
+    rng = random.Random(7)
+    states = [_random_state(rng) for _ in range(2000)]
+    rules, legacy = PolicyEngine(), PolicyEngine(_legacy_policies())
+    assert rules.rules is not None
+
+    for state in states:
+        assert rules.evaluate(state) == legacy.evaluate(state)
+    batch = rules.evaluate_batch({"studio_id": list(range(len(states))), **PolicyEngine.state_table(states)})
+    assert batch == {index: hits for index, state in enumerate(states) if (hits := legacy.evaluate(state))}
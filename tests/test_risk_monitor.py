@@ -0,0 +1,75 @@
+"""RiskMonitor sliding windows and policy events."""
+from datetime import timedelta
+
+from app.services.risk_monitor import UNBOUNDED_WINDOW, RiskMonitor
+
+
+def _tx(day: int, amount: float, description: str = "", studio: str = "S1") -> dict:
+    return {
+        "studio_id": studio,
+        "timestamp": f"2025-06-{day:02d}T10:00:00",
+        "amount": str(amount),
+        "type": "refund" if amount < 0 else "purchase",
+        "member_id": f"m{day}",
+        "description": description,
+    }
+
+
+def test_rows_leave_the_window_as_the_watermark_moves() -> None:
+    monitor = RiskMonitor(window=timedelta(days=7))
+    monitor.ingest_many("transactions", [_tx(1, 100.0), _tx(2, -60.0, "chargeback 요청")])
+    state = monitor.snapshot("S1")
+    assert state["refund_ratio"] == 0.6
+    assert state["keyword_counts"]["refund"] == 1
+
+    monitor.ingest("transactions", _tx(20, 50.0))
+    state = monitor.snapshot("S1")
+    assert state["refund_ratio"] == 0.0
+    assert state["keyword_counts"]["refund"] == 0
+
+    assert monitor.ingest("transactions", _tx(3, -10.0)) == 0
+    assert monitor.dropped == 1
+
+
+def test_unbounded_window_keeps_every_row() -> None:
+    monitor = RiskMonitor(window=UNBOUNDED_WINDOW)
+    monitor.ingest_many("transactions", [_tx(1, 100.0), _tx(2, -60.0), _tx(28, 100.0)])
+    assert monitor.window is None
+    assert monitor.snapshot("S1")["refund_ratio"] == 0.3
+
+
+def test_flush_emits_trigger_and_clear_events() -> None:
+    events = []
+    monitor = RiskMonitor(window=timedelta(days=7), sinks=[events.append])
+    monitor.ingest_many("transactions", [_tx(1, 100.0), _tx(2, -90.0, "refund dispute")])
+    triggered = monitor.flush()
+    assert triggered and all(event["type"] == "policy_triggered" for event in triggered)
+    assert monitor.flush() == []
+
+    monitor.ingest("transactions", _tx(25, 100.0))
+    cleared = monitor.flush()
+    assert {event["policy_id"] for event in cleared} == {event["policy_id"] for event in triggered}
+    assert all(event["type"] == "policy_cleared" for event in cleared)
+    assert events == triggered + cleared
+
+
+def test_rows_without_window_content_do_not_break_expiry() -> None:
+    monitor = RiskMonitor(window=timedelta(days=7))
+    # Payout date but no period: no lag, so nothing to add to (or later expire from) S9.
+    assert monitor.ingest("settlements", {"studio_id": "S9", "payout_date": "2025-06-01", "amount": "100"}) == 1
+    monitor.flush()
+    assert monitor.snapshot("S9") is None
+
+    monitor.ingest("transactions", _tx(20, 100.0))
+    monitor.flush()
+    assert monitor.snapshot("S1")["refund_ratio"] == 0.0
+
+
+def test_untimed_rows_expire_from_the_first_watermark() -> None:
+    monitor = RiskMonitor(window=timedelta(days=7))
+    untimed = {**_tx(1, -50.0), "timestamp": ""}
+    monitor.ingest_many("transactions", [untimed, _tx(2, 100.0)])
+    assert monitor.snapshot("S1")["refund_ratio"] == 0.5
+
+    monitor.ingest("transactions", _tx(20, 100.0))
+    assert monitor.snapshot("S1")["refund_ratio"] == 0.0
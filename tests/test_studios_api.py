@@ -0,0 +1,42 @@
+"""Studio insight endpoints: streamed pipeline events over SSE and NDJSON."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+AGENT_EVENTS = ["insight", "risk", "recommendation", "strategy", "explanation"]
+
+
+def _sse_events(body: str):
+    for frame in body.strip().split("\n\n"):
+        name, data = frame.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        event = json.loads(data[len("data: "):])
+        assert event["event"] == name[len("event: "):]
+        yield event
+
+
+@pytest.mark.parametrize("fmt", ["sse", "ndjson"])
+def test_stream_emits_start_agents_done_in_order(fmt) -> None:
+    client = TestClient(app)
+    response = client.post(
+        f"/studios/SGANG01/insights/stream?format={fmt}",
+        json={"query": "stream test", "workflow": "Risk Review", "force_refresh": True},
+    )
+    assert response.status_code == 200
+    if fmt == "sse":
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = list(_sse_events(response.text))
+    else:
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.text.splitlines()]
+
+    names = [event["event"] for event in events if event["event"] != "token"]
+    assert names == ["start", *AGENT_EVENTS, "done"]
+    start, done = events[0], events[-1]
+    # force_refresh skips the cached replay the first parametrisation left behind.
+    assert start["cached"] is False and done["cached"] is False
+    assert start["workflow"] == done["workflow"] == "Risk Review"
+    assert done["trace_id"] == start["trace_id"]